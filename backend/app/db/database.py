@@ -1,5 +1,7 @@
 import os
 from sqlalchemy import create_engine
+from sqlalchemy.engine import make_url
+from sqlalchemy.ext.asyncio import async_sessionmaker, create_async_engine
 from sqlalchemy.orm import sessionmaker
 from dotenv import load_dotenv
 from pathlib import Path
@@ -18,9 +20,14 @@ if not DATABASE_URL:
     logger.critical("SUPABASE_DB_URL not set in environment")
     raise RuntimeError("SUPABASE_DB_URL not set")
 
+# Async request path pool; mostly idle connections waiting on I/O
+DB_POOL_SIZE = int(os.getenv("DB_POOL_SIZE", 10))
+DB_MAX_OVERFLOW = int(os.getenv("DB_MAX_OVERFLOW", 20))
+
 # Create SQLAlchemy engine
 logger.info("Creating database engine")
 
+# Sync engine for background ingestion workers and scripts
 engine = create_engine(
     DATABASE_URL,
     pool_pre_ping=True,
@@ -30,6 +37,22 @@ engine = create_engine(
     connect_args={"sslmode": "require"},
 )
 
+# Same database through asyncpg for the request path
+ASYNC_DATABASE_URL = (
+    make_url(DATABASE_URL)
+    .set(drivername="postgresql+asyncpg")
+    .difference_update_query(["sslmode"])
+)
+
+async_engine = create_async_engine(
+    ASYNC_DATABASE_URL,
+    pool_pre_ping=True,
+    pool_size=DB_POOL_SIZE,
+    max_overflow=DB_MAX_OVERFLOW,
+    pool_recycle=1800,
+    connect_args={"ssl": "require"},
+)
+
 logger.info("Database engine created successfully")
 
 # Session factory
@@ -39,4 +62,10 @@ SessionLocal = sessionmaker(
     bind=engine,
 )
 
+AsyncSessionLocal = async_sessionmaker(
+    bind=async_engine,
+    autoflush=False,
+    expire_on_commit=False,
+)
+
 logger.info("Database session factory initialized")
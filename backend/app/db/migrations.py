@@ -0,0 +1,34 @@
+from sqlalchemy import inspect, text
+
+from app.db.base import Base
+from app.db import models
+from app.utils.logger import logger
+
+# create_all only creates missing tables; also add nullable columns that
+# were introduced on existing models since the table was created
+def sync_schema(engine):
+    Base.metadata.create_all(bind=engine)
+
+    inspector = inspect(engine)
+
+    for table in Base.metadata.sorted_tables:
+        existing = {c["name"] for c in inspector.get_columns(table.name)}
+
+        for column in table.columns:
+            if column.name in existing:
+                continue
+
+            if not column.nullable:
+                logger.error(
+                    f"Cannot add NOT NULL column {table.name}.{column.name} automatically"
+                )
+                continue
+
+            column_type = column.type.compile(dialect=engine.dialect)
+
+            logger.info(f"Adding column {table.name}.{column.name} ({column_type})")
+
+            with engine.begin() as conn:
+                conn.execute(
+                    text(f"ALTER TABLE {table.name} ADD COLUMN {column.name} {column_type}")
+                )
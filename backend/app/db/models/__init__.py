@@ -1,4 +1,7 @@
 from app.db.models.file import File
 from app.db.models.chunk import Chunk
+from app.db.models.job import Job
+from app.db.models.collection import Collection, collection_files
+from app.db.models.upload_session import UploadSession, UploadPart
 
-__all__ = ["File", "Chunk"]
+__all__ = ["File", "Chunk", "Job", "Collection", "collection_files", "UploadSession", "UploadPart"]
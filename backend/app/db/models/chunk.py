@@ -1,5 +1,5 @@
 import uuid
-from sqlalchemy import Column, Text, Float, ForeignKey
+from sqlalchemy import Column, Text, Float, Integer, ForeignKey, LargeBinary
 from sqlalchemy.dialects.postgresql import UUID
 from sqlalchemy.types import ARRAY, Float as SAFloat
 
@@ -15,5 +15,15 @@ class Chunk(Base):
         nullable=False
     )
     text = Column(Text, nullable=False)
+    # Position of the chunk within its file, used to merge neighbours
+    chunk_index = Column(Integer)
     start_time = Column(Float)
     end_time = Column(Float)
+    # 1-based PDF pages the chunk was taken from
+    page_start = Column(Integer)
+    page_end = Column(Integer)
+    # Transcript windows: float32 (char offset, start, end) per merged
+    # segment (see chunking.pack_segment_offsets)
+    segment_offsets = Column(LargeBinary)
+    # float32 vector stored as raw bytes (see embedding_service.to_blob)
+    embedding = Column(LargeBinary)
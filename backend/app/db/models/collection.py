@@ -0,0 +1,35 @@
+import uuid
+from sqlalchemy import Column, Table, Text, DateTime, ForeignKey
+from sqlalchemy.dialects.postgresql import UUID
+from sqlalchemy.orm import relationship
+from sqlalchemy.sql import func
+
+from app.db.base import Base
+
+collection_files = Table(
+    "collection_files",
+    Base.metadata,
+    Column(
+        "collection_id",
+        UUID(as_uuid=True),
+        ForeignKey("collections.id", ondelete="CASCADE"),
+        primary_key=True,
+    ),
+    Column(
+        "file_id",
+        UUID(as_uuid=True),
+        ForeignKey("files.id", ondelete="CASCADE"),
+        primary_key=True,
+        index=True,
+    ),
+)
+
+class Collection(Base):
+    __tablename__ = "collections"
+
+    id = Column(UUID(as_uuid=True), primary_key=True, default=uuid.uuid4)
+    user_id = Column(UUID(as_uuid=True), nullable=False, index=True)
+    name = Column(Text, nullable=False)
+    created_at = Column(DateTime(timezone=True), server_default=func.now())
+
+    files = relationship("File", secondary=collection_files, lazy="selectin")
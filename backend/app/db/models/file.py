@@ -12,4 +12,6 @@ class File(Base):
     user_id = Column(UUID(as_uuid=True), nullable=False)
     filename = Column(Text, nullable=False)
     file_type = Column(String, nullable=False)
+    # sha256 of the file bytes, key into the blob store (see blob_store)
+    content_hash = Column(String(64), index=True)
     created_at = Column(DateTime(timezone=True), server_default=func.now())
@@ -0,0 +1,35 @@
+import uuid
+from sqlalchemy import Column, String, Text, Integer, BigInteger, DateTime, ForeignKey
+from sqlalchemy.dialects.postgresql import UUID
+from sqlalchemy.sql import func
+
+from app.db.base import Base
+
+class UploadSession(Base):
+    __tablename__ = "upload_sessions"
+
+    id = Column(UUID(as_uuid=True), primary_key=True, default=uuid.uuid4)
+    user_id = Column(UUID(as_uuid=True), nullable=False, index=True)
+    # Id the File row gets on completion; parts are written to its final path
+    file_id = Column(UUID(as_uuid=True), nullable=False, default=uuid.uuid4)
+    filename = Column(Text, nullable=False)
+    file_type = Column(String, nullable=False)
+    total_size = Column(BigInteger, nullable=False)
+    part_size = Column(Integer, nullable=False)
+    # Expected sha256 of the whole file, hex, when the client sent one
+    sha256 = Column(String)
+    status = Column(String, nullable=False, default="active")
+    created_at = Column(DateTime(timezone=True), server_default=func.now())
+    expires_at = Column(DateTime(timezone=True), nullable=False)
+
+class UploadPart(Base):
+    __tablename__ = "upload_parts"
+
+    session_id = Column(
+        UUID(as_uuid=True),
+        ForeignKey("upload_sessions.id", ondelete="CASCADE"),
+        primary_key=True,
+    )
+    part_number = Column(Integer, primary_key=True)
+    size = Column(Integer, nullable=False)
+    sha256 = Column(String, nullable=False)
@@ -1,14 +1,13 @@
-from app.db.database import SessionLocal
+from app.db.database import AsyncSessionLocal
 from app.utils.logger import logger
 
-def get_db():
+async def get_db():
     logger.debug("Opening new DB session")
-    db = SessionLocal()
-    try:
-        yield db
-    except Exception as e:
-        logger.error("Error during DB session usage", exc_info=True)
-        raise
-    finally:
-        db.close()
-        logger.debug("DB session closed")
+    async with AsyncSessionLocal() as db:
+        try:
+            yield db
+        except Exception as e:
+            logger.error("Error during DB session usage", exc_info=True)
+            raise
+        finally:
+            logger.debug("DB session closed")
@@ -23,3 +23,13 @@ class NotFoundError(AppError):
 class InternalServerError(AppError):
     def __init__(self, message="Internal server error"):
         super().__init__(message, 500)
+
+
+class PayloadTooLargeError(AppError):
+    def __init__(self, message="Payload too large"):
+        super().__init__(message, 413)
+
+
+class TooManyRequestsError(AppError):
+    def __init__(self, message="Too many requests"):
+        super().__init__(message, 429)
@@ -0,0 +1,269 @@
+import threading
+import uuid
+from dataclasses import dataclass, field, replace
+from datetime import datetime, timedelta, timezone
+
+from sqlalchemy import update
+
+from app.db.models.job import Job
+from app.utils.logger import logger
+
+QUEUED = "queued"
+RUNNING = "running"
+SUCCEEDED = "succeeded"
+FAILED = "failed"
+
+
+def utcnow():
+    return datetime.now(timezone.utc)
+
+
+@dataclass
+class JobRecord:
+    id: uuid.UUID
+    file_id: uuid.UUID
+    user_id: uuid.UUID
+    status: str = QUEUED
+    stage: str | None = None
+    progress: float = 0.0
+    attempts: int = 0
+    max_attempts: int = 3
+    stage_timings: dict = field(default_factory=dict)
+    result: dict | None = None
+    error: str | None = None
+    run_after: datetime | None = None
+    created_at: datetime | None = None
+    updated_at: datetime | None = None
+    started_at: datetime | None = None
+    finished_at: datetime | None = None
+
+    def to_dict(self) -> dict:
+        return {
+            "job_id": str(self.id),
+            "file_id": str(self.file_id),
+            "status": self.status,
+            "stage": self.stage,
+            "progress": self.progress,
+            "attempts": self.attempts,
+            "max_attempts": self.max_attempts,
+            "stage_timings": self.stage_timings or {},
+            "result": self.result,
+            "error": self.error,
+            "created_at": self.created_at,
+            "started_at": self.started_at,
+            "finished_at": self.finished_at,
+        }
+
+
+class JobBackend:
+    """Storage for ingestion jobs shared by the API and the worker pool."""
+
+    def enqueue(self, file_id, user_id, max_attempts: int = 3) -> JobRecord:
+        raise NotImplementedError
+
+    def get(self, job_id) -> JobRecord | None:
+        raise NotImplementedError
+
+    # Atomically move the next runnable job to RUNNING, or return None
+    def claim(self) -> JobRecord | None:
+        raise NotImplementedError
+
+    def update(self, job_id, **fields):
+        raise NotImplementedError
+
+    # Mark a RUNNING job as alive by touching its updated_at
+    def heartbeat(self, job_id):
+        raise NotImplementedError
+
+    # Put RUNNING jobs whose worker stopped heartbeating back in the queue
+    def requeue_stale(self, older_than: timedelta) -> int:
+        raise NotImplementedError
+
+
+class InMemoryJobBackend(JobBackend):
+    def __init__(self):
+        self._jobs = {}
+        self._lock = threading.Lock()
+
+    def enqueue(self, file_id, user_id, max_attempts: int = 3) -> JobRecord:
+        now = utcnow()
+        job = JobRecord(
+            id=uuid.uuid4(),
+            file_id=file_id,
+            user_id=user_id,
+            max_attempts=max_attempts,
+            run_after=now,
+            created_at=now,
+            updated_at=now,
+        )
+
+        with self._lock:
+            self._jobs[job.id] = job
+
+        return replace(job)
+
+    def get(self, job_id) -> JobRecord | None:
+        with self._lock:
+            job = self._jobs.get(job_id)
+            return replace(job) if job else None
+
+    def claim(self) -> JobRecord | None:
+        now = utcnow()
+
+        with self._lock:
+            runnable = [
+                job for job in self._jobs.values()
+                if job.status == QUEUED and job.run_after <= now
+            ]
+
+            if not runnable:
+                return None
+
+            job = min(runnable, key=lambda j: j.created_at)
+            job.status = RUNNING
+            job.attempts += 1
+            job.started_at = now
+            job.updated_at = now
+
+            return replace(job)
+
+    def update(self, job_id, **fields):
+        with self._lock:
+            job = self._jobs[job_id]
+            for key, value in fields.items():
+                setattr(job, key, value)
+            job.updated_at = utcnow()
+
+    def heartbeat(self, job_id):
+        with self._lock:
+            job = self._jobs[job_id]
+            if job.status == RUNNING:
+                job.updated_at = utcnow()
+
+    def requeue_stale(self, older_than: timedelta) -> int:
+        cutoff = utcnow() - older_than
+        count = 0
+
+        with self._lock:
+            for job in self._jobs.values():
+                if job.status == RUNNING and job.updated_at < cutoff:
+                    job.status = QUEUED
+                    count += 1
+
+        return count
+
+
+class SQLJobBackend(JobBackend):
+    """Jobs stored in the `jobs` table (Postgres in prod, SQLite in tests)."""
+
+    def __init__(self, session_factory):
+        self.session_factory = session_factory
+
+    @staticmethod
+    def _to_record(job: Job) -> JobRecord:
+        return JobRecord(
+            id=job.id,
+            file_id=job.file_id,
+            user_id=job.user_id,
+            status=job.status,
+            stage=job.stage,
+            progress=job.progress,
+            attempts=job.attempts,
+            max_attempts=job.max_attempts,
+            stage_timings=job.stage_timings or {},
+            result=job.result,
+            error=job.error,
+            run_after=job.run_after,
+            created_at=job.created_at,
+            updated_at=job.updated_at,
+            started_at=job.started_at,
+            finished_at=job.finished_at,
+        )
+
+    def enqueue(self, file_id, user_id, max_attempts: int = 3) -> JobRecord:
+        now = utcnow()
+
+        with self.session_factory() as db:
+            job = Job(
+                file_id=file_id,
+                user_id=user_id,
+                status=QUEUED,
+                progress=0.0,
+                attempts=0,
+                max_attempts=max_attempts,
+                stage_timings={},
+                run_after=now,
+                created_at=now,
+                updated_at=now,
+            )
+            db.add(job)
+            db.commit()
+            db.refresh(job)
+
+            return self._to_record(job)
+
+    def get(self, job_id) -> JobRecord | None:
+        with self.session_factory() as db:
+            job = db.get(Job, job_id)
+            return self._to_record(job) if job else None
+
+    def claim(self) -> JobRecord | None:
+        now = utcnow()
+
+        with self.session_factory() as db:
+            query = (
+                db.query(Job)
+                .filter(Job.status == QUEUED, Job.run_after <= now)
+                .order_by(Job.created_at)
+                .limit(1)
+            )
+
+            # Let concurrent workers across processes claim different rows
+            if db.bind.dialect.name == "postgresql":
+                query = query.with_for_update(skip_locked=True)
+
+            job = query.first()
+
+            if job is None:
+                return None
+
+            job.status = RUNNING
+            job.attempts += 1
+            job.started_at = now
+            job.updated_at = now
+            db.commit()
+            db.refresh(job)
+
+            return self._to_record(job)
+
+    def update(self, job_id, **fields):
+        fields["updated_at"] = utcnow()
+
+        with self.session_factory() as db:
+            db.execute(update(Job).where(Job.id == job_id).values(**fields))
+            db.commit()
+
+    def heartbeat(self, job_id):
+        with self.session_factory() as db:
+            db.execute(
+                update(Job)
+                .where(Job.id == job_id, Job.status == RUNNING)
+                .values(updated_at=utcnow())
+            )
+            db.commit()
+
+    def requeue_stale(self, older_than: timedelta) -> int:
+        cutoff = utcnow() - older_than
+
+        with self.session_factory() as db:
+            result = db.execute(
+                update(Job)
+                .where(Job.status == RUNNING, Job.updated_at < cutoff)
+                .values(status=QUEUED, updated_at=utcnow())
+            )
+            db.commit()
+
+        if result.rowcount:
+            logger.warning(f"Requeued {result.rowcount} stale ingestion jobs")
+
+        return result.rowcount
@@ -0,0 +1,61 @@
+import os
+
+from app.db.database import SessionLocal
+from app.db.models.file import File
+from app.jobs.backends import InMemoryJobBackend, SQLJobBackend
+from app.jobs.worker import JobWorker
+from app.errors.app_errors import NotFoundError
+from app.services.ingestion import ingest_file
+from app.utils.logger import logger
+
+JOB_BACKEND = os.getenv("JOB_BACKEND", "sql").lower()
+JOB_WORKERS = int(os.getenv("JOB_WORKERS", 2))
+JOB_MAX_ATTEMPTS = int(os.getenv("JOB_MAX_ATTEMPTS", 3))
+JOB_POLL_INTERVAL = float(os.getenv("JOB_POLL_INTERVAL", 1.0))
+JOB_RETRY_BACKOFF = float(os.getenv("JOB_RETRY_BACKOFF", 5.0))
+# Running jobs not heartbeating for JOB_STALE_SECONDS are requeued on startup
+JOB_STALE_SECONDS = float(os.getenv("JOB_STALE_SECONDS", 1800))
+JOB_HEARTBEAT_SECONDS = float(os.getenv("JOB_HEARTBEAT_SECONDS", 60))
+
+
+def create_backend(name: str = JOB_BACKEND):
+    if name == "memory":
+        return InMemoryJobBackend()
+
+    if name == "sql":
+        return SQLJobBackend(SessionLocal)
+
+    raise RuntimeError(f"Unknown JOB_BACKEND '{name}'")
+
+# Job handler: ingest the file referenced by the job
+def run_ingestion_job(job, context) -> dict:
+    with SessionLocal() as db:
+        file = db.get(File, job.file_id)
+
+        if file is None:
+            raise NotFoundError("File not found")
+
+        return ingest_file(db, file, context)
+
+
+job_backend = create_backend()
+
+job_worker = JobWorker(
+    job_backend,
+    run_ingestion_job,
+    concurrency=JOB_WORKERS,
+    poll_interval=JOB_POLL_INTERVAL,
+    retry_backoff=JOB_RETRY_BACKOFF,
+    stale_after=JOB_STALE_SECONDS,
+    heartbeat_interval=JOB_HEARTBEAT_SECONDS,
+)
+
+logger.info(f"Ingestion job queue initialized with {JOB_BACKEND} backend")
+
+def enqueue_ingestion(file_id, user_id):
+    job = job_backend.enqueue(file_id, user_id, max_attempts=JOB_MAX_ATTEMPTS)
+    job_worker.notify()
+
+    logger.info(f"Enqueued ingestion job {job.id} for file {file_id}")
+
+    return job
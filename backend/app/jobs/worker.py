@@ -0,0 +1,184 @@
+import threading
+import time
+from contextlib import contextmanager
+from datetime import timedelta
+
+from fastapi import HTTPException
+
+from app.errors.app_errors import AppError
+from app.jobs.backends import FAILED, QUEUED, SUCCEEDED, utcnow
+from app.utils.logger import logger
+
+# Errors that will fail the same way on every attempt
+PERMANENT_ERRORS = (AppError, HTTPException, FileNotFoundError)
+
+
+class JobContext:
+    """Handed to job handlers to report stage timings and progress."""
+
+    def __init__(self, backend, job):
+        self.backend = backend
+        self.job = job
+        self.stage_timings = {}
+
+    @contextmanager
+    def stage(self, name: str):
+        self.backend.update(self.job.id, stage=name)
+        started = time.perf_counter()
+
+        try:
+            yield
+        finally:
+            self.stage_timings[name] = round(time.perf_counter() - started, 3)
+            self.backend.update(self.job.id, stage_timings=dict(self.stage_timings))
+
+    def progress(self, value: float):
+        self.backend.update(self.job.id, progress=min(max(value, 0.0), 1.0))
+
+
+class JobWorker:
+    def __init__(
+        self,
+        backend,
+        handler,
+        concurrency: int = 2,
+        poll_interval: float = 1.0,
+        retry_backoff: float = 5.0,
+        stale_after: float = 1800.0,
+        heartbeat_interval: float = 60.0,
+    ):
+        self.backend = backend
+        self.handler = handler
+        self.concurrency = concurrency
+        self.poll_interval = poll_interval
+        self.retry_backoff = retry_backoff
+        self.stale_after = stale_after
+        self.heartbeat_interval = heartbeat_interval
+
+        if heartbeat_interval >= stale_after:
+            logger.warning(
+                f"Job heartbeat interval ({heartbeat_interval}s) is not below the stale "
+                f"timeout ({stale_after}s), running jobs may be requeued"
+            )
+        self._threads = []
+        self._stopping = threading.Event()
+        self._wakeup = threading.Event()
+
+    def start(self):
+        if self._threads:
+            return
+
+        self._stopping.clear()
+        self.backend.requeue_stale(timedelta(seconds=self.stale_after))
+
+        for i in range(self.concurrency):
+            thread = threading.Thread(
+                target=self._run,
+                name=f"ingestion-worker-{i}",
+                daemon=True,
+            )
+            thread.start()
+            self._threads.append(thread)
+
+        logger.info(f"Started {self.concurrency} ingestion workers")
+
+    def stop(self, timeout: float = 10.0):
+        self._stopping.set()
+        self._wakeup.set()
+
+        for thread in self._threads:
+            thread.join(timeout)
+
+        self._threads = []
+        logger.info("Ingestion workers stopped")
+
+    # Wake idle workers right away instead of waiting for the next poll
+    def notify(self):
+        self._wakeup.set()
+
+    def _run(self):
+        while not self._stopping.is_set():
+            try:
+                job = self.backend.claim()
+            except Exception:
+                logger.error("Failed to claim ingestion job", exc_info=True)
+                job = None
+
+            if job is None:
+                self._wakeup.wait(self.poll_interval)
+                self._wakeup.clear()
+                continue
+
+            self.run_job(job)
+
+    def run_job(self, job):
+        logger.info(
+            f"Running ingestion job {job.id} for file {job.file_id}, attempt {job.attempts}"
+        )
+
+        context = JobContext(self.backend, job)
+
+        # Keep the job fresh while the handler runs, so requeue_stale in a
+        # restarting worker only picks up jobs whose worker is gone
+        done = threading.Event()
+        heartbeat = threading.Thread(
+            target=self._heartbeat,
+            args=(job, done),
+            name=f"{threading.current_thread().name}-heartbeat",
+            daemon=True,
+        )
+        heartbeat.start()
+
+        try:
+            result = self.handler(job, context)
+        except Exception as e:
+            self._handle_failure(job, e)
+            return
+        finally:
+            done.set()
+            heartbeat.join()
+
+        self.backend.update(
+            job.id,
+            status=SUCCEEDED,
+            stage=None,
+            progress=1.0,
+            result=result,
+            error=None,
+            finished_at=utcnow(),
+        )
+
+        logger.info(f"Ingestion job {job.id} succeeded")
+
+    def _heartbeat(self, job, done: threading.Event):
+        while not done.wait(self.heartbeat_interval):
+            try:
+                self.backend.heartbeat(job.id)
+            except Exception:
+                logger.warning(f"Heartbeat for ingestion job {job.id} failed", exc_info=True)
+
+    def _handle_failure(self, job, error: Exception):
+        message = getattr(error, "message", None) or getattr(error, "detail", None) or str(error)
+
+        if isinstance(error, PERMANENT_ERRORS) or job.attempts >= job.max_attempts:
+            logger.error(f"Ingestion job {job.id} failed: {message}", exc_info=True)
+            self.backend.update(
+                job.id,
+                status=FAILED,
+                error=message,
+                finished_at=utcnow(),
+            )
+            return
+
+        delay = self.retry_backoff * 2 ** (job.attempts - 1)
+
+        logger.warning(
+            f"Ingestion job {job.id} attempt {job.attempts} failed: {message}, retrying in {delay}s"
+        )
+
+        self.backend.update(
+            job.id,
+            status=QUEUED,
+            error=message,
+            run_after=utcnow() + timedelta(seconds=delay),
+        )
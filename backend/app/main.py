@@ -1,16 +1,22 @@
+import asyncio
 import os
-from fastapi import FastAPI
+from fastapi import FastAPI, Request, Response
 from fastapi.middleware.cors import CORSMiddleware
 from dotenv import load_dotenv
 from pathlib import Path
 
-from app.db.database import engine
-from app.db.base import Base
+from app.db.database import AsyncSessionLocal, async_engine, engine
+from app.db.migrations import sync_schema
 from app.db import models
 
 from app.middleware.error_handler import app_exception_handler
 from app.middleware.api_key import api_key_middleware
+from app.middleware.metrics import metrics_middleware
 from app.errors.app_errors import AppError
+from app.jobs.queue import job_worker
+from app.services.chunking import check_chunkers
+from app.services.upload_service import run_upload_sweeper
+from app.utils import metrics
 
 # Load env
 env_path = Path(__file__).resolve().parents[1] / ".env"
@@ -35,10 +41,28 @@ app.add_middleware(
 # API key protection
 app.middleware("http")(api_key_middleware)
 
+# Prometheus metrics (METRICS_ENABLED); added last so it also times
+# requests rejected by the API key check
+if metrics.enabled:
+    app.middleware("http")(metrics_middleware)
+    metrics.instrument_engine(engine, "sync")
+    metrics.instrument_engine(async_engine.sync_engine, "async")
+
 @app.on_event("startup")
-def on_startup():
+async def on_startup():
+    check_chunkers()
+
     if DB_SYNC:
-        Base.metadata.create_all(bind=engine)
+        sync_schema(engine)
+
+    job_worker.start()
+    app.state.upload_sweeper = asyncio.create_task(run_upload_sweeper(AsyncSessionLocal))
+
+@app.on_event("shutdown")
+async def on_shutdown():
+    app.state.upload_sweeper.cancel()
+    job_worker.stop()
+    await async_engine.dispose()
 
 # Error handling
 app.add_exception_handler(AppError, app_exception_handler)
@@ -48,9 +72,23 @@ app.add_exception_handler(Exception, app_exception_handler)
 def health():
     return {"status": "ok"}
 
-from app.routers import auth, upload, process, chat
+@app.get("/metrics", include_in_schema=False)
+def prometheus_metrics(request: Request):
+    if not metrics.enabled:
+        return Response(status_code=404)
+
+    if not metrics.authorized(request.headers.get("authorization")):
+        return Response(status_code=401)
+
+    body, content_type = metrics.render_metrics()
+
+    return Response(content=body, media_type=content_type)
+
+from app.routers import auth, upload, process, chat, collections, stats
 
 app.include_router(auth.router)
 app.include_router(upload.router, prefix="/upload", tags=["Upload"])
 app.include_router(process.router)
 app.include_router(chat.router)
+app.include_router(collections.router)
+app.include_router(stats.router)
@@ -10,6 +10,8 @@ API_KEY = os.getenv("X_API_KEY")
 EXCLUDED_PATHS = {
     "/auth/login",
     "/auth/register",
+    # Scraped by Prometheus, which authenticates with METRICS_TOKEN instead
+    "/metrics",
 }
 
 async def api_key_middleware(request: Request, call_next):
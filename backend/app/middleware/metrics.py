@@ -0,0 +1,37 @@
+import time
+
+from fastapi import Request
+
+from app.utils.metrics import HTTP_REQUEST_SECONDS
+
+# Route template for a request, including any router prefix: newer FastAPI
+# versions resolve included routers lazily, so scope["route"].path is relative
+# to its router and the prefix has to be taken from the matched URL
+def route_template(request: Request) -> str:
+    route = request.scope.get("route")
+    if route is None:
+        return "unmatched"
+
+    segments = request.scope["path"].rstrip("/").split("/")
+    depth = len(route.path.rstrip("/").split("/"))
+    prefix = "/".join(segments[:max(len(segments) - depth, 0) + 1])
+
+    return prefix + route.path
+
+
+# Per-route latency; labelled by the route template, not the raw path, so
+# ids in URLs do not create new series
+async def metrics_middleware(request: Request, call_next):
+    started = time.perf_counter()
+    status = 500
+
+    try:
+        response = await call_next(request)
+        status = response.status_code
+        return response
+    finally:
+        HTTP_REQUEST_SECONDS.labels(
+            request.method,
+            route_template(request),
+            str(status),
+        ).observe(time.perf_counter() - started)
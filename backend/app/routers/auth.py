@@ -2,12 +2,15 @@ import os
 from pathlib import Path
 
 from fastapi import APIRouter, Depends
+from fastapi.concurrency import run_in_threadpool
 from fastapi.security import HTTPBearer, HTTPAuthorizationCredentials
 from pydantic import BaseModel, EmailStr
 from supabase import create_client
 from dotenv import load_dotenv
 
+from app.services.token_verifier import TokenVerifier
 from app.utils.logger import logger
+from app.utils.ttl_cache import TTLCache
 from app.errors.app_errors import (
     BadRequestError,
     UnauthorizedError,
@@ -24,9 +27,27 @@ if not SUPABASE_URL or not SUPABASE_ANON_KEY:
     logger.critical("Supabase auth env vars not set")
     raise RuntimeError("Supabase auth env vars not set")
 
+# Local JWT verification: HS256 project secret and/or the project's JWKS
+SUPABASE_JWT_SECRET = os.getenv("SUPABASE_JWT_SECRET")
+SUPABASE_JWKS_URL = os.getenv(
+    "SUPABASE_JWKS_URL",
+    f"{SUPABASE_URL.rstrip('/')}/auth/v1/.well-known/jwks.json",
+)
+SUPABASE_JWT_AUDIENCE = os.getenv("SUPABASE_JWT_AUDIENCE", "authenticated")
+AUTH_CACHE_TTL = float(os.getenv("AUTH_CACHE_TTL", 60))
+AUTH_CACHE_MAX_ITEMS = int(os.getenv("AUTH_CACHE_MAX_ITEMS", 10_000))
+
 supabase = create_client(SUPABASE_URL, SUPABASE_ANON_KEY)
 security = HTTPBearer(auto_error=False)
 
+token_verifier = TokenVerifier(
+    jwt_secret=SUPABASE_JWT_SECRET,
+    jwks_url=SUPABASE_JWKS_URL or None,
+    audience=SUPABASE_JWT_AUDIENCE or None,
+    cache=TTLCache(AUTH_CACHE_MAX_ITEMS, AUTH_CACHE_TTL),
+    remote_get_user=supabase.auth.get_user,
+)
+
 router = APIRouter(prefix="/auth", tags=["Auth"])
 
 
@@ -41,10 +62,11 @@ class LoginRequest(BaseModel):
 
 # Register User
 @router.post("/register")
-def register_user(payload: RegisterRequest):
+async def register_user(payload: RegisterRequest):
     logger.info(f"Register attempt for {payload.email}")
 
-    response = supabase.auth.sign_up(
+    response = await run_in_threadpool(
+        supabase.auth.sign_up,
         {
             "email": payload.email,
             "password": payload.password,
@@ -61,10 +83,11 @@ def register_user(payload: RegisterRequest):
 
 # Login
 @router.post("/login")
-def login_user(payload: LoginRequest):
+async def login_user(payload: LoginRequest):
     logger.info(f"Login attempt for {payload.email}")
 
-    response = supabase.auth.sign_in_with_password(
+    response = await run_in_threadpool(
+        supabase.auth.sign_in_with_password,
         {
             "email": payload.email,
             "password": payload.password,
@@ -81,7 +104,7 @@ def login_user(payload: LoginRequest):
     }
 
 # Get Current User Token
-def get_current_user(
+async def get_current_user(
     credentials: HTTPAuthorizationCredentials = Depends(security),
 ):
     if credentials is None:
@@ -89,12 +112,10 @@ def get_current_user(
 
     token = credentials.credentials
 
-    try:
-        response = supabase.auth.get_user(token)
-    except Exception:
-        raise UnauthorizedError("TOKEN_EXPIRED")
-
-    if response.user is None:
-        raise UnauthorizedError("TOKEN_INVALID")
+    # Hot path: token already validated and not yet expired
+    user = token_verifier.cached_user(token)
+    if user is not None:
+        return user
 
-    return response.user
+    # JWKS fetches and the remote fallback block, keep them off the event loop
+    return await run_in_threadpool(token_verifier.verify, token)
@@ -1,57 +1,116 @@
-from fastapi import APIRouter, Depends, HTTPException
-from sqlalchemy.orm import Session
-from openai import OpenAI
-from pydantic import BaseModel
+import json
+import time
+
+from fastapi import APIRouter, Depends, HTTPException, Request
+from fastapi.responses import StreamingResponse
+from sqlalchemy import func, select
+from sqlalchemy.ext.asyncio import AsyncSession
+from openai import AsyncOpenAI
+from pydantic import BaseModel, model_validator
 from uuid import UUID
 
 from app.deps import get_db
 from app.routers.auth import get_current_user
 from app.db.models.chunk import Chunk
-from app.services.embedding_service import embed_texts
-from app.services.rag_loader import load_index
+from app.db.models.collection import Collection
+from app.db.models.file import File
+from app.services.answer_cache import answer_cache, question_embedding
+from app.services.context_builder import build_context, render_context
+from app.services.retrieval import retriever
 from app.utils.logger import logger
+from app.utils.metrics import CHAT_COMPLETION_SECONDS, record_error
 
 router = APIRouter(prefix="/chat", tags=["Chat"])
-client = OpenAI()
+client = AsyncOpenAI()
+
+CHAT_MODEL = "gpt-4o-mini"
 
 
+# A question is asked about one file, a list of files or a whole collection
 class ChatRequest(BaseModel):
     question: str
-    file_id: UUID
+    file_id: UUID | None = None
+    file_ids: list[UUID] | None = None
+    collection_id: UUID | None = None
 
+    @model_validator(mode="after")
+    def check_scope(self):
+        if not (self.file_id or self.file_ids or self.collection_id):
+            raise ValueError("Provide file_id, file_ids or collection_id")
+        return self
 
-@router.post("/")
-def chat(
-    payload: ChatRequest,
-    db: Session = Depends(get_db),
-    current_user=Depends(get_current_user),
-):
-    logger.info(
-        f"Chat query received from user {current_user.id} for file {payload.file_id}"
-    )
 
-    vector_store = load_index(db, payload.file_id)
+def has_source(chunk) -> bool:
+    return chunk.start_time is not None or chunk.page_start is not None
 
-    if vector_store is None:
-        raise HTTPException(
-            status_code=400,
-            detail="File is still being processed. Please try again in a moment.",
-        )
+# Citation for a chunk or context block: time range (plus the exact
+# transcript segments, when known) for audio/video, page range for PDFs
+def chunk_source(chunk) -> dict:
+    if chunk.start_time is not None:
+        source = {
+            "file_id": str(chunk.file_id),
+            "start": chunk.start_time,
+            "end": chunk.end_time,
+        }
+
+        if getattr(chunk, "segments", None):
+            source["segments"] = [
+                {"start": start, "end": end} for start, end in chunk.segments
+            ]
+
+        return source
+
+    return {
+        "file_id": str(chunk.file_id),
+        "page_start": chunk.page_start,
+        "page_end": chunk.page_end,
+    }
 
-    query_embedding = embed_texts([payload.question])[0]
+# Files the question is scoped to, restricted to files the user owns
+async def resolve_file_ids(db: AsyncSession, payload: ChatRequest, user_id: UUID) -> list:
+    file_ids = []
 
-    chunk_ids = vector_store.search(query_embedding, k=5)
+    if payload.file_id:
+        file_ids.append(payload.file_id)
 
-    logger.info(f"Vector search returned {len(chunk_ids)} chunks")
+    if payload.file_ids:
+        file_ids.extend(payload.file_ids)
 
-    chunks = (
-        db.query(Chunk)
-        .filter(
-            Chunk.id.in_(chunk_ids),
-            Chunk.file_id == payload.file_id,
+    if payload.collection_id:
+        result = await db.execute(
+            select(Collection).where(
+                Collection.id == payload.collection_id,
+                Collection.user_id == user_id,
+            )
         )
-        .all()
+        collection = result.scalars().first()
+
+        if collection is None:
+            raise HTTPException(status_code=404, detail="Collection not found")
+
+        file_ids.extend(f.id for f in collection.files)
+
+    result = await db.execute(
+        select(File.id).where(File.id.in_(set(file_ids)), File.user_id == user_id)
     )
+    owned = set(result.scalars().all())
+
+    if not owned:
+        raise HTTPException(status_code=404, detail="File not found")
+
+    return [file_id for file_id in dict.fromkeys(file_ids) if file_id in owned]
+
+# Find the chunks most relevant to the question across all scoped files
+async def retrieve_chunks(db: AsyncSession, file_ids: list, question: str):
+    chunks = await retriever.retrieve(db, file_ids, question, k=5)
+
+    if chunks is None:
+        raise HTTPException(
+            status_code=400,
+            detail="File is still being processed. Please try again in a moment.",
+        )
+
+    logger.info(f"Vector search returned {len(chunks)} chunks")
 
     if not chunks:
         raise HTTPException(
@@ -59,7 +118,11 @@ def chat(
             detail="No relevant content found for this file",
         )
 
-    context = "\n".join(c.text for c in chunks)
+    return chunks
+
+
+def build_messages(blocks, question: str) -> list[dict]:
+    context = render_context(blocks)
 
     prompt = f"""
                 Use the context below to answer the question.
@@ -68,26 +131,190 @@ def chat(
                 {context}
 
                 Question:
-                {payload.question}
+                {question}
                 """
 
-    logger.info("Sending prompt to OpenAI")
+    return [{"role": "user", "content": prompt}]
+
+
+def sse_event(event: str, data: dict) -> str:
+    return f"event: {event}\ndata: {json.dumps(data)}\n\n"
+
+
+# Whether every cited chunk is still stored; reprocessing a file replaces
+# its chunks with new ids, so this fails once the answer's sources changed
+async def chunks_exist(db: AsyncSession, chunk_ids) -> bool:
+    count = await db.scalar(
+        select(func.count())
+        .select_from(Chunk)
+        .where(Chunk.id.in_([UUID(chunk_id) for chunk_id in chunk_ids]))
+    )
+
+    return count == len(chunk_ids)
+
+
+# Cached answer for a similar question over the same files, checked before
+# retrieval; returns (answer or None, question embedding)
+async def lookup_similar_answer(db: AsyncSession, file_ids: list, question: str):
+    embedding = await question_embedding(question)
+
+    if embedding is None:
+        return None, None
+
+    cached = await answer_cache.get_similar(
+        file_ids, embedding, lambda chunk_ids: chunks_exist(db, chunk_ids)
+    )
+
+    return cached, embedding
+
 
-    completion = client.chat.completions.create(
-        model="gpt-4o-mini",
-        messages=[{"role": "user", "content": prompt}],
+@router.post("/")
+async def chat(
+    payload: ChatRequest,
+    db: AsyncSession = Depends(get_db),
+    current_user=Depends(get_current_user),
+):
+    logger.info(
+        f"Chat query received from user {current_user.id} for file {payload.file_id}"
     )
 
+    file_ids = await resolve_file_ids(db, payload, UUID(current_user.id))
+
+    cached, embedding = await lookup_similar_answer(db, file_ids, payload.question)
+
+    if cached is not None:
+        return {**cached, "cached": True}
+
+    chunks = await retrieve_chunks(db, file_ids, payload.question)
+
+    cache_key = None
+
+    if answer_cache is not None:
+        cache_key = answer_cache.exact_key(file_ids, chunks, payload.question)
+        cached = answer_cache.get(cache_key)
+
+        if cached is not None:
+            return {**cached, "cached": True}
+
+    blocks = build_context(chunks)
+
+    logger.info("Sending prompt to OpenAI")
+
+    try:
+        with CHAT_COMPLETION_SECONDS.labels("false").time():
+            completion = await client.chat.completions.create(
+                model=CHAT_MODEL,
+                messages=build_messages(blocks, payload.question),
+            )
+    except Exception as e:
+        record_error("chat", e)
+        raise
+
     logger.info("OpenAI response received")
 
-    return {
+    answer = {
         "answer": completion.choices[0].message.content,
-        "sources": [
-            {
-                "start": c.start_time,
-                "end": c.end_time,
-            }
-            for c in chunks
-            if c.start_time is not None
-        ],
+        "sources": [chunk_source(b) for b in blocks if has_source(b)],
     }
+
+    if cache_key is not None:
+        answer_cache.set(cache_key, answer, embedding)
+
+    return {**answer, "cached": False}
+
+# Streaming chat over Server-Sent Events: a `sources` event, then `token`
+# events as the completion is generated, then `done` (or `error`). A cached
+# answer is sent as a single `token` event and `done` carries `cached: true`
+@router.post("/stream")
+async def chat_stream(
+    payload: ChatRequest,
+    request: Request,
+    db: AsyncSession = Depends(get_db),
+    current_user=Depends(get_current_user),
+):
+    logger.info(
+        f"Streaming chat query received from user {current_user.id} for file {payload.file_id}"
+    )
+
+    # Retrieval errors surface as regular HTTP errors before streaming starts
+    file_ids = await resolve_file_ids(db, payload, UUID(current_user.id))
+
+    cached, embedding = await lookup_similar_answer(db, file_ids, payload.question)
+    cache_key = None
+    messages = None
+
+    if cached is None:
+        chunks = await retrieve_chunks(db, file_ids, payload.question)
+
+        if answer_cache is not None:
+            cache_key = answer_cache.exact_key(file_ids, chunks, payload.question)
+            cached = answer_cache.get(cache_key)
+
+        blocks = build_context(chunks)
+        sources = [chunk_source(b) for b in blocks if has_source(b)]
+        messages = build_messages(blocks, payload.question)
+
+    if cached is not None:
+        sources = cached["sources"]
+
+    async def cached_stream():
+        yield sse_event("sources", {"sources": sources})
+        yield sse_event("token", {"content": cached["answer"]})
+        yield sse_event("done", {"cached": True})
+
+    async def event_stream():
+        yield sse_event("sources", {"sources": sources})
+
+        stream = None
+        tokens = []
+        started = time.perf_counter()
+
+        try:
+            stream = await client.chat.completions.create(
+                model=CHAT_MODEL,
+                messages=messages,
+                stream=True,
+            )
+
+            async for chunk in stream:
+                if await request.is_disconnected():
+                    logger.info("Client disconnected, cancelling completion stream")
+                    return
+
+                delta = chunk.choices[0].delta.content if chunk.choices else None
+
+                if delta:
+                    tokens.append(delta)
+                    yield sse_event("token", {"content": delta})
+
+            yield sse_event("done", {"cached": False})
+
+            CHAT_COMPLETION_SECONDS.labels("true").observe(time.perf_counter() - started)
+            logger.info("OpenAI stream completed")
+
+            # Only complete answers are cached
+            if cache_key is not None:
+                answer_cache.set(
+                    cache_key,
+                    {"answer": "".join(tokens), "sources": sources},
+                    embedding,
+                )
+
+        except Exception as e:
+            record_error("chat", e)
+            logger.error("Chat completion stream failed", exc_info=True)
+            yield sse_event("error", {"error": "Answer generation failed"})
+
+        finally:
+            # Closing the stream drops the upstream connection so generation stops
+            if stream is not None:
+                await stream.close()
+
+    return StreamingResponse(
+        cached_stream() if cached is not None else event_stream(),
+        media_type="text/event-stream",
+        headers={
+            "Cache-Control": "no-cache",
+            "X-Accel-Buffering": "no",
+        },
+    )
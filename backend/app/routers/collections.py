@@ -0,0 +1,128 @@
+from fastapi import APIRouter, Depends, HTTPException
+from pydantic import BaseModel
+from sqlalchemy import select
+from sqlalchemy.ext.asyncio import AsyncSession
+from uuid import UUID
+
+from app.deps import get_db
+from app.routers.auth import get_current_user
+from app.db.models.collection import Collection
+from app.db.models.file import File
+from app.utils.logger import logger
+
+# Router for grouping files into collections that can be queried together
+router = APIRouter(prefix="/collections", tags=["Collections"])
+
+class CollectionCreate(BaseModel):
+    name: str
+    file_ids: list[UUID] = []
+
+class CollectionFiles(BaseModel):
+    file_ids: list[UUID]
+
+def collection_to_dict(collection: Collection):
+    return {
+        "collection_id": str(collection.id),
+        "name": collection.name,
+        "file_ids": [str(f.id) for f in collection.files],
+    }
+
+# Fetch the requested files, all of which must belong to the user
+async def get_owned_files(db: AsyncSession, file_ids: list, user_id: UUID):
+    if not file_ids:
+        return []
+
+    result = await db.execute(
+        select(File).where(File.id.in_(set(file_ids)), File.user_id == user_id)
+    )
+    files = result.scalars().all()
+
+    if len(files) != len(set(file_ids)):
+        raise HTTPException(status_code=404, detail="File not found")
+
+    return files
+
+async def get_owned_collection(db: AsyncSession, collection_id: UUID, user_id: UUID):
+    result = await db.execute(
+        select(Collection).where(
+            Collection.id == collection_id,
+            Collection.user_id == user_id,
+        )
+    )
+    collection = result.scalars().first()
+
+    if not collection:
+        raise HTTPException(status_code=404, detail="Collection not found")
+
+    return collection
+
+@router.post("/", status_code=201)
+async def create_collection(
+    payload: CollectionCreate,
+    db: AsyncSession = Depends(get_db),
+    current_user=Depends(get_current_user),
+):
+    user_uuid = UUID(current_user.id)
+    files = await get_owned_files(db, payload.file_ids, user_uuid)
+
+    collection = Collection(user_id=user_uuid, name=payload.name)
+    collection.files = list(files)
+
+    db.add(collection)
+    await db.commit()
+
+    logger.info(
+        f"Collection {collection.id} created by user {current_user.id} with {len(files)} files"
+    )
+
+    return collection_to_dict(collection)
+
+@router.get("/")
+async def list_collections(
+    db: AsyncSession = Depends(get_db),
+    current_user=Depends(get_current_user),
+):
+    result = await db.execute(
+        select(Collection)
+        .where(Collection.user_id == UUID(current_user.id))
+        .order_by(Collection.created_at)
+    )
+
+    return [collection_to_dict(c) for c in result.scalars().all()]
+
+@router.post("/{collection_id}/files")
+async def add_files(
+    collection_id: UUID,
+    payload: CollectionFiles,
+    db: AsyncSession = Depends(get_db),
+    current_user=Depends(get_current_user),
+):
+    user_uuid = UUID(current_user.id)
+    collection = await get_owned_collection(db, collection_id, user_uuid)
+    files = await get_owned_files(db, payload.file_ids, user_uuid)
+
+    existing = {f.id for f in collection.files}
+    collection.files.extend(f for f in files if f.id not in existing)
+
+    await db.commit()
+
+    logger.info(f"Added {len(files)} files to collection {collection_id}")
+
+    return collection_to_dict(collection)
+
+@router.delete("/{collection_id}/files/{file_id}")
+async def remove_file(
+    collection_id: UUID,
+    file_id: UUID,
+    db: AsyncSession = Depends(get_db),
+    current_user=Depends(get_current_user),
+):
+    collection = await get_owned_collection(db, collection_id, UUID(current_user.id))
+
+    collection.files = [f for f in collection.files if f.id != file_id]
+
+    await db.commit()
+
+    logger.info(f"Removed file {file_id} from collection {collection_id}")
+
+    return collection_to_dict(collection)
@@ -1,27 +1,24 @@
 from fastapi import APIRouter, Depends, HTTPException
-from sqlalchemy.orm import Session
+from fastapi.concurrency import run_in_threadpool
+from sqlalchemy import select
+from sqlalchemy.ext.asyncio import AsyncSession
 from uuid import UUID
 
 from app.deps import get_db
 from app.routers.auth import get_current_user
 from app.db.models.file import File
-from app.services.whisper_service import transcribe_audio_video
-from app.services.chunk_service import (
-    save_segments_as_chunks,
-    save_text_chunks,
-)
-from app.services.pdf_service import extract_text_from_pdf
-from app.services.chunking import chunk_text
+from app.jobs.queue import enqueue_ingestion, job_backend
+from app.services.ingestion import SUPPORTED_TYPES
 from app.utils.logger import logger
 
 # Router for file processing
 router = APIRouter(prefix="/process", tags=["Process"])
 
-# Process Uploaded file into chunks
-@router.post("/{file_id}")
-def process_file(
+# Queue an uploaded file for processing into chunks
+@router.post("/{file_id}", status_code=202)
+async def process_file(
     file_id: str,
-    db: Session = Depends(get_db),
+    db: AsyncSession = Depends(get_db),
     current_user=Depends(get_current_user),
 ):
     logger.info(
@@ -32,11 +29,10 @@ def process_file(
     user_uuid = UUID(current_user.id)
 
     # Fetch file belonging to the user
-    file = (
-        db.query(File)
-        .filter(File.id == file_uuid, File.user_id == user_uuid)
-        .first()
+    result = await db.execute(
+        select(File).where(File.id == file_uuid, File.user_id == user_uuid)
     )
+    file = result.scalars().first()
 
     if not file:
         logger.warning(
@@ -44,46 +40,37 @@ def process_file(
         )
         raise HTTPException(status_code=404, detail="File not found")
 
-    file_path = f"storage/uploads/{file.id}.{file.file_type}"
-
-    if file.file_type == "pdf":
-        logger.info(f"Starting PDF processing for file {file.id}")
-
-        text = extract_text_from_pdf(file_path)
-        chunks = chunk_text(text)
-        save_text_chunks(db, file.id, chunks)
-
-        logger.info(
-            f"PDF processing completed for file {file.id}, chunks={len(chunks)}"
+    if file.file_type not in SUPPORTED_TYPES:
+        logger.warning(
+            f"Unsupported file type {file.file_type} for file {file.id}"
         )
-
-        return {
-            "message": "PDF processed successfully",
-            "chunks": len(chunks),
-        }
-
-    if file.file_type in {"mp3", "wav", "mp4"}:
-        logger.info(
-            f"Starting audio/video processing for file {file.id}"
+        raise HTTPException(
+            status_code=400,
+            detail="Unsupported file type",
         )
 
-        segments = transcribe_audio_video(file_path)
-        save_segments_as_chunks(db, file.id, segments)
+    job = await run_in_threadpool(enqueue_ingestion, file.id, user_uuid)
 
-        logger.info(
-            f"Audio/video processing completed for file {file.id}, segments={len(segments)}"
-        )
+    return {
+        "message": "File queued for processing",
+        "job_id": str(job.id),
+        "status": job.status,
+    }
+
+# Processing job status
+@router.get("/{job_id}")
+async def get_process_status(
+    job_id: str,
+    current_user=Depends(get_current_user),
+):
+    try:
+        job_uuid = UUID(job_id)
+    except ValueError:
+        raise HTTPException(status_code=404, detail="Job not found")
 
-        return {
-            "message": "Audio/Video processed successfully",
-            "segments": len(segments),
-        }
+    job = await run_in_threadpool(job_backend.get, job_uuid)
 
-    logger.warning(
-        f"Unsupported file type {file.file_type} for file {file.id}"
-    )
+    if job is None or job.user_id != UUID(current_user.id):
+        raise HTTPException(status_code=404, detail="Job not found")
 
-    raise HTTPException(
-        status_code=400,
-        detail="Unsupported file type",
-    )
+    return job.to_dict()
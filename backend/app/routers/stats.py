@@ -0,0 +1,18 @@
+from fastapi import APIRouter
+
+from app.routers.auth import token_verifier
+from app.services.answer_cache import answer_cache
+from app.services.embedding_cache import embedding_cache
+from app.services.index_cache import index_cache
+
+router = APIRouter(prefix="/stats", tags=["Stats"])
+
+# Cache hit/miss counters for this worker process
+@router.get("/caches")
+def cache_stats():
+    return {
+        "index_cache": index_cache.stats(),
+        "embedding_cache": embedding_cache.stats() if embedding_cache else None,
+        "auth_cache": token_verifier.cache.stats(),
+        "answer_cache": answer_cache.stats() if answer_cache else None,
+    }
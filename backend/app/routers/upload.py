@@ -1,65 +1,310 @@
-import os
-import shutil
-from uuid import uuid4
+from datetime import datetime, timedelta, timezone
+from uuid import UUID, uuid4
 
-from fastapi import APIRouter, UploadFile, File, Depends
-from sqlalchemy.orm import Session
+from fastapi import APIRouter, UploadFile, File, Depends, Header, Request
+from fastapi.concurrency import run_in_threadpool
+from pydantic import BaseModel
+from sqlalchemy import delete, select
+from sqlalchemy.ext.asyncio import AsyncSession
 
 from app.deps import get_db
 from app.db.models.file import File as FileModel
+from app.db.models.upload_session import UploadPart, UploadSession
 from app.routers.auth import get_current_user
+from app.services.blob_store import store_blob
+from app.services.upload_service import (
+    UPLOAD_SESSION_TTL,
+    allocate,
+    check_active_session_limit,
+    check_size,
+    clamp_part_size,
+    file_sha256,
+    iter_upload_file,
+    part_count,
+    part_range,
+    remove_upload,
+    save_stream,
+    upload_path,
+    write_part,
+)
 from app.utils.logger import logger
-from app.errors.app_errors import BadRequestError
+from app.errors.app_errors import BadRequestError, NotFoundError
 
 router = APIRouter()
 
-UPLOAD_DIR = "storage/uploads"
 ALLOWED_EXTENSIONS = {"pdf", "mp3", "wav", "mp4"}
 
 # Get file extension
 def get_extension(filename: str) -> str:
     return filename.rsplit(".", 1)[-1].lower()
 
+def check_extension(filename: str) -> str:
+    ext = get_extension(filename)
+
+    if ext not in ALLOWED_EXTENSIONS:
+        raise BadRequestError("Unsupported file type")
+
+    return ext
+
+def file_to_dict(db_file: FileModel, sha256: str) -> dict:
+    return {
+        "file_id": str(db_file.id),
+        "filename": db_file.filename,
+        "file_type": db_file.file_type,
+        "sha256": sha256,
+    }
+
 # Upload File
 @router.post("/")
-def upload_file(
+async def upload_file(
     file: UploadFile = File(...),
-    db: Session = Depends(get_db),
+    db: AsyncSession = Depends(get_db),
     current_user=Depends(get_current_user),
 ):
-    ext = get_extension(file.filename)
-
-    if ext not in ALLOWED_EXTENSIONS:
-        raise BadRequestError("Unsupported file type")
+    ext = check_extension(file.filename)
 
     file_id = uuid4()
-    stored_filename = f"{file_id}.{ext}"
-    file_path = os.path.join(UPLOAD_DIR, stored_filename)
-
-    os.makedirs(UPLOAD_DIR, exist_ok=True)
+    file_path = upload_path(file_id, ext)
 
     logger.info(
         f"Uploading file {file.filename} for user {current_user.id}"
     )
 
-    with open(file_path, "wb") as buffer:
-        shutil.copyfileobj(file.file, buffer)
+    # Hashed while streaming, then moved into the shared blob store
+    size, sha256 = await save_stream(file_path, iter_upload_file(file))
+    await run_in_threadpool(store_blob, file_path, sha256, ext)
 
     db_file = FileModel(
         id=file_id,
         user_id=current_user.id,
         filename=file.filename,
         file_type=ext,
+        content_hash=sha256,
     )
 
     db.add(db_file)
-    db.commit()
-    db.refresh(db_file)
+    await db.commit()
+    await db.refresh(db_file)
+
+    logger.info(f"File uploaded successfully: {db_file.id}, bytes={size}")
+
+    return file_to_dict(db_file, sha256)
+
+# Chunked, resumable uploads: create a session, PUT the parts (in any order,
+# retrying any that failed), then complete it. Parts are streamed straight
+# into the final file, so nothing is buffered or copied.
+class UploadSessionCreate(BaseModel):
+    filename: str
+    size: int
+    part_size: int | None = None
+    # Hex sha256 of the whole file, verified on completion
+    sha256: str | None = None
+
+async def get_upload_session(db: AsyncSession, upload_id: UUID, user_id) -> UploadSession:
+    result = await db.execute(
+        select(UploadSession).where(
+            UploadSession.id == upload_id,
+            UploadSession.user_id == UUID(str(user_id)),
+        )
+    )
+    session = result.scalars().first()
+
+    if session is None:
+        raise NotFoundError("Upload session not found")
 
-    logger.info(f"File uploaded successfully: {db_file.id}")
+    return session
+
+def check_active(session: UploadSession):
+    if session.status != "active":
+        raise BadRequestError(f"Upload session is {session.status}")
+
+    expires_at = session.expires_at
+    if expires_at.tzinfo is None:
+        expires_at = expires_at.replace(tzinfo=timezone.utc)
+
+    if expires_at <= datetime.now(timezone.utc):
+        raise BadRequestError("Upload session expired")
+
+async def received_parts(db: AsyncSession, session: UploadSession) -> list:
+    result = await db.execute(
+        select(UploadPart.part_number)
+        .where(UploadPart.session_id == session.id)
+        .order_by(UploadPart.part_number)
+    )
+    return list(result.scalars().all())
+
+def session_to_dict(session: UploadSession, parts: list) -> dict:
+    count = part_count(session.total_size, session.part_size)
+    received = set(parts)
 
     return {
-        "file_id": str(db_file.id),
-        "filename": db_file.filename,
-        "file_type": db_file.file_type,
+        "upload_id": str(session.id),
+        "file_id": str(session.file_id),
+        "status": session.status,
+        "size": session.total_size,
+        "part_size": session.part_size,
+        "part_count": count,
+        "received_parts": parts,
+        "missing_parts": [n for n in range(1, count + 1) if n not in received],
+        "expires_at": session.expires_at.isoformat(),
     }
+
+@router.post("/sessions", status_code=201)
+async def create_upload_session(
+    payload: UploadSessionCreate,
+    db: AsyncSession = Depends(get_db),
+    current_user=Depends(get_current_user),
+):
+    ext = check_extension(payload.filename)
+
+    if payload.size <= 0:
+        raise BadRequestError("File is empty")
+
+    check_size(payload.size)
+    await check_active_session_limit(db, UUID(current_user.id))
+
+    session = UploadSession(
+        file_id=uuid4(),
+        user_id=UUID(current_user.id),
+        filename=payload.filename,
+        file_type=ext,
+        total_size=payload.size,
+        part_size=clamp_part_size(payload.part_size),
+        sha256=payload.sha256.lower() if payload.sha256 else None,
+        status="active",
+        expires_at=datetime.now(timezone.utc) + timedelta(seconds=UPLOAD_SESSION_TTL),
+    )
+
+    await allocate(upload_path(session.file_id, ext), payload.size)
+
+    db.add(session)
+    await db.commit()
+
+    logger.info(
+        f"Upload session {session.id} created for {payload.filename} "
+        f"({payload.size} bytes) by user {current_user.id}"
+    )
+
+    return session_to_dict(session, [])
+
+# Current state of an upload, used to resume after an interruption
+@router.get("/sessions/{upload_id}")
+async def get_upload_status(
+    upload_id: UUID,
+    db: AsyncSession = Depends(get_db),
+    current_user=Depends(get_current_user),
+):
+    session = await get_upload_session(db, upload_id, current_user.id)
+
+    return session_to_dict(session, await received_parts(db, session))
+
+@router.put("/sessions/{upload_id}/parts/{part_number}")
+async def upload_part(
+    upload_id: UUID,
+    part_number: int,
+    request: Request,
+    x_part_sha256: str | None = Header(None),
+    db: AsyncSession = Depends(get_db),
+    current_user=Depends(get_current_user),
+):
+    session = await get_upload_session(db, upload_id, current_user.id)
+    check_active(session)
+
+    offset, length = part_range(session.total_size, session.part_size, part_number)
+
+    try:
+        sha256 = await write_part(
+            upload_path(session.file_id, session.file_type),
+            offset,
+            length,
+            request.stream(),
+        )
+
+        if x_part_sha256 and x_part_sha256.lower() != sha256:
+            raise BadRequestError(f"Checksum mismatch for part {part_number}")
+    except Exception:
+        # The bad bytes may have overwritten an earlier copy of the part
+        await db.execute(
+            delete(UploadPart).where(
+                UploadPart.session_id == session.id,
+                UploadPart.part_number == part_number,
+            )
+        )
+        await db.commit()
+        raise
+
+    await db.merge(
+        UploadPart(
+            session_id=session.id,
+            part_number=part_number,
+            size=length,
+            sha256=sha256,
+        )
+    )
+    await db.commit()
+
+    logger.info(f"Stored part {part_number} of upload {upload_id} ({length} bytes)")
+
+    return {"part_number": part_number, "size": length, "sha256": sha256}
+
+@router.post("/sessions/{upload_id}/complete")
+async def complete_upload(
+    upload_id: UUID,
+    db: AsyncSession = Depends(get_db),
+    current_user=Depends(get_current_user),
+):
+    session = await get_upload_session(db, upload_id, current_user.id)
+    check_active(session)
+
+    parts = await received_parts(db, session)
+    missing = session_to_dict(session, parts)["missing_parts"]
+
+    if missing:
+        raise BadRequestError(f"Upload is missing parts {missing}")
+
+    file_path = upload_path(session.file_id, session.file_type)
+    sha256 = await file_sha256(file_path)
+
+    if session.sha256 and session.sha256 != sha256:
+        session.status = "failed"
+        await db.commit()
+        remove_upload(file_path)
+
+        raise BadRequestError("File checksum mismatch, upload discarded")
+
+    await run_in_threadpool(store_blob, file_path, sha256, session.file_type)
+
+    session.status = "completed"
+
+    db_file = FileModel(
+        id=session.file_id,
+        user_id=session.user_id,
+        filename=session.filename,
+        file_type=session.file_type,
+        content_hash=sha256,
+    )
+
+    db.add(db_file)
+    await db.commit()
+
+    logger.info(f"Upload {upload_id} completed as file {db_file.id}")
+
+    return file_to_dict(db_file, sha256)
+
+@router.delete("/sessions/{upload_id}")
+async def abort_upload(
+    upload_id: UUID,
+    db: AsyncSession = Depends(get_db),
+    current_user=Depends(get_current_user),
+):
+    session = await get_upload_session(db, upload_id, current_user.id)
+    check_active(session)
+
+    session.status = "aborted"
+    await db.commit()
+
+    remove_upload(upload_path(session.file_id, session.file_type))
+
+    logger.info(f"Upload {upload_id} aborted")
+
+    return {"upload_id": str(session.id), "status": session.status}
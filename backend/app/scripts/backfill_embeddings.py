@@ -0,0 +1,57 @@
+"""
+Backfill stored embeddings for chunks ingested before embeddings were
+persisted at process time.
+
+Usage:
+    python -m app.scripts.backfill_embeddings --batch-size 256
+"""
+import argparse
+
+from app.db.database import SessionLocal, engine
+from app.db.migrations import sync_schema
+from app.db.models.chunk import Chunk
+from app.services.embedding_service import embed_texts, to_blob
+from app.utils.logger import logger
+
+def backfill(batch_size: int = 256) -> int:
+    # Adds chunks.embedding on databases created before it existed
+    sync_schema(engine)
+
+    total = 0
+    db = SessionLocal()
+
+    try:
+        while True:
+            chunks = (
+                db.query(Chunk)
+                .filter(Chunk.embedding.is_(None))
+                .order_by(Chunk.id)
+                .limit(batch_size)
+                .all()
+            )
+
+            if not chunks:
+                break
+
+            embeddings = embed_texts([c.text for c in chunks])
+
+            for chunk, embedding in zip(chunks, embeddings):
+                chunk.embedding = to_blob(embedding)
+
+            db.commit()
+            total += len(chunks)
+
+            logger.info(f"Backfilled {total} chunk embeddings so far")
+    finally:
+        db.close()
+
+    logger.info(f"Embedding backfill completed, chunks={total}")
+
+    return total
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--batch-size", type=int, default=256)
+    args = parser.parse_args()
+
+    backfill(args.batch_size)
@@ -0,0 +1,69 @@
+"""
+Prepare Postgres for RETRIEVAL_BACKEND=pgvector: enable the extension, add
+chunks.embedding_vec with its ANN index and fill it from the stored
+embeddings.
+
+Usage:
+    python -m app.scripts.setup_pgvector --index hnsw --batch-size 1000
+"""
+import argparse
+
+from sqlalchemy import text
+
+from app.db.database import SessionLocal, engine
+from app.db.migrations import sync_schema
+from app.services.embedding_service import from_blob
+from app.services.pgvector_store import (
+    PGVECTOR_DIM,
+    PGVECTOR_INDEX,
+    setup_pgvector,
+    to_vector_literal,
+)
+from app.utils.logger import logger
+
+def backfill_vectors(batch_size: int = 1000) -> int:
+    total = 0
+    db = SessionLocal()
+
+    try:
+        while True:
+            rows = db.execute(
+                text(
+                    "SELECT id, embedding FROM chunks "
+                    "WHERE embedding_vec IS NULL AND embedding IS NOT NULL "
+                    "ORDER BY id LIMIT :limit"
+                ),
+                {"limit": batch_size},
+            ).all()
+
+            if not rows:
+                break
+
+            db.execute(
+                text("UPDATE chunks SET embedding_vec = CAST(CAST(:vec AS text) AS vector) WHERE id = :id"),
+                [
+                    {"id": row.id, "vec": to_vector_literal(from_blob(row.embedding))}
+                    for row in rows
+                ],
+            )
+            db.commit()
+            total += len(rows)
+
+            logger.info(f"Backfilled {total} pgvector embeddings so far")
+    finally:
+        db.close()
+
+    logger.info(f"pgvector backfill completed, chunks={total}")
+
+    return total
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--dim", type=int, default=PGVECTOR_DIM)
+    parser.add_argument("--index", choices=["hnsw", "ivfflat"], default=PGVECTOR_INDEX)
+    parser.add_argument("--batch-size", type=int, default=1000)
+    args = parser.parse_args()
+
+    sync_schema(engine)
+    setup_pgvector(engine, dim=args.dim, index=args.index)
+    backfill_vectors(args.batch_size)
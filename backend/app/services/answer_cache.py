@@ -0,0 +1,185 @@
+import os
+import re
+import threading
+
+import numpy as np
+
+from app.services.embedding_service import aembed_texts
+from app.utils.logger import logger
+from app.utils.metrics import record_cache
+from app.utils.ttl_cache import TTLCache
+
+ANSWER_CACHE = os.getenv("ANSWER_CACHE", "true").lower() == "true"
+ANSWER_CACHE_TTL = int(os.getenv("ANSWER_CACHE_TTL", 3600))
+ANSWER_CACHE_MAX_ITEMS = int(os.getenv("ANSWER_CACHE_MAX_ITEMS", 10000))
+# Optional tier matching paraphrased questions by embedding similarity
+ANSWER_CACHE_SEMANTIC = os.getenv("ANSWER_CACHE_SEMANTIC", "false").lower() == "true"
+ANSWER_CACHE_SIMILARITY = float(os.getenv("ANSWER_CACHE_SIMILARITY", 0.95))
+
+
+def normalize_question(question: str) -> str:
+    return re.sub(r"\s+", " ", question.lower()).strip().rstrip("?!. ")
+
+
+def scope_key(file_ids) -> tuple:
+    return tuple(sorted(str(file_id) for file_id in file_ids))
+
+
+# Completed chat answers per file scope. The exact tier is keyed by (files,
+# retrieved chunk ids, normalized question); reprocessing a file changes its
+# chunk ids, so stale entries stop matching by themselves. The semantic tier
+# is looked up before retrieval, so each entry keeps the chunk ids its answer
+# was built from and a hit is only served while they still exist; this holds
+# across processes, invalidate_file only frees local entries early.
+class AnswerCache:
+    def __init__(
+        self,
+        max_items: int = ANSWER_CACHE_MAX_ITEMS,
+        ttl: float = ANSWER_CACHE_TTL,
+        semantic: bool = ANSWER_CACHE_SEMANTIC,
+        similarity: float = ANSWER_CACHE_SIMILARITY,
+    ):
+        self.exact = TTLCache(max_items, ttl)
+        self.semantic = TTLCache(max_items, ttl) if semantic else None
+        self.similarity = similarity
+        # scope -> semantic tier keys, scanned on lookup
+        self._scopes = {}
+        self._lock = threading.Lock()
+        self.exact_hits = 0
+        self.semantic_hits = 0
+        self.misses = 0
+
+    def exact_key(self, file_ids, chunks, question: str) -> tuple:
+        return (
+            scope_key(file_ids),
+            tuple(str(c.id) for c in chunks),
+            normalize_question(question),
+        )
+
+    def _count(self, counter: str):
+        with self._lock:
+            setattr(self, counter, getattr(self, counter) + 1)
+
+    def get(self, key):
+        answer = self.exact.get(key)
+
+        if answer is None:
+            self._count("misses")
+            record_cache("answer", 0, 1)
+            return None
+
+        self._count("exact_hits")
+        record_cache("answer", 1, 0)
+        logger.info("Answer cache hit (exact)")
+
+        return answer
+
+    # Best cached answer for a similar question over the same files.
+    # chunks_exist(chunk_ids) is awaited on the best match; answers built
+    # from chunks that were since replaced are dropped instead of served
+    async def get_similar(self, file_ids, question_embedding, chunks_exist):
+        if self.semantic is None:
+            return None
+
+        scope = scope_key(file_ids)
+        best, best_key, best_score = None, None, self.similarity
+
+        with self._lock:
+            keys = list(self._scopes.get(scope, ()))
+
+        for key in keys:
+            entry = self.semantic.get(key)
+
+            if entry is None:
+                self._forget(scope, key)
+                continue
+
+            embedding, chunk_ids, answer = entry
+            score = float(np.dot(embedding, question_embedding))
+
+            if score >= best_score:
+                best, best_key, best_score = (chunk_ids, answer), key, score
+
+        if best is not None and not await chunks_exist(best[0]):
+            logger.info("Similar cached answer is stale, dropping it")
+            self.semantic.pop(best_key)
+            self._forget(scope, best_key)
+            best = None
+
+        record_cache("answer_semantic", best is not None, best is None)
+
+        if best is None:
+            return None
+
+        self._count("semantic_hits")
+        logger.info(f"Answer cache hit (semantic, similarity={best_score:.3f})")
+
+        return best[1]
+
+    def set(self, key, answer: dict, question_embedding=None):
+        self.exact.set(key, answer)
+
+        scope, chunk_ids, question = key
+
+        # Without chunks there is nothing to check the answer's freshness by
+        if self.semantic is None or question_embedding is None or not chunk_ids:
+            return
+
+        semantic_key = (scope, question)
+        embedding = np.asarray(question_embedding, dtype=np.float32)
+        embedding = embedding / max(float(np.linalg.norm(embedding)), 1e-12)
+
+        self.semantic.set(semantic_key, (embedding, chunk_ids, answer))
+
+        with self._lock:
+            self._scopes.setdefault(scope, set()).add(semantic_key)
+
+    def _forget(self, scope, key):
+        with self._lock:
+            keys = self._scopes.get(scope)
+            if keys is not None:
+                keys.discard(key)
+                if not keys:
+                    del self._scopes[scope]
+
+    # Drop semantic entries for every scope that includes the file
+    def invalidate_file(self, file_id):
+        file_id = str(file_id)
+
+        with self._lock:
+            scopes = [scope for scope in self._scopes if file_id in scope]
+            keys = [key for scope in scopes for key in self._scopes.pop(scope)]
+
+        for key in keys:
+            self.semantic.pop(key)
+
+        if keys:
+            logger.info(f"Invalidated {len(keys)} cached answers for file {file_id}")
+
+    def stats(self) -> dict:
+        with self._lock:
+            exact_hits, semantic_hits, misses = self.exact_hits, self.semantic_hits, self.misses
+
+        lookups = exact_hits + semantic_hits + misses
+        return {
+            "entries": len(self.exact),
+            "semantic_entries": len(self.semantic) if self.semantic is not None else None,
+            "exact_hits": exact_hits,
+            "semantic_hits": semantic_hits,
+            "misses": misses,
+            "hit_ratio": (exact_hits + semantic_hits) / lookups if lookups else 0.0,
+        }
+
+
+# Unit-length embedding of the question for the semantic tier, None when the
+# tier is disabled; the embedding cache makes the retriever's own call free
+async def question_embedding(question: str):
+    if answer_cache is None or answer_cache.semantic is None:
+        return None
+
+    embedding = np.asarray((await aembed_texts([question]))[0], dtype=np.float32)
+
+    return embedding / max(float(np.linalg.norm(embedding)), 1e-12)
+
+
+answer_cache = AnswerCache() if ANSWER_CACHE else None
@@ -0,0 +1,106 @@
+import os
+import re
+import shutil
+import subprocess
+
+from app.utils.logger import logger
+
+# Downsampled mono speech audio keeps an hour of audio well under upload limits
+AUDIO_SAMPLE_RATE = 16000
+AUDIO_BITRATE = "32k"
+SILENCE_NOISE_DB = int(os.getenv("SILENCE_NOISE_DB", -30))
+SILENCE_MIN_SECONDS = float(os.getenv("SILENCE_MIN_SECONDS", 0.5))
+
+_SILENCE_START = re.compile(r"silence_start: (-?[\d.]+)")
+_SILENCE_END = re.compile(r"silence_end: (-?[\d.]+)")
+
+
+def ffmpeg_available() -> bool:
+    return shutil.which("ffmpeg") is not None and shutil.which("ffprobe") is not None
+
+
+def _run(args: list[str]) -> subprocess.CompletedProcess:
+    return subprocess.run(args, capture_output=True, text=True, check=True)
+
+
+def probe_duration(file_path: str) -> float:
+    result = _run([
+        "ffprobe", "-v", "error",
+        "-show_entries", "format=duration",
+        "-of", "default=noprint_wrappers=1:nokey=1",
+        file_path,
+    ])
+    return float(result.stdout.strip())
+
+
+# Strip video and downsample to mono speech-quality mp3
+def extract_audio(file_path: str, output_path: str) -> str:
+    logger.info(f"Extracting audio from {file_path}")
+
+    _run([
+        "ffmpeg", "-y", "-v", "error",
+        "-i", file_path,
+        "-vn",
+        "-ac", "1",
+        "-ar", str(AUDIO_SAMPLE_RATE),
+        "-b:a", AUDIO_BITRATE,
+        output_path,
+    ])
+
+    return output_path
+
+
+def detect_silences(
+    file_path: str,
+    noise_db: int = SILENCE_NOISE_DB,
+    min_silence: float = SILENCE_MIN_SECONDS,
+) -> list[tuple[float, float]]:
+    result = _run([
+        "ffmpeg", "-v", "info", "-nostats",
+        "-i", file_path,
+        "-af", f"silencedetect=noise={noise_db}dB:d={min_silence}",
+        "-f", "null", "-",
+    ])
+
+    starts = [float(m) for m in _SILENCE_START.findall(result.stderr)]
+    ends = [float(m) for m in _SILENCE_END.findall(result.stderr)]
+
+    return list(zip(starts, ends))
+
+
+# Split [0, duration) into windows of at most max_window seconds, cutting in
+# the middle of the last silence before each limit when there is one
+def plan_windows(
+    duration: float,
+    silences: list[tuple[float, float]],
+    max_window: float,
+    min_window: float,
+) -> list[tuple[float, float]]:
+    cut_points = sorted((start + end) / 2 for start, end in silences)
+    windows = []
+    start = 0.0
+
+    while duration - start > max_window:
+        limit = start + max_window
+        candidates = [p for p in cut_points if start + min_window <= p <= limit]
+        end = candidates[-1] if candidates else limit
+
+        windows.append((start, end))
+        start = end
+
+    windows.append((start, duration))
+
+    return windows
+
+
+def cut_window(file_path: str, start: float, end: float, output_path: str) -> str:
+    _run([
+        "ffmpeg", "-y", "-v", "error",
+        "-ss", f"{start:.3f}",
+        "-i", file_path,
+        "-t", f"{end - start:.3f}",
+        "-c", "copy",
+        output_path,
+    ])
+
+    return output_path
@@ -0,0 +1,35 @@
+import os
+
+from app.services.upload_service import upload_path
+from app.utils.logger import logger
+
+# Content-addressed store shared by all files with the same bytes
+BLOB_DIR = "storage/blobs"
+
+
+def blob_path(content_hash: str, ext: str) -> str:
+    return os.path.join(BLOB_DIR, content_hash[:2], f"{content_hash}.{ext}")
+
+
+# Move a finished upload into the store; when identical bytes are already
+# stored the new copy is dropped. Returns the blob path.
+def store_blob(src_path: str, content_hash: str, ext: str) -> str:
+    path = blob_path(content_hash, ext)
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+
+    if os.path.exists(path):
+        os.remove(src_path)
+        logger.info(f"Blob {content_hash} already stored, dropped duplicate upload")
+    else:
+        os.replace(src_path, path)
+
+    return path
+
+
+# Where the bytes of a File live; files uploaded before the blob store keep
+# their per-file path
+def file_path(file) -> str:
+    if file.content_hash:
+        return blob_path(file.content_hash, file.file_type)
+
+    return upload_path(file.id, file.file_type)
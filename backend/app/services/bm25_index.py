@@ -0,0 +1,122 @@
+import math
+import os
+import re
+import uuid
+from collections import Counter, defaultdict
+
+import numpy as np
+
+BM25_K1 = float(os.getenv("BM25_K1", 1.2))
+BM25_B = float(os.getenv("BM25_B", 0.75))
+
+# Words plus compound tokens such as part numbers (AB-1234), versions (2.1.0)
+# and identifiers (parse_config, app/main.py)
+TOKEN_RE = re.compile(r"\w+(?:[-./:]\w+)*")
+PART_RE = re.compile(r"[-./:]")
+
+
+# Compound tokens are indexed whole and as their parts, so both "AB-1234" and
+# "1234" match
+def tokenize(text: str) -> list:
+    tokens = []
+
+    for token in TOKEN_RE.findall(text.lower()):
+        tokens.append(token)
+
+        parts = PART_RE.split(token)
+        if len(parts) > 1:
+            tokens.extend(p for p in parts if p)
+
+    return tokens
+
+
+class BM25Index:
+    def __init__(self, chunk_ids, doc_lens, postings, k1=BM25_K1, b=BM25_B):
+        self.chunk_ids = list(chunk_ids)
+        self.doc_lens = np.asarray(doc_lens, dtype=np.float32)
+        # term -> (doc positions, term frequencies)
+        self.postings = postings
+        self.k1 = k1
+        self.b = b
+        self.avgdl = float(self.doc_lens.mean()) if len(self.doc_lens) else 0.0
+        # On-disk version this index was loaded from (see index_store)
+        self.version = None
+
+    @classmethod
+    def build(cls, chunk_ids, texts):
+        doc_lens = []
+        postings = defaultdict(lambda: ([], []))
+
+        for position, text in enumerate(texts):
+            counts = Counter(tokenize(text))
+            doc_lens.append(sum(counts.values()))
+
+            for term, tf in counts.items():
+                docs, tfs = postings[term]
+                docs.append(position)
+                tfs.append(tf)
+
+        return cls(
+            chunk_ids,
+            doc_lens,
+            {
+                term: (np.array(docs, dtype=np.int32), np.array(tfs, dtype=np.float32))
+                for term, (docs, tfs) in postings.items()
+            },
+        )
+
+    # (score, chunk_id) pairs, best first; chunks sharing no term are left out
+    def search(self, query: str, k: int = 5) -> list:
+        n = len(self.chunk_ids)
+
+        if not n:
+            return []
+
+        scores = np.zeros(n, dtype=np.float32)
+        norm = self.k1 * (1 - self.b + self.b * self.doc_lens / max(self.avgdl, 1e-9))
+
+        for term in set(tokenize(query)):
+            posting = self.postings.get(term)
+
+            if posting is None:
+                continue
+
+            docs, tfs = posting
+            idf = math.log(1 + (n - len(docs) + 0.5) / (len(docs) + 0.5))
+            scores[docs] += idf * tfs * (self.k1 + 1) / (tfs + norm[docs])
+
+        top = np.argsort(-scores)[:k]
+
+        return [
+            (float(scores[i]), self.chunk_ids[i])
+            for i in top
+            if scores[i] > 0
+        ]
+
+    @property
+    def nbytes(self) -> int:
+        return sum(
+            docs.nbytes + tfs.nbytes + len(term)
+            for term, (docs, tfs) in self.postings.items()
+        ) + self.doc_lens.nbytes
+
+    def to_dict(self) -> dict:
+        return {
+            "chunk_ids": [str(chunk_id) for chunk_id in self.chunk_ids],
+            "doc_lens": self.doc_lens.astype(int).tolist(),
+            "postings": {
+                term: [docs.tolist(), tfs.astype(int).tolist()]
+                for term, (docs, tfs) in self.postings.items()
+            },
+        }
+
+    @classmethod
+    def from_dict(cls, data: dict):
+        return cls(
+            [uuid.UUID(chunk_id) for chunk_id in data["chunk_ids"]],
+            data["doc_lens"],
+            {
+                term: (np.array(docs, dtype=np.int32), np.array(tfs, dtype=np.float32))
+                for term, (docs, tfs) in data["postings"].items()
+            },
+        )
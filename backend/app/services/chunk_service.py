@@ -1,57 +1,64 @@
+from sqlalchemy import select
 from sqlalchemy.orm import Session
 from app.db.models.chunk import Chunk
+from app.services.chunk_writer import COLUMNS, replace_file_chunks
+from app.services.chunking import pack_segment_offsets
+from app.services.embedding_service import embed_texts, to_blob
+from app.services.pipeline import PIPELINE_BATCH_SIZE, batched
 from app.utils.logger import logger
 
-def save_segments_as_chunks(
-    db: Session,
-    file_id,
-    segments: list,
-):
-    logger.info(
-        f"Saving {len(segments)} audio/video segments for file {file_id}"
-    )
-
-    chunks = []
-
-    for seg in segments:
-        chunk = Chunk(
-            file_id=file_id,
-            text=seg.text,
-            start_time=seg.start,
-            end_time=seg.end,
-        )
-        chunks.append(chunk)
+# Copy the processed chunks (text, positions and embeddings) of another file
+# with identical content, replacing any chunks the file already has
+def clone_chunks(db: Session, source_file_id, file_id) -> int:
+    columns = [getattr(Chunk, column) for column in COLUMNS if column not in ("id", "file_id")]
 
-    db.add_all(chunks)
-    db.commit()
+    source_rows = db.execute(
+        select(*columns)
+        .where(Chunk.file_id == source_file_id)
+        .order_by(Chunk.chunk_index)
+    ).mappings().all()
 
-    logger.info(
-        f"Audio/video chunks saved successfully for file {file_id}"
-    )
+    count = replace_file_chunks(db, file_id, (dict(row) for row in source_rows))
 
-def save_text_chunks(
-    db: Session,
-    file_id,
-    text_chunks: list[str],
-):
     logger.info(
-        f"Saving {len(text_chunks)} text chunks for file {file_id}"
+        f"Cloned {count} chunks from file {source_file_id} to file {file_id}"
     )
 
-    chunks = []
+    return count
 
-    for text in text_chunks:
-        chunk = Chunk(
-            file_id=file_id,
-            text=text,
-            start_time=None,
-            end_time=None,
-        )
-        chunks.append(chunk)
+# Pipeline stage: embed TextChunk / Segment records in batches and yield
+# (record, embedding) pairs in input order
+def embed_records(records, batch_size: int = PIPELINE_BATCH_SIZE):
+    for batch in batched(records, batch_size):
+        embeddings = embed_texts([record.text for record in batch])
+        yield from zip(batch, embeddings)
 
-    db.add_all(chunks)
-    db.commit()
+def chunk_row(index: int, record, embedding) -> dict:
+    return {
+        "text": record.text,
+        "chunk_index": index,
+        "start_time": getattr(record, "start", None),
+        "end_time": getattr(record, "end", None),
+        "page_start": getattr(record, "page_start", None),
+        "page_end": getattr(record, "page_end", None),
+        "segment_offsets": (
+            pack_segment_offsets(record.segment_offsets)
+            if getattr(record, "segment_offsets", None) is not None
+            else None
+        ),
+        "embedding": to_blob(embedding),
+    }
 
-    logger.info(
-        f"Text chunks saved successfully for file {file_id}"
+# Pipeline stage: bulk-write embedded records as the file's chunks, replacing
+# any from an earlier run in the same transaction
+def store_records(db: Session, file_id, embedded):
+    count = replace_file_chunks(
+        db,
+        file_id,
+        (
+            chunk_row(index, record, embedding)
+            for index, (record, embedding) in enumerate(embedded)
+        ),
     )
+
+    return range(count)
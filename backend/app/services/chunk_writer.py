@@ -0,0 +1,126 @@
+import io
+import os
+import uuid
+
+from sqlalchemy import delete, insert
+from sqlalchemy.orm import Session
+
+from app.db.models.chunk import Chunk
+from app.services.pipeline import batched
+from app.utils.logger import logger
+
+# Rows sent per COPY / multi-row INSERT
+CHUNK_WRITE_BATCH = int(os.getenv("CHUNK_WRITE_BATCH", 1000))
+# "auto" uses COPY on Postgres (psycopg2) and batched INSERTs elsewhere
+CHUNK_WRITE_METHOD = os.getenv("CHUNK_WRITE_METHOD", "auto").lower()
+
+COLUMNS = (
+    "id",
+    "file_id",
+    "text",
+    "chunk_index",
+    "start_time",
+    "end_time",
+    "page_start",
+    "page_end",
+    "segment_offsets",
+    "embedding",
+)
+
+_COPY_ESCAPES = str.maketrans({"\\": "\\\\", "\t": "\\t", "\n": "\\n", "\r": "\\r"})
+
+
+# One value in COPY text format
+def _copy_value(value) -> str:
+    if value is None:
+        return "\\N"
+
+    if isinstance(value, (bytes, bytearray, memoryview)):
+        # bytea hex input; the backslash itself is escaped for COPY
+        return "\\\\x" + bytes(value).hex()
+
+    return str(value).translate(_COPY_ESCAPES)
+
+
+def _copy_rows(rows: list) -> io.StringIO:
+    buffer = io.StringIO()
+
+    for row in rows:
+        buffer.write("\t".join(_copy_value(row.get(column)) for column in COLUMNS))
+        buffer.write("\n")
+
+    buffer.seek(0)
+
+    return buffer
+
+
+def _raw_cursor(db: Session):
+    # DBAPI connection of the session's current transaction
+    return db.connection().connection.dbapi_connection.cursor()
+
+
+def resolve_method(db: Session, method: str = CHUNK_WRITE_METHOD) -> str:
+    if method != "auto":
+        return method
+
+    bind = db.get_bind()
+
+    if bind.dialect.name == "postgresql" and bind.dialect.driver == "psycopg2":
+        return "copy"
+
+    return "insert"
+
+
+def _copy_batch(db: Session, rows: list):
+    cursor = _raw_cursor(db)
+
+    try:
+        cursor.copy_expert(
+            f"COPY {Chunk.__tablename__} ({', '.join(COLUMNS)}) FROM STDIN",
+            _copy_rows(rows),
+        )
+    finally:
+        cursor.close()
+
+
+def _insert_batch(db: Session, rows: list):
+    # executemany; SQLAlchemy batches it into multi-row INSERTs
+    # (insertmanyvalues) on dialects that support it
+    db.execute(insert(Chunk.__table__), rows)
+
+
+# Replace all chunks of a file with rows (dicts keyed by COLUMNS, id optional)
+# in one transaction: readers see either the old or the new chunks, and a
+# failed run leaves the old ones in place. rows may be any iterable; only one
+# batch is held in memory at a time. Returns the number of rows written.
+def replace_file_chunks(
+    db: Session,
+    file_id,
+    rows,
+    batch_size: int = CHUNK_WRITE_BATCH,
+    method: str = CHUNK_WRITE_METHOD,
+) -> int:
+    method = resolve_method(db, method)
+    write_batch = _copy_batch if method == "copy" else _insert_batch
+    count = 0
+
+    try:
+        db.execute(delete(Chunk.__table__).where(Chunk.file_id == file_id))
+
+        for batch in batched(rows, batch_size):
+            for row in batch:
+                row.setdefault("id", uuid.uuid4())
+                row["file_id"] = file_id
+
+            write_batch(db, batch)
+            count += len(batch)
+
+        db.commit()
+
+    except Exception:
+        db.rollback()
+        raise
+
+    logger.info(f"Wrote {count} chunks for file {file_id} using {method}")
+
+    return count
@@ -1,27 +1,363 @@
+import os
+import re
+from dataclasses import dataclass
+
+import numpy as np
+
 from app.utils.logger import logger
+from app.utils.tokens import CHARS_PER_TOKEN, count_tokens
+
+# Token-aware chunking targets the embedding model's tokenizer
+CHUNK_MAX_TOKENS = int(os.getenv("CHUNK_MAX_TOKENS", 512))
+CHUNK_OVERLAP_TOKENS = int(os.getenv("CHUNK_OVERLAP_TOKENS", 64))
+CHUNK_TOKENIZER_ENCODING = os.getenv("CHUNK_TOKENIZER_ENCODING", "cl100k_base")
+PDF_CHUNKER = os.getenv("PDF_CHUNKER", "sentences")
+
+# Transcript segments are merged into windows of at most this many seconds
+# and tokens, repeating about TRANSCRIPT_OVERLAP_SECONDS between windows
+AV_CHUNKER = os.getenv("AV_CHUNKER", "segments")
+TRANSCRIPT_WINDOW_SECONDS = float(os.getenv("TRANSCRIPT_WINDOW_SECONDS", 60))
+TRANSCRIPT_WINDOW_TOKENS = int(os.getenv("TRANSCRIPT_WINDOW_TOKENS", CHUNK_MAX_TOKENS))
+TRANSCRIPT_OVERLAP_SECONDS = float(os.getenv("TRANSCRIPT_OVERLAP_SECONDS", 10))
+
+# Non-blank runs of text separated by blank lines
+PARAGRAPH_RE = re.compile(r"\S(?:[^\n]|\n(?![ \t]*\n))*")
+# Up to and including sentence punctuation followed by whitespace
+SENTENCE_RE = re.compile(r"\S.*?(?:[.!?][\"')\]]*(?=\s)|$)", re.S)
+LINE_RE = re.compile(r"\S[^\n]*")
+# Table rows: cells separated by pipes, tabs or runs of spaces
+TABLE_ROW_RE = re.compile(r"\||\t| {2,}\S")
+
+CHUNKERS = {}
+# Input each chunker consumes: "pages" ((page number, text) tuples from PDF
+# extraction) or "segments" (transcript Segments)
+CHUNKER_INPUTS = {}
+# Input produced for each file type
+FILE_TYPE_INPUTS = {"pdf": "pages", "mp3": "segments", "wav": "segments", "mp4": "segments"}
+
+
+def register_chunker(name: str, input_kind: str):
+    def decorator(fn):
+        CHUNKERS[name] = fn
+        CHUNKER_INPUTS[name] = input_kind
+        return fn
+
+    return decorator
+
 
+@dataclass
+class TextChunk:
+    text: str
+    page_start: int | None = None
+    page_end: int | None = None
 
-def chunk_text(
-    text: str,
+
+@dataclass
+class TranscriptWindow:
+    text: str
+    start: float
+    end: float
+    # (char offset into text, start, end) per merged segment, see
+    # pack_segment_offsets
+    segment_offsets: np.ndarray
+
+
+# Segment offsets are stored as raw float32 triples, 12 bytes per segment
+def pack_segment_offsets(offsets) -> bytes:
+    return np.asarray(offsets, dtype=np.float32).tobytes()
+
+
+def unpack_segment_offsets(blob: bytes) -> np.ndarray:
+    return np.frombuffer(blob, dtype=np.float32).reshape(-1, 3)
+
+
+# Chunk a stream of (page_number, text) records, keeping the page range of
+# each chunk. Only the words of the chunk being filled are held in memory.
+@register_chunker("words", "pages")
+def iter_chunk_pages(
+    pages,
     chunk_size: int = 500,
     overlap: int = 50,
 ):
-    words = text.split()
-    chunks = []
+    step = chunk_size - overlap
+    words = []
+    word_pages = []
+
+    def take():
+        chunk = TextChunk(
+            text=" ".join(words[:chunk_size]),
+            page_start=word_pages[0],
+            page_end=word_pages[min(chunk_size, len(words)) - 1],
+        )
+        del words[:step]
+        del word_pages[:step]
+        return chunk
+
+    for page_number, text in pages:
+        page_words = text.split()
+        words.extend(page_words)
+        word_pages.extend([page_number] * len(page_words))
+
+        while len(words) >= chunk_size:
+            yield take()
 
+    while words:
+        yield take()
+
+
+# Chunk (page_number, text) records, keeping the page range of each chunk
+def chunk_pages(
+    pages: list[tuple[int, str]],
+    chunk_size: int = 500,
+    overlap: int = 50,
+) -> list[TextChunk]:
     logger.info(
-        f"Chunking text with {len(words)} words"
+        f"Chunking {len(pages)} pages"
     )
 
-    start = 0
-    while start < len(words):
-        end = start + chunk_size
-        chunk_words = words[start:end]
-        chunks.append(" ".join(chunk_words))
-        start += chunk_size - overlap
+    chunks = list(iter_chunk_pages(pages, chunk_size, overlap))
 
     logger.info(
         f"Generated {len(chunks)} text chunks"
     )
 
     return chunks
+
+
+@dataclass(slots=True)
+class _Span:
+    page_number: int
+    # The page text; spans index into it rather than copying it
+    text: str
+    start: int
+    end: int
+    tokens: int
+
+
+def _trim(text: str, start: int, end: int) -> int:
+    while end > start and text[end - 1].isspace():
+        end -= 1
+    return end
+
+
+# Cut an over-long span at whitespace into pieces of at most max_tokens
+def _split_span(page_number, text, start, end, max_tokens, encoding_name):
+    while start < end:
+        limit = min(end, start + max_tokens * CHARS_PER_TOKEN)
+
+        while True:
+            cut = limit
+            if cut < end:
+                space = text.rfind(" ", start + 1, cut)
+                cut = space if space > start else cut
+
+            tokens = count_tokens(text[start:cut], encoding_name)
+            if tokens <= max_tokens or cut - start <= 1:
+                break
+            limit = start + max(1, (cut - start) * max_tokens // tokens)
+
+        yield _Span(page_number, text, start, _trim(text, start, cut), tokens)
+
+        start = cut
+        while start < end and text[start].isspace():
+            start += 1
+
+
+def _spans(page_number, text, pattern, start, end, max_tokens, encoding_name):
+    for match in pattern.finditer(text, start, end):
+        span_end = _trim(text, match.start(), match.end())
+        tokens = count_tokens(text[match.start():span_end], encoding_name)
+
+        if tokens > max_tokens:
+            yield from _split_span(page_number, text, match.start(), span_end, max_tokens, encoding_name)
+        else:
+            yield _Span(page_number, text, match.start(), span_end, tokens)
+
+
+# Sentences of prose paragraphs; a table is kept whole when it fits in a
+# chunk and split into rows otherwise
+def _page_spans(page_number: int, text: str, max_tokens: int, encoding_name: str):
+    for paragraph in PARAGRAPH_RE.finditer(text):
+        start, end = paragraph.start(), _trim(text, *paragraph.span())
+        lines = rows = 0
+        for line in LINE_RE.finditer(text, start, end):
+            lines += 1
+            rows += TABLE_ROW_RE.search(text, line.start(), line.end()) is not None
+
+        if rows >= 2 and rows * 2 > lines:
+            tokens = count_tokens(text[start:end], encoding_name)
+
+            if tokens <= max_tokens:
+                yield _Span(page_number, text, start, end, tokens)
+            else:
+                yield from _spans(page_number, text, LINE_RE, start, end, max_tokens, encoding_name)
+
+            continue
+
+        yield from _spans(page_number, text, SENTENCE_RE, start, end, max_tokens, encoding_name)
+
+
+def _chunk_from_spans(spans: list) -> TextChunk:
+    parts = []
+    first = 0
+
+    # One slice per page rather than one per sentence
+    for i in range(1, len(spans) + 1):
+        if i == len(spans) or spans[i].page_number != spans[first].page_number:
+            parts.append(spans[first].text[spans[first].start:spans[i - 1].end])
+            first = i
+
+    return TextChunk(
+        text="\n\n".join(parts),
+        page_start=spans[0].page_number,
+        page_end=spans[-1].page_number,
+    )
+
+
+# Chunk a stream of (page_number, text) records into chunks of at most
+# max_tokens, cutting only between sentences (or table rows) and carrying up
+# to overlap_tokens of trailing sentences into the next chunk
+@register_chunker("sentences", "pages")
+def iter_sentence_chunks(
+    pages,
+    max_tokens: int = CHUNK_MAX_TOKENS,
+    overlap_tokens: int = CHUNK_OVERLAP_TOKENS,
+    encoding_name: str = CHUNK_TOKENIZER_ENCODING,
+):
+    # Every span is counted with one extra token for the whitespace joining
+    # it to its neighbour, so sums stay an upper bound of the chunk's tokens
+    budget = max_tokens + 1
+    spans = []
+    tokens = 0
+    # Spans at the front of the buffer already emitted in the previous chunk
+    carried = 0
+
+    for page_number, text in pages:
+        for span in _page_spans(page_number, text, max_tokens, encoding_name):
+            if spans and tokens + span.tokens + 1 > budget:
+                if len(spans) > carried:
+                    yield _chunk_from_spans(spans)
+
+                # Keep the tail that fits in the overlap and leaves room for span
+                keep = len(spans)
+                kept_tokens = 0
+                while keep > 0:
+                    candidate = kept_tokens + spans[keep - 1].tokens + 1
+                    if candidate > overlap_tokens or candidate + span.tokens + 1 > budget:
+                        break
+                    kept_tokens = candidate
+                    keep -= 1
+
+                spans = spans[keep:]
+                tokens = kept_tokens
+                carried = len(spans)
+
+            spans.append(span)
+            tokens += span.tokens + 1
+
+    if len(spans) > carried:
+        yield _chunk_from_spans(spans)
+
+
+def _transcript_window(segments: list) -> TranscriptWindow:
+    parts = []
+    offsets = np.empty((len(segments), 3), dtype=np.float32)
+    position = 0
+
+    for i, (segment, text, _) in enumerate(segments):
+        offsets[i] = (position, segment.start, segment.end)
+        parts.append(text)
+        position += len(text) + 1
+
+    return TranscriptWindow(
+        text=" ".join(parts),
+        start=segments[0][0].start,
+        end=max(segment.end for segment, _, _ in segments),
+        segment_offsets=offsets,
+    )
+
+
+# Merge a stream of transcript segments (a few seconds each) into windows of
+# at most max_seconds and max_tokens. Trailing segments within
+# overlap_seconds of a window's end start the next window too. Each window
+# keeps the exact timestamps of its segments for citations.
+@register_chunker("segments", "segments")
+def iter_transcript_windows(
+    segments,
+    max_seconds: float = TRANSCRIPT_WINDOW_SECONDS,
+    max_tokens: int = TRANSCRIPT_WINDOW_TOKENS,
+    overlap_seconds: float = TRANSCRIPT_OVERLAP_SECONDS,
+    encoding_name: str = CHUNK_TOKENIZER_ENCODING,
+):
+    # (segment, stripped text, tokens + 1 for the joining space)
+    window = []
+    tokens = 0
+    carried = 0
+
+    for segment in segments:
+        text = segment.text.strip()
+
+        if not text:
+            continue
+
+        cost = count_tokens(text, encoding_name) + 1
+
+        def fits(first) -> bool:
+            return segment.end - first.start <= max_seconds
+
+        if window and (not fits(window[0][0]) or tokens + cost > max_tokens + 1):
+            if len(window) > carried:
+                yield _transcript_window(window)
+
+            end = window[-1][0].end
+            keep = len(window)
+            kept_tokens = 0
+
+            while keep > 0:
+                previous, _, previous_cost = window[keep - 1]
+                if (
+                    end - previous.start > overlap_seconds
+                    or not fits(previous)
+                    or kept_tokens + previous_cost + cost > max_tokens + 1
+                ):
+                    break
+                kept_tokens += previous_cost
+                keep -= 1
+
+            window = window[keep:]
+            tokens = kept_tokens
+            carried = len(window)
+
+        window.append((segment, text, cost))
+        tokens += cost
+
+    if len(window) > carried:
+        yield _transcript_window(window)
+
+
+# Chunker registered for the file type (PDF_CHUNKER for PDFs, AV_CHUNKER for
+# audio/video transcripts)
+def get_chunker(file_type: str):
+    name = {
+        "pdf": PDF_CHUNKER,
+        "mp3": AV_CHUNKER,
+        "wav": AV_CHUNKER,
+        "mp4": AV_CHUNKER,
+    }.get(file_type, "sentences")
+    input_kind = FILE_TYPE_INPUTS.get(file_type, "pages")
+
+    if name not in CHUNKERS:
+        raise RuntimeError(f"Unknown chunker '{name}' for file type {file_type}")
+
+    if CHUNKER_INPUTS[name] != input_kind:
+        raise RuntimeError(
+            f"Chunker '{name}' takes {CHUNKER_INPUTS[name]}, "
+            f"but {file_type} files produce {input_kind}"
+        )
+
+    return CHUNKERS[name]
+
+# Fail at startup when PDF_CHUNKER or AV_CHUNKER does not fit its file types
+def check_chunkers():
+    for file_type in FILE_TYPE_INPUTS:
+        get_chunker(file_type)
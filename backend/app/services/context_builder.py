@@ -0,0 +1,183 @@
+import os
+from dataclasses import dataclass, field
+
+from app.services.chunking import unpack_segment_offsets
+from app.utils.logger import logger
+from app.utils.tokens import count_tokens, truncate_to_tokens
+
+# Prompt tokens spent on retrieved context
+CONTEXT_MAX_TOKENS = int(os.getenv("CONTEXT_MAX_TOKENS", 3000))
+# Tokenizer of the chat model (gpt-4o family)
+CONTEXT_TOKENIZER_ENCODING = os.getenv("CONTEXT_TOKENIZER_ENCODING", "o200k_base")
+# Audio/video segments this close in time are merged into one block
+CONTEXT_MERGE_GAP_SECONDS = float(os.getenv("CONTEXT_MERGE_GAP_SECONDS", 2.0))
+# A block cut to fit the budget is kept only if this many tokens remain
+CONTEXT_MIN_TRUNCATED_TOKENS = 50
+# Longest chunk overlap searched for when merging neighbours
+MAX_OVERLAP_WORDS = 200
+
+BLOCK_SEPARATOR = "\n\n"
+
+
+@dataclass
+class ContextBlock:
+    file_id: object
+    text: str
+    # Best (lowest) retrieval rank among the merged chunks
+    rank: int
+    chunk_ids: list = field(default_factory=list)
+    start_time: float | None = None
+    end_time: float | None = None
+    page_start: int | None = None
+    page_end: int | None = None
+    # Exact (start, end) of the transcript segments merged into the block
+    segments: list = field(default_factory=list)
+
+
+# Join two consecutive chunks, dropping the words the second one repeats
+def merge_overlap(first: str, second: str) -> str:
+    a, b = first.split(), second.split()
+
+    for size in range(min(len(a), len(b), MAX_OVERLAP_WORDS), 0, -1):
+        if a[-size:] == b[:size]:
+            return " ".join(a + b[size:])
+
+    return f"{first} {second}"
+
+
+def _position(chunk):
+    if chunk.chunk_index is not None:
+        return chunk.chunk_index
+    return chunk.start_time
+
+
+def _adjacent(previous, chunk) -> bool:
+    if previous.chunk_index is not None and chunk.chunk_index is not None:
+        return chunk.chunk_index == previous.chunk_index + 1
+
+    # Legacy AV rows without chunk_index are merged by time alone
+    if previous.end_time is not None and chunk.start_time is not None:
+        return chunk.start_time - previous.end_time <= CONTEXT_MERGE_GAP_SECONDS
+
+    return False
+
+
+def _segment_times(run: list) -> list:
+    times = set()
+
+    for chunk in run:
+        offsets = getattr(chunk, "segment_offsets", None)
+        if offsets:
+            times.update(
+                (round(float(start), 3), round(float(end), 3))
+                for _, start, end in unpack_segment_offsets(offsets)
+            )
+
+    return sorted(times)
+
+
+def _block_from_run(run: list, ranks: dict) -> ContextBlock:
+    text = run[0].text
+    for previous, chunk in zip(run, run[1:]):
+        # Only consecutive chunks of one chunking pass overlap; legacy AV
+        # rows merged by time are distinct segments that may repeat words
+        if previous.chunk_index is not None and chunk.chunk_index is not None:
+            text = merge_overlap(text, chunk.text)
+        else:
+            text = f"{text} {chunk.text}"
+
+    def bound(values, pick):
+        values = [v for v in values if v is not None]
+        return pick(values) if values else None
+
+    return ContextBlock(
+        file_id=run[0].file_id,
+        text=text,
+        rank=min(ranks[c.id] for c in run),
+        chunk_ids=[c.id for c in run],
+        start_time=bound([c.start_time for c in run], min),
+        end_time=bound([c.end_time for c in run], max),
+        page_start=bound([c.page_start for c in run], min),
+        page_end=bound([c.page_end for c in run], max),
+        segments=_segment_times(run),
+    )
+
+
+# Merge neighbouring chunks of the same file into blocks, best ranked first
+def merge_chunks(chunks: list) -> list[ContextBlock]:
+    ranks = {c.id: rank for rank, c in enumerate(chunks)}
+    by_file = {}
+
+    for chunk in chunks:
+        by_file.setdefault(chunk.file_id, []).append(chunk)
+
+    blocks = []
+
+    for file_chunks in by_file.values():
+        positioned = [c for c in file_chunks if _position(c) is not None]
+        unpositioned = [c for c in file_chunks if _position(c) is None]
+
+        positioned.sort(key=_position)
+
+        run = []
+        for chunk in positioned:
+            if run and not _adjacent(run[-1], chunk):
+                blocks.append(_block_from_run(run, ranks))
+                run = []
+            run.append(chunk)
+
+        if run:
+            blocks.append(_block_from_run(run, ranks))
+
+        blocks.extend(_block_from_run([c], ranks) for c in unpositioned)
+
+    blocks.sort(key=lambda block: block.rank)
+
+    return blocks
+
+
+# Rank-ordered, deduplicated context blocks fitted to the token budget
+def build_context(
+    chunks: list,
+    max_tokens: int = CONTEXT_MAX_TOKENS,
+    encoding_name: str = CONTEXT_TOKENIZER_ENCODING,
+) -> list[ContextBlock]:
+    blocks = merge_chunks(chunks)
+    separator_tokens = count_tokens(BLOCK_SEPARATOR, encoding_name)
+
+    selected = []
+    seen = set()
+    remaining = max_tokens
+
+    for block in blocks:
+        key = " ".join(block.text.lower().split())
+
+        if key in seen:
+            continue
+        seen.add(key)
+
+        tokens = count_tokens(block.text, encoding_name) + separator_tokens
+
+        if tokens <= remaining:
+            selected.append(block)
+            remaining -= tokens
+            continue
+
+        if remaining - separator_tokens >= CONTEXT_MIN_TRUNCATED_TOKENS:
+            block.text = truncate_to_tokens(
+                block.text, remaining - separator_tokens, encoding_name
+            )
+            selected.append(block)
+
+        break
+
+    logger.info(
+        f"Built context from {len(chunks)} chunks: {len(blocks)} blocks, "
+        f"{len(selected)} within {max_tokens} tokens ({max_tokens - remaining} used)"
+    )
+
+    return selected
+
+
+def render_context(blocks: list[ContextBlock]) -> str:
+    return BLOCK_SEPARATOR.join(block.text for block in blocks)
@@ -0,0 +1,277 @@
+import hashlib
+import os
+import sqlite3
+import threading
+import time
+from collections import OrderedDict
+
+import numpy as np
+
+from app.utils.logger import logger
+from app.utils.metrics import record_cache
+
+EMBEDDING_CACHE_ENABLED = os.getenv("EMBEDDING_CACHE", "true").lower() == "true"
+EMBEDDING_CACHE_MEMORY_ITEMS = int(os.getenv("EMBEDDING_CACHE_MEMORY_ITEMS", 50_000))
+# Empty path disables the persistent tier
+EMBEDDING_CACHE_PATH = os.getenv("EMBEDDING_CACHE_PATH", "storage/cache/embeddings.sqlite")
+# Rows kept in the persistent tier (~6KB each at 1536 dims); least recently
+# used rows are pruned once it grows past the limit, 0 disables the bound
+EMBEDDING_CACHE_MAX_ROWS = int(os.getenv("EMBEDDING_CACHE_MAX_ROWS", 200_000))
+
+
+def cache_key(model: str, text: str) -> bytes:
+    return hashlib.sha256(f"{model}\0{text}".encode()).digest()
+
+
+class MemoryTier:
+    def __init__(self, max_items: int):
+        self.max_items = max_items
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get_many(self, keys: list[bytes]) -> dict:
+        found = {}
+
+        with self._lock:
+            for key in keys:
+                vector = self._entries.get(key)
+                if vector is not None:
+                    self._entries.move_to_end(key)
+                    found[key] = vector
+
+        return found
+
+    def put_many(self, items: dict):
+        with self._lock:
+            for key, vector in items.items():
+                self._entries[key] = vector
+                self._entries.move_to_end(key)
+
+            while len(self._entries) > self.max_items:
+                self._entries.popitem(last=False)
+
+    def __len__(self):
+        return len(self._entries)
+
+
+class SQLiteTier:
+    """Persistent key -> float32 vector store shared by all workers on the host."""
+
+    # SQLite caps bound parameters per statement
+    QUERY_BATCH = 500
+    # Rows written between two size checks
+    PRUNE_EVERY = 1000
+    # Pruning removes down to this fraction of max_rows, so it runs rarely
+    PRUNE_TO = 0.9
+    # A hit refreshes used_at at most this often per row
+    TOUCH_AFTER_SECONDS = 3600
+
+    def __init__(self, path: str, max_rows: int = EMBEDDING_CACHE_MAX_ROWS):
+        self.path = path
+        self.max_rows = max_rows
+        self._local = threading.local()
+        self._lock = threading.Lock()
+        # None until the first write, so the first write checks the size
+        self._writes_since_prune = None
+
+    # One connection per thread, opened on first use
+    def _connect(self) -> sqlite3.Connection:
+        conn = getattr(self._local, "conn", None)
+
+        if conn is None:
+            directory = os.path.dirname(self.path)
+            if directory:
+                os.makedirs(directory, exist_ok=True)
+
+            conn = sqlite3.connect(self.path, timeout=30)
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute("PRAGMA synchronous=NORMAL")
+            conn.execute(
+                "CREATE TABLE IF NOT EXISTS embeddings "
+                "(key BLOB PRIMARY KEY, vector BLOB NOT NULL, used_at INTEGER NOT NULL DEFAULT 0)"
+            )
+
+            # Caches created before pruning existed lack the column
+            columns = {row[1] for row in conn.execute("PRAGMA table_info(embeddings)")}
+            if "used_at" not in columns:
+                conn.execute(
+                    "ALTER TABLE embeddings ADD COLUMN used_at INTEGER NOT NULL DEFAULT 0"
+                )
+
+            conn.execute(
+                "CREATE INDEX IF NOT EXISTS embeddings_used_at_idx ON embeddings (used_at)"
+            )
+            conn.commit()
+            self._local.conn = conn
+
+        return conn
+
+    def get_many(self, keys: list[bytes]) -> dict:
+        conn = self._connect()
+        found = {}
+
+        for i in range(0, len(keys), self.QUERY_BATCH):
+            batch = keys[i:i + self.QUERY_BATCH]
+            placeholders = ",".join("?" * len(batch))
+            rows = conn.execute(
+                f"SELECT key, vector FROM embeddings WHERE key IN ({placeholders})",
+                batch,
+            )
+            for key, vector in rows:
+                found[key] = np.frombuffer(vector, dtype=np.float32)
+
+        if found:
+            self._touch(conn, list(found))
+
+        return found
+
+    # Mark hit rows as recently used, skipping rows touched within the hour
+    def _touch(self, conn, keys: list[bytes]):
+        now = int(time.time())
+
+        with conn:
+            for i in range(0, len(keys), self.QUERY_BATCH):
+                batch = keys[i:i + self.QUERY_BATCH]
+                placeholders = ",".join("?" * len(batch))
+                conn.execute(
+                    f"UPDATE embeddings SET used_at = ? WHERE key IN ({placeholders}) AND used_at < ?",
+                    [now, *batch, now - self.TOUCH_AFTER_SECONDS],
+                )
+
+    def put_many(self, items: dict):
+        conn = self._connect()
+        now = int(time.time())
+
+        with conn:
+            conn.executemany(
+                "INSERT OR REPLACE INTO embeddings (key, vector, used_at) VALUES (?, ?, ?)",
+                [(key, vector.tobytes(), now) for key, vector in items.items()],
+            )
+
+        if self._should_prune(len(items)):
+            self.prune()
+
+    def _should_prune(self, written: int) -> bool:
+        if not self.max_rows:
+            return False
+
+        with self._lock:
+            if self._writes_since_prune is not None:
+                self._writes_since_prune += written
+                if self._writes_since_prune < self.PRUNE_EVERY:
+                    return False
+
+            self._writes_since_prune = 0
+
+        return True
+
+    # Delete the least recently used rows once the table exceeds max_rows;
+    # returns the number of rows removed
+    def prune(self) -> int:
+        conn = self._connect()
+        count = conn.execute("SELECT COUNT(*) FROM embeddings").fetchone()[0]
+
+        if count <= self.max_rows:
+            return 0
+
+        excess = count - int(self.max_rows * self.PRUNE_TO)
+
+        with conn:
+            conn.execute(
+                "DELETE FROM embeddings WHERE key IN "
+                "(SELECT key FROM embeddings ORDER BY used_at LIMIT ?)",
+                (excess,),
+            )
+
+        logger.info(f"Pruned {excess} least recently used rows from the embedding cache")
+
+        return excess
+
+
+class EmbeddingCache:
+    def __init__(self, memory: MemoryTier, persistent: SQLiteTier | None = None):
+        self.memory = memory
+        self.persistent = persistent
+        self._lock = threading.Lock()
+        self.memory_hits = 0
+        self.persistent_hits = 0
+        self.misses = 0
+
+    # Return {text_index: vector} for every text already embedded with model
+    def get_many(self, model: str, texts: list[str]) -> dict:
+        keys = [cache_key(model, text) for text in texts]
+        in_memory = self.memory.get_many(keys)
+        persisted = {}
+
+        if self.persistent is not None:
+            missing = list({key for key in keys if key not in in_memory})
+
+            if missing:
+                try:
+                    persisted = self.persistent.get_many(missing)
+                except sqlite3.Error:
+                    logger.error("Embedding cache read failed", exc_info=True)
+
+                if persisted:
+                    self.memory.put_many(persisted)
+
+        result = {}
+        memory_hits = 0
+        persistent_hits = 0
+
+        for i, key in enumerate(keys):
+            if key in in_memory:
+                result[i] = in_memory[key]
+                memory_hits += 1
+            elif key in persisted:
+                result[i] = persisted[key]
+                persistent_hits += 1
+
+        with self._lock:
+            self.memory_hits += memory_hits
+            self.persistent_hits += persistent_hits
+            self.misses += len(keys) - len(result)
+
+        record_cache("embedding", memory_hits + persistent_hits, len(keys) - len(result))
+
+        return result
+
+    def put_many(self, model: str, texts: list[str], embeddings):
+        items = {
+            cache_key(model, text): np.asarray(embedding, dtype=np.float32)
+            for text, embedding in zip(texts, embeddings)
+        }
+
+        self.memory.put_many(items)
+
+        if self.persistent is not None:
+            try:
+                self.persistent.put_many(items)
+            except sqlite3.Error:
+                logger.error("Embedding cache write failed", exc_info=True)
+
+    def stats(self) -> dict:
+        with self._lock:
+            hits = self.memory_hits + self.persistent_hits
+            lookups = hits + self.misses
+            return {
+                "memory_items": len(self.memory),
+                "memory_hits": self.memory_hits,
+                "persistent_hits": self.persistent_hits,
+                "misses": self.misses,
+                "hit_ratio": hits / lookups if lookups else 0.0,
+            }
+
+
+def create_cache():
+    if not EMBEDDING_CACHE_ENABLED:
+        return None
+
+    persistent = (
+        SQLiteTier(EMBEDDING_CACHE_PATH, EMBEDDING_CACHE_MAX_ROWS) if EMBEDDING_CACHE_PATH else None
+    )
+
+    return EmbeddingCache(MemoryTier(EMBEDDING_CACHE_MEMORY_ITEMS), persistent)
+
+
+embedding_cache = create_cache()
@@ -1,18 +1,363 @@
-from openai import OpenAI
+import asyncio
+import hashlib
+import os
+import random
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+import numpy as np
+import openai
+from openai import AsyncOpenAI, OpenAI
+
+from app.services.embedding_cache import embedding_cache
 from app.utils.logger import logger
+from app.utils.metrics import (
+    EMBED_BATCH_INPUTS,
+    EMBED_BATCH_TOKENS,
+    EMBED_REQUEST_SECONDS,
+    record_error,
+)
+from app.utils.tokens import count_tokens, truncate_to_tokens
+
+EMBEDDING_MODEL = "text-embedding-3-small"
+EMBEDDING_DTYPE = np.float32
+
+# "openai" in production, "fake" for offline tests and benchmarks
+EMBEDDING_BACKEND = os.getenv("EMBEDDING_BACKEND", "openai").lower()
+EMBEDDING_DIM = int(os.getenv("EMBEDDING_DIM", 1536))
+
+# Provider limits: 8191 tokens per input, 2048 inputs and ~300k tokens per request
+EMBEDDING_MAX_INPUT_TOKENS = int(os.getenv("EMBEDDING_MAX_INPUT_TOKENS", 8191))
+EMBEDDING_BATCH_SIZE = int(os.getenv("EMBEDDING_BATCH_SIZE", 2048))
+EMBEDDING_BATCH_TOKENS = int(os.getenv("EMBEDDING_BATCH_TOKENS", 100_000))
+EMBEDDING_CONCURRENCY = int(os.getenv("EMBEDDING_CONCURRENCY", 4))
+EMBEDDING_MAX_RETRIES = int(os.getenv("EMBEDDING_MAX_RETRIES", 5))
+EMBEDDING_RETRY_BACKOFF = float(os.getenv("EMBEDDING_RETRY_BACKOFF", 1.0))
+
+RETRYABLE_ERRORS = (
+    openai.RateLimitError,
+    openai.APIConnectionError,
+    openai.APITimeoutError,
+    openai.InternalServerError,
+)
+
+
+class OpenAIEmbeddingBackend:
+    def __init__(self, model: str = EMBEDDING_MODEL):
+        self.model = model
+        # Retries are handled by the engine so backoff is applied per batch
+        self.client = OpenAI(max_retries=0)
+        self.async_client = AsyncOpenAI(max_retries=0)
+
+    def embed(self, texts: list[str]) -> list[list[float]]:
+        response = self.client.embeddings.create(
+            model=self.model,
+            input=texts,
+        )
+        return [item.embedding for item in response.data]
+
+    async def aembed(self, texts: list[str]) -> list[list[float]]:
+        response = await self.async_client.embeddings.create(
+            model=self.model,
+            input=texts,
+        )
+        return [item.embedding for item in response.data]
+
+
+class FakeEmbeddingBackend:
+    """Deterministic local embeddings with optional simulated request latency."""
+
+    def __init__(self, dim: int = EMBEDDING_DIM, latency: float = 0.0):
+        self.model = f"fake-{dim}"
+        self.dim = dim
+        self.latency = latency
+
+    def embed(self, texts: list[str]) -> list[list[float]]:
+        if self.latency:
+            time.sleep(self.latency)
+
+        return self._vectors(texts)
+
+    async def aembed(self, texts: list[str]) -> list[list[float]]:
+        if self.latency:
+            await asyncio.sleep(self.latency)
+
+        return self._vectors(texts)
+
+    def _vectors(self, texts: list[str]) -> list[list[float]]:
+        embeddings = []
+
+        for text in texts:
+            seed = int.from_bytes(hashlib.sha256(text.encode()).digest()[:8], "little")
+            vector = np.random.default_rng(seed).standard_normal(self.dim)
+            embeddings.append((vector / np.linalg.norm(vector)).tolist())
+
+        return embeddings
+
+
+def create_backend(name: str = EMBEDDING_BACKEND):
+    if name == "openai":
+        return OpenAIEmbeddingBackend()
+
+    if name == "fake":
+        return FakeEmbeddingBackend()
+
+    raise RuntimeError(f"Unknown EMBEDDING_BACKEND '{name}'")
+
+
+_backend = None
+_backend_lock = threading.Lock()
+_executor = ThreadPoolExecutor(
+    max_workers=EMBEDDING_CONCURRENCY,
+    thread_name_prefix="embedding",
+)
+
+
+def get_backend():
+    global _backend
+
+    with _backend_lock:
+        if _backend is None:
+            _backend = create_backend()
+        return _backend
+
+
+def set_backend(backend):
+    global _backend
+
+    with _backend_lock:
+        _backend = backend
+
+
+# Pack inputs into request batches bounded by input count and total tokens
+def pack_batches(
+    token_counts: list[int],
+    max_batch_size: int | None = None,
+    max_batch_tokens: int | None = None,
+) -> list[list[int]]:
+    # Read at call time so the limits can be tuned at runtime
+    if max_batch_size is None:
+        max_batch_size = EMBEDDING_BATCH_SIZE
+    if max_batch_tokens is None:
+        max_batch_tokens = EMBEDDING_BATCH_TOKENS
+
+    batches = []
+    batch = []
+    batch_tokens = 0
+
+    for i, tokens in enumerate(token_counts):
+        if batch and (
+            len(batch) >= max_batch_size or batch_tokens + tokens > max_batch_tokens
+        ):
+            batches.append(batch)
+            batch = []
+            batch_tokens = 0
+
+        batch.append(i)
+        batch_tokens += tokens
+
+    if batch:
+        batches.append(batch)
+
+    return batches
+
+
+def _embed_batch(backend, texts: list[str]) -> list[list[float]]:
+    for attempt in range(EMBEDDING_MAX_RETRIES + 1):
+        try:
+            with EMBED_REQUEST_SECONDS.labels("sync").time():
+                return backend.embed(texts)
+        except RETRYABLE_ERRORS as e:
+            record_error("embeddings", e)
+
+            if attempt == EMBEDDING_MAX_RETRIES:
+                raise
+
+            delay = EMBEDDING_RETRY_BACKOFF * 2 ** attempt * (1 + random.random())
+
+            logger.warning(
+                f"Embedding batch of {len(texts)} failed ({type(e).__name__}), retrying in {delay:.1f}s"
+            )
+
+            time.sleep(delay)
+
+
+async def _aembed_batch(backend, texts: list[str], semaphore) -> list[list[float]]:
+    for attempt in range(EMBEDDING_MAX_RETRIES + 1):
+        try:
+            async with semaphore:
+                with EMBED_REQUEST_SECONDS.labels("async").time():
+                    return await backend.aembed(texts)
+        except RETRYABLE_ERRORS as e:
+            record_error("embeddings", e)
+
+            if attempt == EMBEDDING_MAX_RETRIES:
+                raise
+
+            delay = EMBEDDING_RETRY_BACKOFF * 2 ** attempt * (1 + random.random())
+
+            logger.warning(
+                f"Embedding batch of {len(texts)} failed ({type(e).__name__}), retrying in {delay:.1f}s"
+            )
+
+            await asyncio.sleep(delay)
+
+
+# Count tokens, truncate over-long inputs and pack them into request batches
+def _prepare_batches(texts: list[str]) -> tuple[list[list[int]], list[list[str]], int]:
+    inputs = []
+    token_counts = []
+
+    for text in texts:
+        tokens = count_tokens(text)
+
+        if tokens > EMBEDDING_MAX_INPUT_TOKENS:
+            logger.warning(
+                f"Truncating embedding input from {tokens} to {EMBEDDING_MAX_INPUT_TOKENS} tokens"
+            )
+            text = truncate_to_tokens(text, EMBEDDING_MAX_INPUT_TOKENS)
+            tokens = EMBEDDING_MAX_INPUT_TOKENS
+
+        inputs.append(text)
+        token_counts.append(tokens)
+
+    batches = pack_batches(token_counts)
+    batch_texts = [[inputs[i] for i in batch] for batch in batches]
+
+    for batch in batches:
+        EMBED_BATCH_INPUTS.observe(len(batch))
+        EMBED_BATCH_TOKENS.observe(sum(token_counts[i] for i in batch))
+
+    return batches, batch_texts, sum(token_counts)
+
+
+# Scatter per-batch results back into input order
+def _unpack_batches(count: int, batches, results, total_tokens: int) -> list[list[float]]:
+    embeddings = [None] * count
+
+    for batch, batch_embeddings in zip(batches, results):
+        for i, embedding in zip(batch, batch_embeddings):
+            embeddings[i] = embedding
+
+    logger.info(
+        f"Embeddings generated successfully, batches={len(batches)}, tokens={total_tokens}"
+    )
+
+    return embeddings
+
+
+# Embed batches concurrently over the thread pool, in input order
+def _embed_uncached(backend, texts: list[str]) -> list[list[float]]:
+    batches, batch_texts, total_tokens = _prepare_batches(texts)
+
+    if len(batches) == 1:
+        results = [_embed_batch(backend, batch_texts[0])]
+    else:
+        futures = [
+            _executor.submit(_embed_batch, backend, texts)
+            for texts in batch_texts
+        ]
+        results = [future.result() for future in futures]
+
+    return _unpack_batches(len(texts), batches, results, total_tokens)
+
+
+# Embed batches concurrently on the event loop, in input order
+async def _aembed_uncached(backend, texts: list[str]) -> list[list[float]]:
+    batches, batch_texts, total_tokens = _prepare_batches(texts)
+    semaphore = asyncio.Semaphore(EMBEDDING_CONCURRENCY)
+
+    results = await asyncio.gather(
+        *(_aembed_batch(backend, texts, semaphore) for texts in batch_texts)
+    )
+
+    return _unpack_batches(len(texts), batches, results, total_tokens)
+
+
+# Fill embeddings from the cache, returning {text: [indices]} still missing
+def _fill_from_cache(cached: dict, texts: list[str], embeddings: list) -> dict:
+    for i, vector in cached.items():
+        embeddings[i] = vector.tolist()
+
+    # Embed each distinct uncached text once
+    pending = {}
+    for i, text in enumerate(texts):
+        if embeddings[i] is None:
+            pending.setdefault(text, []).append(i)
+
+    return pending
+
+
+def _fill_computed(pending: dict, computed, embeddings: list):
+    for text, embedding in zip(pending, computed):
+        for i in pending[text]:
+            embeddings[i] = embedding
 
-client = OpenAI()
 
 def embed_texts(texts: list[str]) -> list[list[float]]:
     logger.info(
         f"Generating embeddings for {len(texts)} texts"
     )
 
-    response = client.embeddings.create(
-        model="text-embedding-3-small",
-        input=texts,
+    if not texts:
+        return []
+
+    backend = get_backend()
+    embeddings = [None] * len(texts)
+
+    cached = embedding_cache.get_many(backend.model, texts) if embedding_cache else {}
+    pending = _fill_from_cache(cached, texts, embeddings)
+
+    if not pending:
+        logger.info("All embeddings served from cache")
+        return embeddings
+
+    unique_texts = list(pending)
+    computed = _embed_uncached(backend, unique_texts)
+    _fill_computed(pending, computed, embeddings)
+
+    if embedding_cache is not None:
+        embedding_cache.put_many(backend.model, unique_texts, computed)
+
+    return embeddings
+
+
+# Async variant for the request path, backed by AsyncOpenAI
+async def aembed_texts(texts: list[str]) -> list[list[float]]:
+    logger.info(
+        f"Generating embeddings for {len(texts)} texts"
+    )
+
+    if not texts:
+        return []
+
+    backend = get_backend()
+    embeddings = [None] * len(texts)
+
+    cached = (
+        await asyncio.to_thread(embedding_cache.get_many, backend.model, texts)
+        if embedding_cache else {}
     )
+    pending = _fill_from_cache(cached, texts, embeddings)
+
+    if not pending:
+        logger.info("All embeddings served from cache")
+        return embeddings
+
+    unique_texts = list(pending)
+    computed = await _aembed_uncached(backend, unique_texts)
+    _fill_computed(pending, computed, embeddings)
+
+    if embedding_cache is not None:
+        await asyncio.to_thread(embedding_cache.put_many, backend.model, unique_texts, computed)
+
+    return embeddings
 
-    logger.info("Embeddings generated successfully")
+# Serialize an embedding into the compact float32 blob stored on Chunk
+def to_blob(embedding) -> bytes:
+    return np.asarray(embedding, dtype=EMBEDDING_DTYPE).tobytes()
 
-    return [item.embedding for item in response.data]
+# Deserialize a Chunk.embedding blob back into a float32 vector
+def from_blob(blob: bytes) -> np.ndarray:
+    return np.frombuffer(blob, dtype=EMBEDDING_DTYPE)
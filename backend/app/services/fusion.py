@@ -0,0 +1,19 @@
+import os
+
+# Run BM25 alongside vector search and fuse the two rankings
+HYBRID_SEARCH = os.getenv("HYBRID_SEARCH", "true").lower() == "true"
+# Candidates taken from each ranking before fusion
+HYBRID_CANDIDATES = int(os.getenv("HYBRID_CANDIDATES", 20))
+# Rank constant of reciprocal rank fusion; larger values flatten the head
+RRF_K = int(os.getenv("RRF_K", 60))
+
+
+# Fuse ranked id lists, best first: score(id) = sum of 1 / (RRF_K + rank)
+def reciprocal_rank_fusion(rankings: list, k: int = RRF_K) -> list:
+    scores = {}
+
+    for ranking in rankings:
+        for rank, item in enumerate(ranking, start=1):
+            scores[item] = scores.get(item, 0.0) + 1.0 / (k + rank)
+
+    return sorted(scores, key=scores.get, reverse=True)
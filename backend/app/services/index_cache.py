@@ -0,0 +1,89 @@
+import os
+import threading
+from collections import OrderedDict
+
+from app.utils.logger import logger
+
+# Total FAISS vector bytes kept in memory across all cached files
+INDEX_CACHE_MAX_BYTES = int(os.getenv("INDEX_CACHE_MAX_BYTES", 512 * 1024 * 1024))
+
+
+class IndexCache:
+    def __init__(self, max_bytes: int = INDEX_CACHE_MAX_BYTES):
+        self.max_bytes = max_bytes
+        self._entries = OrderedDict()
+        self._bytes = 0
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+
+    def get(self, file_id):
+        key = str(file_id)
+
+        with self._lock:
+            vector_store = self._entries.get(key)
+
+            if vector_store is None:
+                self.misses += 1
+                return None
+
+            self._entries.move_to_end(key)
+            self.hits += 1
+
+            return vector_store
+
+    def put(self, file_id, vector_store):
+        key = str(file_id)
+        size = vector_store.nbytes
+
+        if size > self.max_bytes:
+            logger.warning(
+                f"Index for file {file_id} ({size} bytes) exceeds cache budget, not caching"
+            )
+            return
+
+        with self._lock:
+            previous = self._entries.pop(key, None)
+            if previous is not None:
+                self._bytes -= previous.nbytes
+
+            self._entries[key] = vector_store
+            self._bytes += size
+
+            while self._bytes > self.max_bytes:
+                evicted_key, evicted = self._entries.popitem(last=False)
+                self._bytes -= evicted.nbytes
+                self.evictions += 1
+                logger.info(f"Evicted vector index for file {evicted_key} from cache")
+
+    def invalidate(self, file_id):
+        key = str(file_id)
+
+        with self._lock:
+            vector_store = self._entries.pop(key, None)
+            if vector_store is not None:
+                self._bytes -= vector_store.nbytes
+                logger.info(f"Invalidated cached vector index for file {key}")
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+            self._bytes = 0
+
+    def stats(self) -> dict:
+        with self._lock:
+            lookups = self.hits + self.misses
+            return {
+                "entries": len(self._entries),
+                "bytes": self._bytes,
+                "max_bytes": self.max_bytes,
+                "hits": self.hits,
+                "misses": self.misses,
+                "evictions": self.evictions,
+                "hit_ratio": self.hits / lookups if lookups else 0.0,
+            }
+
+
+# Process-wide cache shared by all requests in this worker
+index_cache = IndexCache()
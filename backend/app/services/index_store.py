@@ -0,0 +1,184 @@
+import json
+import os
+import uuid
+
+import faiss
+import numpy as np
+
+from app.services.bm25_index import BM25Index
+from app.services.vector_store import VectorStore
+from app.utils.logger import logger
+
+INDEX_DIR = "storage/indexes"
+
+# Memory-map flat codes read-only so workers share pages via the OS page cache
+MMAP_FLAGS = getattr(faiss, "IO_FLAG_MMAP_IFC", faiss.IO_FLAG_MMAP) | faiss.IO_FLAG_READ_ONLY
+
+
+# Each save writes a new immutable version ({file_id}.{version}.faiss plus
+# its ids) and then publishes it by swapping the {file_id}.current pointer,
+# so a reader always gets an index and ids from the same save
+def _pointer_path(file_id) -> str:
+    return os.path.join(INDEX_DIR, f"{file_id}.current")
+
+
+def _index_path(file_id, version) -> str:
+    return os.path.join(INDEX_DIR, f"{file_id}.{version}.faiss")
+
+
+def _ids_path(file_id, version) -> str:
+    return os.path.join(INDEX_DIR, f"{file_id}.{version}.ids.npy")
+
+
+def _lexical_path(file_id) -> str:
+    return os.path.join(INDEX_DIR, f"{file_id}.bm25.json")
+
+
+def _remove_version(file_id, version):
+    for path in (_index_path(file_id, version), _ids_path(file_id, version)):
+        try:
+            os.remove(path)
+        except FileNotFoundError:
+            pass
+
+
+# Version token of the persisted index, None when nothing is on disk
+def index_version(file_id):
+    try:
+        with open(_pointer_path(file_id)) as f:
+            return f.read().strip() or None
+    except FileNotFoundError:
+        return None
+
+
+def save_index(file_id, vector_store: VectorStore):
+    os.makedirs(INDEX_DIR, exist_ok=True)
+
+    version = uuid.uuid4().hex
+    previous = index_version(file_id)
+
+    ids = np.array(
+        [np.frombuffer(chunk_id.bytes, dtype=np.uint8) for chunk_id in vector_store.chunk_ids],
+        dtype=np.uint8,
+    ).reshape(-1, 16)
+
+    with open(_ids_path(file_id, version), "wb") as f:
+        np.save(f, ids)
+
+    faiss.write_index(vector_store.index, _index_path(file_id, version))
+
+    # Publish both files with a single rename of the pointer
+    pointer_path = _pointer_path(file_id)
+    tmp_pointer_path = f"{pointer_path}.{os.getpid()}.tmp"
+    with open(tmp_pointer_path, "w") as f:
+        f.write(version)
+    os.replace(tmp_pointer_path, pointer_path)
+
+    # Readers that already opened the previous version keep their mapping
+    if previous is not None:
+        _remove_version(file_id, previous)
+
+    vector_store.version = version
+
+    logger.info(
+        f"Persisted vector index for file {file_id}, vectors={len(vector_store.chunk_ids)}"
+    )
+
+
+def _read_version(file_id, version):
+    index = faiss.read_index(_index_path(file_id, version), MMAP_FLAGS)
+    ids = np.load(_ids_path(file_id, version), mmap_mode="r")
+
+    return index, ids
+
+
+def load_index_from_disk(file_id):
+    version = index_version(file_id)
+
+    if version is None:
+        return None
+
+    try:
+        try:
+            index, ids = _read_version(file_id, version)
+        except (FileNotFoundError, RuntimeError):
+            # A newer save replaced this version between reading the pointer
+            # and opening its files; retry once with the new one
+            latest = index_version(file_id)
+
+            if latest is None or latest == version:
+                raise
+
+            version = latest
+            index, ids = _read_version(file_id, version)
+
+    except Exception:
+        logger.error(f"Failed to read persisted index for file {file_id}", exc_info=True)
+        return None
+
+    if index.ntotal != len(ids):
+        logger.warning(
+            f"Persisted index for file {file_id} is out of sync with its ids, ignoring"
+        )
+        return None
+
+    chunk_ids = [uuid.UUID(bytes=row.tobytes()) for row in ids]
+
+    logger.info(f"Loaded memory-mapped vector index for file {file_id}")
+
+    return VectorStore.from_index(index, chunk_ids, version=version)
+
+
+def lexical_index_version(file_id):
+    try:
+        return os.stat(_lexical_path(file_id)).st_mtime_ns
+    except FileNotFoundError:
+        return None
+
+
+def save_lexical_index(file_id, lexical_index: BM25Index):
+    os.makedirs(INDEX_DIR, exist_ok=True)
+
+    path = _lexical_path(file_id)
+
+    tmp_path = f"{path}.{os.getpid()}.tmp"
+    with open(tmp_path, "w") as f:
+        json.dump(lexical_index.to_dict(), f)
+    os.replace(tmp_path, path)
+
+    lexical_index.version = lexical_index_version(file_id)
+
+    logger.info(f"Persisted BM25 index for file {file_id}")
+
+
+def load_lexical_index_from_disk(file_id):
+    version = lexical_index_version(file_id)
+
+    if version is None:
+        return None
+
+    try:
+        with open(_lexical_path(file_id)) as f:
+            lexical_index = BM25Index.from_dict(json.load(f))
+    except Exception:
+        logger.error(f"Failed to read persisted BM25 index for file {file_id}", exc_info=True)
+        return None
+
+    lexical_index.version = version
+
+    logger.info(f"Loaded BM25 index for file {file_id}")
+
+    return lexical_index
+
+
+def delete_index(file_id):
+    version = index_version(file_id)
+
+    for path in (_pointer_path(file_id), _lexical_path(file_id)):
+        try:
+            os.remove(path)
+        except FileNotFoundError:
+            pass
+
+    if version is not None:
+        _remove_version(file_id, version)
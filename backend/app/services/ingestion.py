@@ -0,0 +1,141 @@
+from sqlalchemy.orm import Session
+
+from app.db.models.chunk import Chunk
+from app.db.models.file import File
+from app.errors.app_errors import BadRequestError
+from app.services.whisper_service import iter_audio_video_segments
+from app.services.blob_store import file_path as blob_file_path
+from app.services.chunk_service import clone_chunks, embed_records, store_records
+from app.services.pdf_service import iter_pages_from_pdf
+from app.services.chunking import get_chunker
+from app.services.pipeline import run_pipeline
+from app.services.answer_cache import answer_cache
+from app.services.retrieval import retriever
+from app.utils.logger import logger
+
+PDF_TYPES = {"pdf"}
+AV_TYPES = {"mp3", "wav", "mp4"}
+SUPPORTED_TYPES = PDF_TYPES | AV_TYPES
+
+# Another already-processed file with the same bytes, if any
+def find_processed_duplicate(db: Session, file: File):
+    if not file.content_hash:
+        return None
+
+    return (
+        db.query(File)
+        .filter(
+            File.content_hash == file.content_hash,
+            File.id != file.id,
+            db.query(Chunk.id).filter(Chunk.file_id == File.id).exists(),
+        )
+        .order_by(File.created_at)
+        .first()
+    )
+
+def index_file(db: Session, file: File, context):
+    with context.stage("index"):
+        retriever.index_file(db, file.id)
+
+    if answer_cache is not None:
+        answer_cache.invalidate_file(file.id)
+
+# Stream records through embedding and storage while the source is still
+# producing them; returns the number of chunks stored and per-stage stats
+def run_ingestion_pipeline(db: Session, file: File, source: tuple, stages: list, context):
+    with context.stage("pipeline"):
+        stats = run_pipeline(
+            source,
+            stages + [
+                ("embed", embed_records),
+                ("store", lambda embedded: store_records(db, file.id, embedded)),
+            ],
+        )
+    context.progress(0.9)
+
+    return stats[-1].items, {s.name: s.to_dict() for s in stats}
+
+# Run the full extract -> chunk -> embed -> index pipeline for one file
+def ingest_file(db: Session, file: File, context) -> dict:
+    file_path = blob_file_path(file)
+
+    # Identical content was processed before: reuse its chunks and embeddings
+    # instead of re-running OCR/transcription and embedding
+    source = find_processed_duplicate(db, file)
+
+    if source is not None:
+        logger.info(f"File {file.id} has the same content as file {source.id}, reusing chunks")
+
+        with context.stage("clone"):
+            count = clone_chunks(db, source.id, file.id)
+        context.progress(0.9)
+
+        index_file(db, file, context)
+
+        return {
+            "message": "Identical file already processed, chunks reused",
+            "chunks": count,
+            "deduplicated_from": str(source.id),
+        }
+
+    if file.file_type in PDF_TYPES:
+        logger.info(f"Starting PDF processing for file {file.id}")
+
+        count, stats = run_ingestion_pipeline(
+            db,
+            file,
+            ("extract", iter_pages_from_pdf(
+                file_path,
+                on_progress=lambda fraction: context.progress(0.8 * fraction),
+            )),
+            [("chunk", get_chunker(file.file_type))],
+            context,
+        )
+
+        index_file(db, file, context)
+
+        logger.info(
+            f"PDF processing completed for file {file.id}, chunks={count}"
+        )
+
+        return {
+            "message": "PDF processed successfully",
+            "chunks": count,
+            "pipeline": stats,
+        }
+
+    if file.file_type in AV_TYPES:
+        logger.info(
+            f"Starting audio/video processing for file {file.id}"
+        )
+
+        count, stats = run_ingestion_pipeline(
+            db,
+            file,
+            ("transcribe", iter_audio_video_segments(
+                file_path,
+                on_progress=lambda fraction: context.progress(0.8 * fraction),
+            )),
+            [("chunk", get_chunker(file.file_type))],
+            context,
+        )
+
+        index_file(db, file, context)
+
+        logger.info(
+            f"Audio/video processing completed for file {file.id}, "
+            f"segments={stats['transcribe']['items']}, chunks={count}"
+        )
+
+        return {
+            "message": "Audio/Video processed successfully",
+            "segments": stats["transcribe"]["items"],
+            "chunks": count,
+            "pipeline": stats,
+        }
+
+    logger.warning(
+        f"Unsupported file type {file.file_type} for file {file.id}"
+    )
+
+    raise BadRequestError("Unsupported file type")
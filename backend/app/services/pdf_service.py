@@ -1,57 +1,199 @@
+import multiprocessing
+import os
+import threading
+import time
+from collections import deque
+from concurrent.futures import ProcessPoolExecutor
+
 from pypdf import PdfReader
 from pdf2image import convert_from_path
 import pytesseract
 
 from fastapi import HTTPException
 from app.utils.logger import logger
+from app.utils.metrics import PDF_PAGE_SECONDS
 
+PDF_WORKERS = int(os.getenv("PDF_WORKERS", os.cpu_count() or 1))
+# Pages rasterized per OCR task, bounds peak memory to ~PDF_WORKERS * OCR_BATCH_PAGES pages
+OCR_BATCH_PAGES = int(os.getenv("OCR_BATCH_PAGES", 2))
+OCR_DPI = int(os.getenv("OCR_DPI", 200))
+# Pages per native extraction task; small PDFs are extracted in-process
+NATIVE_BATCH_PAGES = int(os.getenv("NATIVE_BATCH_PAGES", 50))
+# Pages with fewer native characters than this are OCRed
+MIN_NATIVE_CHARS = int(os.getenv("MIN_NATIVE_CHARS", 20))
+
+_pool = None
+_pool_lock = threading.Lock()
+
+
+def _get_pool() -> ProcessPoolExecutor:
+    global _pool
+
+    with _pool_lock:
+        if _pool is None:
+            # spawn: forking a process that runs worker threads is unsafe
+            _pool = ProcessPoolExecutor(
+                max_workers=PDF_WORKERS,
+                mp_context=multiprocessing.get_context("spawn"),
+            )
+        return _pool
 
-def extract_text_from_pdf(file_path: str) -> str:
-    logger.info(f"Extracting text from PDF {file_path}")
 
-    # Native PDF extraction
+def _page_ranges(page_count: int, batch_size: int):
+    return [
+        (first, min(first + batch_size - 1, page_count))
+        for first in range(1, page_count + 1, batch_size)
+    ]
+
+
+def _extract_native_range(file_path: str, first_page: int, last_page: int) -> list[str]:
     reader = PdfReader(file_path)
-    text_parts = []
+    return [
+        reader.pages[i].extract_text() or ""
+        for i in range(first_page - 1, last_page)
+    ]
 
-    for page in reader.pages:
-        page_text = page.extract_text()
-        if page_text:
-            text_parts.append(page_text)
 
-    extracted_text = "\n".join(text_parts).strip()
+def _ocr_range(file_path: str, first_page: int, last_page: int) -> list[str]:
+    images = convert_from_path(
+        file_path,
+        dpi=OCR_DPI,
+        first_page=first_page,
+        last_page=last_page,
+    )
+    return [pytesseract.image_to_string(image) for image in images]
 
-    if extracted_text:
-        logger.info(
-            f"PDF text extraction completed (native), length={len(extracted_text)}"
+
+# Run fn over a page range, timed where it runs (possibly a pool worker)
+def _timed_range(fn, file_path: str, first_page: int, last_page: int) -> tuple[list[str], float]:
+    started = time.perf_counter()
+    texts = fn(file_path, first_page, last_page)
+    return texts, time.perf_counter() - started
+
+
+def _observe_pages(method: str, texts: list[str], seconds: float) -> list[str]:
+    for _ in texts:
+        PDF_PAGE_SECONDS.labels(method).observe(seconds / len(texts))
+    return texts
+
+
+# Run fn over page ranges in the process pool, results come back in page order
+def _map_page_ranges(fn, file_path: str, ranges: list[tuple[int, int]], method: str = "native") -> list[str]:
+    if len(ranges) == 1 or PDF_WORKERS <= 1:
+        return [
+            text
+            for first, last in ranges
+            for text in _observe_pages(method, *_timed_range(fn, file_path, first, last))
+        ]
+
+    pool = _get_pool()
+    futures = [pool.submit(_timed_range, fn, file_path, first, last) for first, last in ranges]
+
+    return [text for future in futures for text in _observe_pages(method, *future.result())]
+
+
+# Group page numbers into contiguous runs of at most batch_size pages
+def _contiguous_ranges(pages: list[int], batch_size: int) -> list[tuple[int, int]]:
+    ranges = []
+
+    for page in pages:
+        if ranges and ranges[-1][1] == page - 1 and page - ranges[-1][0] < batch_size:
+            ranges[-1] = (ranges[-1][0], page)
+        else:
+            ranges.append((page, page))
+
+    return ranges
+
+
+# Native results of each page range in order, keeping at most PDF_WORKERS
+# ranges in flight so a slow consumer does not pile up extracted text
+def _iter_native_ranges(file_path: str, ranges: list[tuple[int, int]]):
+    if len(ranges) == 1 or PDF_WORKERS <= 1:
+        for first, last in ranges:
+            yield first, _observe_pages(
+                "native", *_timed_range(_extract_native_range, file_path, first, last)
+            )
+        return
+
+    pool = _get_pool()
+    pending = deque()
+
+    for first, last in ranges:
+        pending.append(
+            (first, pool.submit(_timed_range, _extract_native_range, file_path, first, last))
         )
-        return extracted_text
 
-    # OCR fallback
-    logger.warning(
-        f"No native text found in PDF {file_path}, falling back to OCR"
-    )
+        if len(pending) >= PDF_WORKERS:
+            first_page, future = pending.popleft()
+            yield first_page, _observe_pages("native", *future.result())
 
-    ocr_text_parts = []
+    while pending:
+        first_page, future = pending.popleft()
+        yield first_page, _observe_pages("native", *future.result())
+
+
+# OCR the pages of one range that have too little native text, in place
+def _ocr_short_pages(file_path: str, pages: dict):
+    ocr_pages = [
+        page_number for page_number, text in pages.items()
+        if len(text) < MIN_NATIVE_CHARS
+    ]
+
+    if not ocr_pages:
+        return 0
 
     try:
-        images = convert_from_path(file_path)
+        ocr_texts = _map_page_ranges(
+            _ocr_range,
+            file_path,
+            _contiguous_ranges(ocr_pages, OCR_BATCH_PAGES),
+            method="ocr",
+        )
 
-        for image in images:
-            page_text = pytesseract.image_to_string(image)
-            if page_text.strip():
-                ocr_text_parts.append(page_text)
+        for page_number, text in zip(ocr_pages, ocr_texts):
+            if len(text.strip()) > len(pages[page_number]):
+                pages[page_number] = text.strip()
 
     except Exception as e:
-        logger.error(f"OCR failed for PDF {file_path}: {str(e)}")
+        logger.error(f"OCR failed for pages {ocr_pages} of PDF {file_path}: {str(e)}")
+
+    return len(ocr_pages)
+
+
+# Stream (page_number, text) records in page order, one native batch at a
+# time, so callers can chunk and embed while later pages are extracted
+def iter_pages_from_pdf(file_path: str, on_progress=None):
+    logger.info(f"Extracting text from PDF {file_path}")
+
+    page_count = len(PdfReader(file_path).pages)
+    yielded = 0
+    ocr_count = 0
+
+    for first_page, native_texts in _iter_native_ranges(
+        file_path, _page_ranges(page_count, NATIVE_BATCH_PAGES)
+    ):
+        pages = {
+            page_number: text.strip()
+            for page_number, text in enumerate(native_texts, start=first_page)
+        }
+
+        # OCR only the pages without enough native text (scans, image-only pages)
+        ocr_count += _ocr_short_pages(file_path, pages)
+
+        for page_number, text in sorted(pages.items()):
+            if text:
+                yielded += 1
+                yield page_number, text
+
+        if on_progress:
+            on_progress((first_page + len(native_texts) - 1) / page_count)
 
-    final_text = "\n".join(ocr_text_parts).strip()
-    
     # Clean Fall
-    if final_text:
+    if yielded:
         logger.info(
-            f"PDF OCR extraction completed, length={len(final_text)}"
+            f"PDF text extraction completed, pages={yielded}/{page_count}, ocr_pages={ocr_count}"
         )
-        return final_text
+        return
 
     logger.error(
         f"PDF contains no readable content: {file_path}"
@@ -61,3 +203,7 @@ def extract_text_from_pdf(file_path: str) -> str:
         status_code=422,
         detail="This PDF contains no readable content",
     )
+
+
+def extract_pages_from_pdf(file_path: str) -> list[tuple[int, str]]:
+    return list(iter_pages_from_pdf(file_path))
@@ -0,0 +1,217 @@
+import asyncio
+import os
+import re
+
+import numpy as np
+from sqlalchemy import select, text
+
+from app.db.models.chunk import Chunk
+from app.services.embedding_service import aembed_texts, from_blob
+from app.services.fusion import HYBRID_CANDIDATES, HYBRID_SEARCH, reciprocal_rank_fusion
+from app.utils.logger import logger
+
+# chunks.embedding_vec is managed here with raw SQL rather than on the Chunk
+# model, so databases without the pgvector extension keep working
+PGVECTOR_DIM = int(os.getenv("PGVECTOR_DIM", 1536))
+# hnsw or ivfflat
+PGVECTOR_INDEX = os.getenv("PGVECTOR_INDEX", "hnsw").lower()
+PGVECTOR_HNSW_M = int(os.getenv("PGVECTOR_HNSW_M", 16))
+PGVECTOR_HNSW_EF_CONSTRUCTION = int(os.getenv("PGVECTOR_HNSW_EF_CONSTRUCTION", 64))
+PGVECTOR_IVF_LISTS = int(os.getenv("PGVECTOR_IVF_LISTS", 100))
+
+PGVECTOR_EF_SEARCH = int(os.getenv("PGVECTOR_EF_SEARCH", 64))
+PGVECTOR_PROBES = int(os.getenv("PGVECTOR_PROBES", 10))
+# Keep scanning the ANN index until k rows pass the file filter; the setting
+# only exists from pgvector 0.8, "auto" enables it when the extension has it
+PGVECTOR_ITERATIVE_SCAN = os.getenv("PGVECTOR_ITERATIVE_SCAN", "auto").lower()
+ITERATIVE_SCAN_MIN_VERSION = (0, 8)
+
+INDEX_NAME = "chunks_embedding_vec_idx"
+TEXT_INDEX_NAME = "chunks_text_tsv_idx"
+
+# Full-text expression used by the lexical side of hybrid search; the
+# 'simple' config keeps identifiers and part numbers unstemmed
+TSVECTOR_SQL = "to_tsvector('simple', chunks.text)"
+TSQUERY_SQL = "plainto_tsquery('simple', :question)"
+
+EXTENSION_VERSION_SQL = "SELECT extversion FROM pg_extension WHERE extname = 'vector'"
+
+
+# "0.8.0" -> (0, 8, 0); None when the extension is not installed
+def parse_version(version: str | None) -> tuple | None:
+    if not version:
+        return None
+
+    return tuple(int(part) for part in re.findall(r"\d+", version))
+
+
+def supports_iterative_scan(version: str | None) -> bool:
+    parsed = parse_version(version)
+    return parsed is not None and parsed >= ITERATIVE_SCAN_MIN_VERSION
+
+# pgvector text input format: [0.1,0.2,...]
+def to_vector_literal(embedding) -> str:
+    values = np.asarray(embedding, dtype=np.float32).ravel()
+    return "[" + ",".join(f"{v:.8g}" for v in values) + "]"
+
+# Enable the extension, add the vector column and build the ANN index
+def setup_pgvector(engine, dim: int = PGVECTOR_DIM, index: str = PGVECTOR_INDEX):
+    if index == "hnsw":
+        index_sql = (
+            f"USING hnsw (embedding_vec vector_cosine_ops) "
+            f"WITH (m = {PGVECTOR_HNSW_M}, ef_construction = {PGVECTOR_HNSW_EF_CONSTRUCTION})"
+        )
+    elif index == "ivfflat":
+        index_sql = (
+            f"USING ivfflat (embedding_vec vector_cosine_ops) "
+            f"WITH (lists = {PGVECTOR_IVF_LISTS})"
+        )
+    else:
+        raise ValueError(f"Unknown pgvector index type: {index}")
+
+    logger.info(f"Setting up pgvector column (dim={dim}) with {index} index")
+
+    with engine.begin() as conn:
+        conn.execute(text("CREATE EXTENSION IF NOT EXISTS vector"))
+
+        version = conn.execute(text(EXTENSION_VERSION_SQL)).scalar()
+        logger.info(f"pgvector extension version {version}")
+
+        if PGVECTOR_ITERATIVE_SCAN == "true" and not supports_iterative_scan(version):
+            logger.warning(
+                f"PGVECTOR_ITERATIVE_SCAN=true needs pgvector >= 0.8, found {version}; "
+                "filtered searches will fail, use auto or false"
+            )
+
+        conn.execute(
+            text(f"ALTER TABLE chunks ADD COLUMN IF NOT EXISTS embedding_vec vector({dim})")
+        )
+        conn.execute(
+            text("CREATE INDEX IF NOT EXISTS chunks_file_id_idx ON chunks (file_id)")
+        )
+        conn.execute(text(f"CREATE INDEX IF NOT EXISTS {INDEX_NAME} ON chunks {index_sql}"))
+        conn.execute(
+            text(
+                f"CREATE INDEX IF NOT EXISTS {TEXT_INDEX_NAME} ON chunks "
+                "USING gin (to_tsvector('simple', text))"
+            )
+        )
+
+    logger.info("pgvector setup completed")
+
+# Copy the stored float32 embeddings of a file's chunks into embedding_vec
+def write_chunk_vectors(db, file_id) -> int:
+    rows = db.execute(
+        select(Chunk.id, Chunk.embedding).where(
+            Chunk.file_id == file_id,
+            Chunk.embedding.is_not(None),
+        )
+    ).all()
+
+    if rows:
+        db.execute(
+            text("UPDATE chunks SET embedding_vec = CAST(CAST(:vec AS text) AS vector) WHERE id = :id"),
+            [
+                {"id": row.id, "vec": to_vector_literal(from_blob(row.embedding))}
+                for row in rows
+            ],
+        )
+        db.commit()
+
+    logger.info(f"Wrote {len(rows)} pgvector embeddings for file {file_id}")
+
+    return len(rows)
+
+
+class PgVectorRetriever:
+    def __init__(self):
+        # Whether the installed extension has iterative scans, checked once
+        self._iterative_scan = None
+
+    async def _use_iterative_scan(self, db) -> bool:
+        if PGVECTOR_ITERATIVE_SCAN != "auto":
+            return PGVECTOR_ITERATIVE_SCAN == "true"
+
+        if self._iterative_scan is None:
+            version = await db.scalar(text(EXTENSION_VERSION_SQL))
+            self._iterative_scan = supports_iterative_scan(version)
+
+            logger.info(
+                f"pgvector {version}: iterative index scans "
+                f"{'enabled' if self._iterative_scan else 'unavailable'}"
+            )
+
+        return self._iterative_scan
+
+    async def _search_vector(self, db, file_ids: list, query_embedding, k: int) -> list:
+        await db.execute(text(f"SET LOCAL hnsw.ef_search = {PGVECTOR_EF_SEARCH}"))
+        await db.execute(text(f"SET LOCAL ivfflat.probes = {PGVECTOR_PROBES}"))
+
+        if await self._use_iterative_scan(db):
+            await db.execute(text("SET LOCAL hnsw.iterative_scan = strict_order"))
+            await db.execute(text("SET LOCAL ivfflat.iterative_scan = relaxed_order"))
+
+        # k-NN and the file filter in one query
+        result = await db.execute(
+            select(Chunk)
+            .where(
+                Chunk.file_id.in_(file_ids),
+                text("chunks.embedding_vec IS NOT NULL"),
+            )
+            .order_by(text("chunks.embedding_vec <=> CAST(CAST(:query AS text) AS vector)"))
+            .limit(k),
+            {"query": to_vector_literal(query_embedding)},
+        )
+
+        return result.scalars().all()
+
+    async def _search_lexical(self, db, file_ids: list, question: str, k: int) -> list:
+        result = await db.execute(
+            select(Chunk)
+            .where(
+                Chunk.file_id.in_(file_ids),
+                text(f"{TSVECTOR_SQL} @@ {TSQUERY_SQL}"),
+            )
+            .order_by(text(f"ts_rank_cd({TSVECTOR_SQL}, {TSQUERY_SQL}) DESC"))
+            .limit(k),
+            {"question": question},
+        )
+
+        return result.scalars().all()
+
+    # Returns chunks best first, or None when none of the files have vectors yet
+    async def retrieve(self, db, file_ids: list, question: str, k: int = 5):
+        candidates = max(k, HYBRID_CANDIDATES) if HYBRID_SEARCH else k
+
+        # Embed the question while the full-text query runs
+        embedding = asyncio.create_task(aembed_texts([question]))
+
+        try:
+            lexical = []
+
+            if HYBRID_SEARCH:
+                lexical = await self._search_lexical(db, file_ids, question, candidates)
+
+            query_embedding = (await embedding)[0]
+        finally:
+            embedding.cancel()
+
+        vector = await self._search_vector(db, file_ids, query_embedding, candidates)
+
+        if not vector:
+            return None
+
+        by_id = {c.id: c for c in [*vector, *lexical]}
+        chunk_ids = reciprocal_rank_fusion([
+            [c.id for c in vector],
+            [c.id for c in lexical],
+        ])[:k]
+
+        logger.info(
+            f"pgvector search fused {len(vector)} vector and {len(lexical)} full-text hits"
+        )
+
+        return [by_id[chunk_id] for chunk_id in chunk_ids]
+
+    def index_file(self, db, file_id):
+        write_chunk_vectors(db, file_id)
@@ -0,0 +1,169 @@
+import os
+import queue
+import threading
+import time
+from dataclasses import dataclass
+
+from app.utils.logger import logger
+
+# Items buffered between two stages; a full queue blocks the upstream stage
+PIPELINE_QUEUE_SIZE = int(os.getenv("PIPELINE_QUEUE_SIZE", 512))
+# Chunks embedded per request by the ingestion pipeline; stored chunks are
+# written in CHUNK_WRITE_BATCH batches within one transaction (chunk_writer)
+PIPELINE_BATCH_SIZE = int(os.getenv("PIPELINE_BATCH_SIZE", 256))
+
+_DONE = object()
+
+
+class PipelineStopped(Exception):
+    pass
+
+
+@dataclass
+class StageStats:
+    name: str
+    items: int = 0
+    # Seconds spent working, excluding waits on the neighbouring queues
+    busy: float = 0.0
+
+    def to_dict(self) -> dict:
+        return {
+            "items": self.items,
+            "busy_seconds": round(self.busy, 3),
+            "items_per_second": round(self.items / self.busy, 2) if self.busy else None,
+        }
+
+
+class _Channel:
+    """Bounded queue between two stages that gives up once the pipeline stops."""
+
+    def __init__(self, maxsize: int, stop: threading.Event):
+        self.queue = queue.Queue(maxsize=maxsize)
+        self.stop = stop
+
+    def put(self, item):
+        while not self.stop.is_set():
+            try:
+                self.queue.put(item, timeout=0.1)
+                return
+            except queue.Full:
+                continue
+        raise PipelineStopped()
+
+    def __iter__(self):
+        while True:
+            try:
+                item = self.queue.get(timeout=0.1)
+            except queue.Empty:
+                if self.stop.is_set():
+                    raise PipelineStopped()
+                continue
+
+            if item is _DONE:
+                return
+
+            yield item
+
+
+# Group an iterable into lists of at most size items
+def batched(items, size: int):
+    batch = []
+
+    for item in items:
+        batch.append(item)
+
+        if len(batch) >= size:
+            yield batch
+            batch = []
+
+    if batch:
+        yield batch
+
+
+class _TimedIterator:
+    """Counts the time a stage spends waiting on its input."""
+
+    def __init__(self, iterable):
+        self.iterator = iter(iterable)
+        self.waited = 0.0
+
+    def __iter__(self):
+        return self
+
+    def __next__(self):
+        started = time.perf_counter()
+        try:
+            return next(self.iterator)
+        finally:
+            self.waited += time.perf_counter() - started
+
+
+# Run source -> stage -> ... -> stage with each step in its own thread,
+# connected by bounded queues. The source is (name, iterable); a stage is
+# (name, fn) where fn takes an iterator of inputs and yields outputs, so it
+# may batch or regroup items. The output of the last stage is discarded.
+# Returns per-stage stats; the first stage error is re-raised after all
+# threads have stopped.
+def run_pipeline(source: tuple, stages: list, maxsize: int = PIPELINE_QUEUE_SIZE) -> list[StageStats]:
+    stop = threading.Event()
+    errors = []
+
+    source_name, source_items = source
+    steps = [(source_name, lambda _: source_items)] + list(stages)
+    channels = [_Channel(maxsize, stop) for _ in steps]
+    stats = [StageStats(name) for name, _ in steps]
+
+    def run(index: int):
+        name, fn = steps[index]
+        inputs = _TimedIterator(channels[index - 1] if index else ())
+        output = channels[index] if index < len(steps) - 1 else None
+        waited_output = 0.0
+        started = time.perf_counter()
+
+        try:
+            for item in fn(inputs):
+                stats[index].items += 1
+
+                if output is not None:
+                    put_started = time.perf_counter()
+                    output.put(item)
+                    waited_output += time.perf_counter() - put_started
+
+            if output is not None:
+                output.put(_DONE)
+
+        except PipelineStopped:
+            pass
+
+        except Exception as e:
+            logger.error(f"Pipeline stage {name} failed", exc_info=True)
+            errors.append(e)
+            stop.set()
+
+        finally:
+            stats[index].busy = (
+                time.perf_counter() - started - inputs.waited - waited_output
+            )
+
+    threads = [
+        threading.Thread(target=run, args=(i,), name=f"pipeline-{name}", daemon=True)
+        for i, (name, _) in enumerate(steps)
+    ]
+
+    for thread in threads:
+        thread.start()
+
+    for thread in threads:
+        thread.join()
+
+    if errors:
+        raise errors[0]
+
+    logger.info(
+        "Pipeline finished: "
+        + ", ".join(
+            f"{s.name}={s.items} items/{s.busy:.2f}s" for s in stats
+        )
+    )
+
+    return stats
@@ -1,13 +1,58 @@
+import asyncio
+import time
+
+import numpy as np
+from sqlalchemy import select, update
+from sqlalchemy.orm import load_only
+
 from app.db.models.chunk import Chunk
-from app.services.vector_store import VectorStore
-from app.services.embedding_service import embed_texts
+from app.services.bm25_index import BM25Index
+from app.services.vector_store import VectorStore, choose_index_kind
+from app.services.index_cache import index_cache
+from app.services.index_store import (
+    delete_index,
+    index_version,
+    lexical_index_version,
+    load_index_from_disk,
+    load_lexical_index_from_disk,
+    save_index,
+    save_lexical_index,
+)
+from app.services.embedding_service import aembed_texts, embed_texts, to_blob, from_blob
 from app.utils.logger import logger
+from app.utils.metrics import INDEX_LOAD_SECONDS, record_cache
 
-def load_index(db, file_id):
-    logger.info(f"Loading vector index for file {file_id}")
+# Embed chunks that predate stored embeddings and persist the vectors
+def backfill_chunk_embeddings(db, chunks):
+    if not chunks:
+        return
+
+    logger.info(f"Backfilling embeddings for {len(chunks)} chunks")
+
+    embeddings = embed_texts([c.text for c in chunks])
+
+    for chunk, embedding in zip(chunks, embeddings):
+        chunk.embedding = to_blob(embedding)
+
+    db.commit()
+
+def vector_store_from_blobs(file_id, ids, blobs):
+    embeddings = np.vstack([from_blob(blob) for blob in blobs])
+
+    kind = choose_index_kind(len(ids))
+
+    vector_store = VectorStore(dim=embeddings.shape[1], kind=kind, n=len(ids))
+    vector_store.add(embeddings, ids)
+
+    logger.info(f"Vector index ({kind}) created for file {file_id}")
 
+    return vector_store
+
+# Build a fresh index from the chunk embeddings stored in the DB
+def build_index(db, file_id):
     chunks = (
         db.query(Chunk)
+        .options(load_only(Chunk.id, Chunk.embedding))
         .filter(Chunk.file_id == file_id)
         .all()
     )
@@ -16,16 +61,266 @@ def load_index(db, file_id):
         logger.warning(f"No chunks found for file {file_id}")
         return None
 
-    texts = [c.text for c in chunks]
-    ids = [c.id for c in chunks]
+    missing = [c for c in chunks if c.embedding is None]
+
+    if missing:
+        logger.warning(
+            f"{len(missing)} chunks of file {file_id} have no stored embedding"
+        )
+        backfill_chunk_embeddings(db, missing)
 
-    logger.info(f"Embedding {len(texts)} chunks")
+    return vector_store_from_blobs(
+        file_id,
+        [c.id for c in chunks],
+        [c.embedding for c in chunks],
+    )
 
-    embeddings = embed_texts(texts)
+# BM25 indexes share the index cache under their own key
+def _lexical_key(file_id) -> str:
+    return f"{file_id}.bm25"
 
-    vector_store = VectorStore(dim=len(embeddings[0]))
-    vector_store.add(embeddings, ids)
+def build_lexical_index(db, file_id):
+    rows = db.execute(
+        select(Chunk.id, Chunk.text).where(Chunk.file_id == file_id)
+    ).all()
+
+    if not rows:
+        return None
+
+    return BM25Index.build([row.id for row in rows], [row.text for row in rows])
+
+# Rebuild and persist the indexes after a file's chunks were rewritten
+def rebuild_index(db, file_id):
+    index_cache.invalidate(file_id)
+    index_cache.invalidate(_lexical_key(file_id))
+    delete_index(file_id)
+
+    vector_store = build_index(db, file_id)
+
+    if vector_store is not None:
+        save_index(file_id, vector_store)
+        index_cache.put(file_id, vector_store)
+
+    lexical_index = build_lexical_index(db, file_id)
 
-    logger.info(f"Vector index created for file {file_id}")
+    if lexical_index is not None:
+        save_lexical_index(file_id, lexical_index)
+        index_cache.put(_lexical_key(file_id), lexical_index)
 
     return vector_store
+
+# Async variant of build_index for the request path
+async def abuild_index(db, file_id):
+    result = await db.execute(
+        select(Chunk.id, Chunk.embedding).where(Chunk.file_id == file_id)
+    )
+    rows = result.all()
+
+    if not rows:
+        logger.warning(f"No chunks found for file {file_id}")
+        return None
+
+    blobs = {row.id: row.embedding for row in rows}
+    missing = [chunk_id for chunk_id, blob in blobs.items() if blob is None]
+
+    if missing:
+        logger.warning(
+            f"{len(missing)} chunks of file {file_id} have no stored embedding"
+        )
+
+        result = await db.execute(
+            select(Chunk.id, Chunk.text).where(Chunk.id.in_(missing))
+        )
+        texts = result.all()
+        embeddings = await aembed_texts([row.text for row in texts])
+
+        for row, embedding in zip(texts, embeddings):
+            blobs[row.id] = to_blob(embedding)
+
+        await db.execute(
+            update(Chunk),
+            [{"id": row.id, "embedding": blobs[row.id]} for row in texts],
+        )
+        await db.commit()
+
+    ids = list(blobs)
+
+    return await asyncio.to_thread(
+        vector_store_from_blobs, file_id, ids, [blobs[i] for i in ids]
+    )
+
+# Cached index for the file if it is still current, else None
+def cached_index(file_id):
+    vector_store = index_cache.get(file_id)
+
+    if vector_store is None:
+        return None
+
+    # Another worker may have reprocessed the file since we cached it
+    if vector_store.version == index_version(file_id):
+        return vector_store
+
+    index_cache.invalidate(file_id)
+
+    return None
+
+# Cached or on-disk index without touching the DB (blocking, run in a
+# thread: checking the cached version reads the index pointer file)
+def load_local_index(file_id):
+    started = time.perf_counter()
+    vector_store = cached_index(file_id)
+
+    if vector_store is not None:
+        record_cache("index", 1, 0)
+        INDEX_LOAD_SECONDS.labels("memory").observe(time.perf_counter() - started)
+        return vector_store
+
+    record_cache("index", 0, 1)
+    logger.info(f"Loading vector index for file {file_id}")
+
+    vector_store = load_index_from_disk(file_id)
+
+    if vector_store is not None:
+        index_cache.put(file_id, vector_store)
+        INDEX_LOAD_SECONDS.labels("disk").observe(time.perf_counter() - started)
+
+    return vector_store
+
+async def load_index(db, file_id):
+    vector_store = await asyncio.to_thread(load_local_index, file_id)
+
+    if vector_store is not None:
+        return vector_store
+
+    return await restore_index(db, file_id)
+
+# Build the index from the DB, persist and cache it; for files with no
+# local index yet
+async def restore_index(db, file_id):
+    started = time.perf_counter()
+    vector_store = await abuild_index(db, file_id)
+
+    if vector_store is None:
+        return None
+
+    await asyncio.to_thread(save_index, file_id, vector_store)
+    index_cache.put(file_id, vector_store)
+
+    INDEX_LOAD_SECONDS.labels("rebuild").observe(time.perf_counter() - started)
+
+    return vector_store
+
+def _save_restored_index(file_id, ids, blobs):
+    vector_store = vector_store_from_blobs(file_id, ids, blobs)
+    save_index(file_id, vector_store)
+    index_cache.put(file_id, vector_store)
+
+    return vector_store
+
+# restore_index for many files with one chunk query; the indexes are built
+# in parallel threads. Returns {file_id: VectorStore} for files with chunks
+async def restore_indexes(db, file_ids: list) -> dict:
+    result = await db.execute(
+        select(Chunk.file_id, Chunk.id, Chunk.embedding).where(Chunk.file_id.in_(file_ids))
+    )
+
+    by_file = {}
+    for row in result.all():
+        by_file.setdefault(row.file_id, []).append(row)
+
+    # Chunks without stored embeddings are backfilled one file at a time
+    stale = [file_id for file_id, rows in by_file.items() if any(r.embedding is None for r in rows)]
+    ready = [file_id for file_id in by_file if file_id not in stale]
+
+    built = await asyncio.gather(
+        *(
+            asyncio.to_thread(
+                _save_restored_index,
+                file_id,
+                [r.id for r in by_file[file_id]],
+                [r.embedding for r in by_file[file_id]],
+            )
+            for file_id in ready
+        )
+    )
+    shards = dict(zip(ready, built))
+
+    for file_id in stale:
+        shards[file_id] = await restore_index(db, file_id)
+
+    return {file_id: shard for file_id, shard in shards.items() if shard is not None}
+
+# Cached or on-disk BM25 index (blocking, run in a thread)
+def load_local_lexical_index(file_id):
+    key = _lexical_key(file_id)
+    lexical_index = index_cache.get(key)
+
+    if lexical_index is not None:
+        if lexical_index.version == lexical_index_version(file_id):
+            return lexical_index
+        index_cache.invalidate(key)
+
+    lexical_index = load_lexical_index_from_disk(file_id)
+
+    if lexical_index is not None:
+        index_cache.put(key, lexical_index)
+
+    return lexical_index
+
+async def load_lexical_index(db, file_id):
+    lexical_index = await asyncio.to_thread(load_local_lexical_index, file_id)
+
+    if lexical_index is not None:
+        return lexical_index
+
+    return await restore_lexical_index(db, file_id)
+
+# Files indexed before BM25 existed are built from the chunk texts
+async def restore_lexical_index(db, file_id):
+    result = await db.execute(
+        select(Chunk.id, Chunk.text).where(Chunk.file_id == file_id)
+    )
+    rows = result.all()
+
+    if not rows:
+        return None
+
+    lexical_index = await asyncio.to_thread(
+        BM25Index.build, [row.id for row in rows], [row.text for row in rows]
+    )
+
+    await asyncio.to_thread(save_lexical_index, file_id, lexical_index)
+    index_cache.put(_lexical_key(file_id), lexical_index)
+
+    return lexical_index
+
+def _save_restored_lexical_index(file_id, ids, texts):
+    lexical_index = BM25Index.build(ids, texts)
+    save_lexical_index(file_id, lexical_index)
+    index_cache.put(_lexical_key(file_id), lexical_index)
+
+    return lexical_index
+
+# restore_lexical_index for many files with one chunk query
+async def restore_lexical_indexes(db, file_ids: list) -> dict:
+    result = await db.execute(
+        select(Chunk.file_id, Chunk.id, Chunk.text).where(Chunk.file_id.in_(file_ids))
+    )
+
+    by_file = {}
+    for row in result.all():
+        by_file.setdefault(row.file_id, []).append(row)
+
+    built = await asyncio.gather(
+        *(
+            asyncio.to_thread(
+                _save_restored_lexical_index,
+                file_id,
+                [r.id for r in rows],
+                [r.text for r in rows],
+            )
+            for file_id, rows in by_file.items()
+        )
+    )
+
+    return dict(zip(by_file, built))
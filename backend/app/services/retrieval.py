@@ -0,0 +1,174 @@
+import asyncio
+import heapq
+import os
+
+from sqlalchemy import select
+
+from app.db.models.chunk import Chunk
+from app.services.embedding_service import aembed_texts
+from app.services.fusion import HYBRID_CANDIDATES, HYBRID_SEARCH, reciprocal_rank_fusion
+from app.services.pgvector_store import PgVectorRetriever
+from app.services.rag_loader import (
+    load_local_index,
+    load_local_lexical_index,
+    rebuild_index,
+    restore_indexes,
+    restore_lexical_indexes,
+)
+from app.utils.logger import logger
+
+# faiss: per-file FAISS shards searched in-process; pgvector: k-NN in Postgres
+RETRIEVAL_BACKEND = os.getenv("RETRIEVAL_BACKEND", "faiss").lower()
+
+# Per-file shards handled by one thread task when fanning out a search
+RETRIEVAL_SHARD_BATCH = int(os.getenv("RETRIEVAL_SHARD_BATCH", 64))
+
+
+def _batches(items: list, size: int):
+    return [items[i:i + size] for i in range(0, len(items), size)]
+
+
+def _load_local_batch(load_local, file_ids: list) -> list:
+    return [load_local(file_id) for file_id in file_ids]
+
+
+def _search_batch(shards: list, query_embedding, k: int) -> list:
+    results = []
+
+    for file_id, vector_store in shards:
+        for distance, chunk_id in vector_store.search_with_scores(query_embedding, k):
+            results.append((distance, chunk_id, file_id))
+
+    return results
+
+async def _load_shards(db, file_ids: list, load_local, restore_many) -> dict:
+    loaded = await asyncio.gather(
+        *(
+            asyncio.to_thread(_load_local_batch, load_local, batch)
+            for batch in _batches(file_ids, RETRIEVAL_SHARD_BATCH)
+        )
+    )
+
+    shards = {
+        file_id: shard
+        for file_id, shard in zip(file_ids, (s for batch in loaded for s in batch))
+        if shard is not None
+    }
+
+    # Files never indexed on this host are built from the DB, one chunk query
+    # per batch of files (the session does not support concurrent queries)
+    missing = [file_id for file_id in file_ids if file_id not in shards]
+
+    if missing:
+        logger.info(f"Building {len(missing)} of {len(file_ids)} shards from the DB")
+
+    for batch in _batches(missing, RETRIEVAL_SHARD_BATCH):
+        shards.update(await restore_many(db, batch))
+
+    return shards
+
+# Load the index shard of every file, returns {file_id: VectorStore}; files
+# with no chunks yet are left out
+async def load_shards(db, file_ids: list) -> dict:
+    return await _load_shards(db, file_ids, load_local_index, restore_indexes)
+
+# Same for the per-file BM25 indexes, returns {file_id: BM25Index}
+async def load_lexical_shards(db, file_ids: list) -> dict:
+    return await _load_shards(db, file_ids, load_local_lexical_index, restore_lexical_indexes)
+
+# Fan the query out over all shards in worker threads (FAISS releases the
+# GIL; the event loop never searches) and merge the global top-k,
+# returns [(distance, chunk_id, file_id)] closest first
+async def search_shards(shards: dict, query_embedding, k: int = 5) -> list:
+    items = list(shards.items())
+
+    partials = await asyncio.gather(
+        *(
+            asyncio.to_thread(_search_batch, batch, query_embedding, k)
+            for batch in _batches(items, RETRIEVAL_SHARD_BATCH)
+        )
+    )
+    results = [hit for partial in partials for hit in partial]
+
+    top = heapq.nsmallest(k, results, key=lambda hit: hit[0])
+
+    logger.info(
+        f"Searched {len(items)} shards, merged {len(results)} hits into top {len(top)}"
+    )
+
+    return top
+
+# BM25 over the per-file lexical shards, returns [(score, chunk_id)] best first
+def search_lexical_shards(shards: dict, question: str, k: int = 5) -> list:
+    results = [
+        hit
+        for lexical_index in shards.values()
+        for hit in lexical_index.search(question, k)
+    ]
+
+    return heapq.nlargest(k, results, key=lambda hit: hit[0])
+
+
+class FaissRetriever:
+    # Vector search over the per-file shards fused with BM25, then fetch the
+    # winning chunks; returns chunks best first, or None when none of the
+    # files are indexed yet
+    async def retrieve(self, db, file_ids: list, question: str, k: int = 5):
+        candidates = max(k, HYBRID_CANDIDATES) if HYBRID_SEARCH else k
+
+        # Embed the question while the shards load and BM25 runs
+        embedding = asyncio.create_task(aembed_texts([question]))
+
+        try:
+            shards = await load_shards(db, file_ids)
+
+            if not shards:
+                return None
+
+            lexical_hits = []
+
+            if HYBRID_SEARCH:
+                lexical_shards = await load_lexical_shards(db, list(shards))
+                lexical_hits = search_lexical_shards(lexical_shards, question, candidates)
+
+            query_embedding = (await embedding)[0]
+        finally:
+            embedding.cancel()
+
+        hits = await search_shards(shards, query_embedding, candidates)
+
+        chunk_ids = reciprocal_rank_fusion([
+            [chunk_id for _, chunk_id, _ in hits],
+            [chunk_id for _, chunk_id in lexical_hits],
+        ])[:k]
+
+        logger.info(
+            f"Fused {len(hits)} vector and {len(lexical_hits)} BM25 hits into top {len(chunk_ids)}"
+        )
+
+        result = await db.execute(
+            select(Chunk).where(
+                Chunk.id.in_(chunk_ids),
+                Chunk.file_id.in_(list(shards)),
+            )
+        )
+        by_id = {c.id: c for c in result.scalars().all()}
+
+        # Keep the global rank order of the merged search
+        return [by_id[chunk_id] for chunk_id in chunk_ids if chunk_id in by_id]
+
+    def index_file(self, db, file_id):
+        rebuild_index(db, file_id)
+
+
+def create_retriever(backend: str = RETRIEVAL_BACKEND):
+    if backend == "pgvector":
+        return PgVectorRetriever()
+
+    if backend == "faiss":
+        return FaissRetriever()
+
+    raise ValueError(f"Unknown retrieval backend: {backend}")
+
+
+retriever = create_retriever()
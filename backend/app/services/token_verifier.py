@@ -0,0 +1,116 @@
+import time
+from dataclasses import dataclass, field
+
+import jwt
+
+from app.errors.app_errors import UnauthorizedError
+from app.utils.logger import logger
+from app.utils.ttl_cache import TTLCache
+
+SYMMETRIC_ALGORITHMS = ["HS256"]
+ASYMMETRIC_ALGORITHMS = ["RS256", "ES256"]
+
+
+@dataclass
+class AuthUser:
+    id: str
+    email: str | None = None
+    role: str | None = None
+    claims: dict = field(default_factory=dict, repr=False)
+
+
+class TokenVerifier:
+    """
+    Verifies Supabase access tokens locally (HS256 project secret or the
+    project's JWKS) and caches validated tokens until they expire.
+    """
+
+    def __init__(
+        self,
+        jwt_secret: str | None,
+        jwks_url: str | None,
+        audience: str | None,
+        cache: TTLCache,
+        remote_get_user=None,
+    ):
+        self.jwt_secret = jwt_secret
+        self.audience = audience
+        self.cache = cache
+        self.remote_get_user = remote_get_user
+        # Signing keys are fetched once and reused until rotated
+        self.jwks_client = (
+            jwt.PyJWKClient(jwks_url, cache_keys=True, lifespan=3600)
+            if jwks_url else None
+        )
+
+    def cached_user(self, token: str) -> AuthUser | None:
+        return self.cache.get(token)
+
+    # Validate a token that is not cached yet and cache the resulting user
+    def verify(self, token: str) -> AuthUser:
+        try:
+            claims = self._decode(token)
+        except (jwt.InvalidAlgorithmError, jwt.PyJWKClientError) as e:
+            # No usable local key: only then pay for the remote round-trip
+            if self.remote_get_user is None:
+                raise UnauthorizedError("TOKEN_INVALID")
+
+            logger.debug(f"Local token verification unavailable ({e}), asking Supabase")
+            return self._verify_remote(token)
+        except jwt.ExpiredSignatureError:
+            raise UnauthorizedError("TOKEN_EXPIRED")
+        except jwt.InvalidTokenError:
+            raise UnauthorizedError("TOKEN_INVALID")
+
+        user = AuthUser(
+            id=claims["sub"],
+            email=claims.get("email"),
+            role=claims.get("role"),
+            claims=claims,
+        )
+
+        self.cache.set(token, user, ttl=claims["exp"] - time.time())
+
+        return user
+
+    def _decode(self, token: str) -> dict:
+        algorithm = jwt.get_unverified_header(token).get("alg")
+        options = {"require": ["exp", "sub"], "verify_aud": self.audience is not None}
+
+        if algorithm in SYMMETRIC_ALGORITHMS and self.jwt_secret:
+            key = self.jwt_secret
+            algorithms = SYMMETRIC_ALGORITHMS
+        elif algorithm in ASYMMETRIC_ALGORITHMS and self.jwks_client is not None:
+            key = self.jwks_client.get_signing_key_from_jwt(token).key
+            algorithms = ASYMMETRIC_ALGORITHMS
+        else:
+            raise jwt.InvalidAlgorithmError(f"No local key for algorithm {algorithm}")
+
+        return jwt.decode(
+            token,
+            key,
+            algorithms=algorithms,
+            audience=self.audience,
+            options=options,
+        )
+
+    # Fallback round-trip to Supabase when the token can't be checked locally
+    def _verify_remote(self, token: str) -> AuthUser:
+        try:
+            response = self.remote_get_user(token)
+        except Exception:
+            raise UnauthorizedError("TOKEN_EXPIRED")
+
+        if response.user is None:
+            raise UnauthorizedError("TOKEN_INVALID")
+
+        user = AuthUser(
+            id=response.user.id,
+            email=response.user.email,
+            role=response.user.role,
+        )
+
+        # Remote answers are cached for the default TTL only
+        self.cache.set(token, user)
+
+        return user
@@ -0,0 +1,190 @@
+import asyncio
+import hashlib
+import math
+import os
+from datetime import datetime, timezone
+
+from anyio import open_file
+from sqlalchemy import func, select
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.db.models.upload_session import UploadSession
+from app.errors.app_errors import BadRequestError, PayloadTooLargeError, TooManyRequestsError
+from app.utils.logger import logger
+
+UPLOAD_DIR = "storage/uploads"
+UPLOAD_MAX_BYTES = int(os.getenv("UPLOAD_MAX_BYTES", 5 * 1024**3))
+UPLOAD_PART_SIZE = int(os.getenv("UPLOAD_PART_SIZE", 8 * 1024**2))
+UPLOAD_MIN_PART_SIZE = 256 * 1024
+UPLOAD_MAX_PART_SIZE = 64 * 1024**2
+# Unfinished chunked uploads can be resumed for this long
+UPLOAD_SESSION_TTL = int(os.getenv("UPLOAD_SESSION_TTL", 24 * 3600))
+# Each session preallocates its full file, so unfinished ones are capped
+UPLOAD_MAX_ACTIVE_SESSIONS = int(os.getenv("UPLOAD_MAX_ACTIVE_SESSIONS", 5))
+# Seconds between sweeps of expired sessions and their files
+UPLOAD_SWEEP_INTERVAL = int(os.getenv("UPLOAD_SWEEP_INTERVAL", 3600))
+
+READ_CHUNK_SIZE = 1024 * 1024
+
+
+def upload_path(file_id, ext: str) -> str:
+    return os.path.join(UPLOAD_DIR, f"{file_id}.{ext}")
+
+
+def clamp_part_size(part_size: int | None) -> int:
+    return min(max(part_size or UPLOAD_PART_SIZE, UPLOAD_MIN_PART_SIZE), UPLOAD_MAX_PART_SIZE)
+
+
+def part_count(total_size: int, part_size: int) -> int:
+    return max(1, math.ceil(total_size / part_size))
+
+
+# (offset, length) of a 1-based part
+def part_range(total_size: int, part_size: int, part_number: int) -> tuple[int, int]:
+    if not 1 <= part_number <= part_count(total_size, part_size):
+        raise BadRequestError(f"Part number {part_number} is out of range")
+
+    offset = (part_number - 1) * part_size
+
+    return offset, min(part_size, total_size - offset)
+
+
+def check_size(size: int):
+    if size > UPLOAD_MAX_BYTES:
+        raise PayloadTooLargeError(
+            f"File exceeds the {UPLOAD_MAX_BYTES} byte upload limit"
+        )
+
+
+# Create the final file at full size so parts can be written in any order
+async def allocate(path: str, size: int):
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+
+    async with await open_file(path, "wb") as f:
+        await f.truncate(size)
+
+
+# Stream one part into place and return its sha256; a short or oversized
+# part is rejected and has to be sent again
+async def write_part(path: str, offset: int, length: int, chunks) -> str:
+    hasher = hashlib.sha256()
+    written = 0
+
+    async with await open_file(path, "r+b") as f:
+        await f.seek(offset)
+
+        async for chunk in chunks:
+            written += len(chunk)
+
+            if written > length:
+                raise BadRequestError(f"Part is larger than {length} bytes")
+
+            hasher.update(chunk)
+            await f.write(chunk)
+
+    if written != length:
+        raise BadRequestError(f"Part is {written} bytes, expected {length}")
+
+    return hasher.hexdigest()
+
+
+# Stream an upload to its final path, enforcing the size limit; returns
+# (size, sha256)
+async def save_stream(path: str, chunks) -> tuple[int, str]:
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+
+    hasher = hashlib.sha256()
+    size = 0
+
+    try:
+        async with await open_file(path, "wb") as f:
+            async for chunk in chunks:
+                size += len(chunk)
+                check_size(size)
+
+                hasher.update(chunk)
+                await f.write(chunk)
+    except Exception:
+        remove_upload(path)
+        raise
+
+    return size, hasher.hexdigest()
+
+
+async def file_sha256(path: str) -> str:
+    hasher = hashlib.sha256()
+
+    async with await open_file(path, "rb") as f:
+        while chunk := await f.read(READ_CHUNK_SIZE):
+            hasher.update(chunk)
+
+    return hasher.hexdigest()
+
+
+async def iter_upload_file(file):
+    while chunk := await file.read(READ_CHUNK_SIZE):
+        yield chunk
+
+
+def remove_upload(path: str):
+    try:
+        os.remove(path)
+    except FileNotFoundError:
+        pass
+    else:
+        logger.info(f"Removed upload {path}")
+
+
+async def check_active_session_limit(db: AsyncSession, user_id):
+    active = await db.scalar(
+        select(func.count())
+        .select_from(UploadSession)
+        .where(
+            UploadSession.user_id == user_id,
+            UploadSession.status == "active",
+            UploadSession.expires_at > datetime.now(timezone.utc),
+        )
+    )
+
+    if active >= UPLOAD_MAX_ACTIVE_SESSIONS:
+        raise TooManyRequestsError(
+            f"Too many unfinished uploads ({active}), complete or abort one first"
+        )
+
+
+# Mark active sessions past their expiry as expired and delete their
+# preallocated files; returns the number of sessions swept
+async def sweep_expired_sessions(db: AsyncSession) -> int:
+    result = await db.execute(
+        select(UploadSession).where(
+            UploadSession.status == "active",
+            UploadSession.expires_at <= datetime.now(timezone.utc),
+        )
+    )
+    sessions = result.scalars().all()
+
+    for session in sessions:
+        session.status = "expired"
+
+    await db.commit()
+
+    for session in sessions:
+        remove_upload(upload_path(session.file_id, session.file_type))
+
+    if sessions:
+        logger.info(f"Expired {len(sessions)} abandoned upload sessions")
+
+    return len(sessions)
+
+
+# Background loop started with the app: sweeps once at startup, then every
+# UPLOAD_SWEEP_INTERVAL seconds
+async def run_upload_sweeper(session_factory, interval: float = UPLOAD_SWEEP_INTERVAL):
+    while True:
+        try:
+            async with session_factory() as db:
+                await sweep_expired_sessions(db)
+        except Exception:
+            logger.error("Upload session sweep failed", exc_info=True)
+
+        await asyncio.sleep(interval)
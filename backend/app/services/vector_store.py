@@ -1,17 +1,137 @@
+import math
+import os
+
 import faiss
 import numpy as np
 from app.utils.logger import logger
+from app.utils.metrics import VECTOR_SEARCH_SECONDS
+
+# Index type for large shards: auto picks hnsw, or force flat/hnsw/ivfpq
+VECTOR_INDEX_KIND = os.getenv("VECTOR_INDEX_KIND", "auto").lower()
+# Shards smaller than this always use exact flat search
+ANN_MIN_VECTORS = int(os.getenv("ANN_MIN_VECTORS", 10000))
+
+HNSW_M = int(os.getenv("HNSW_M", 32))
+HNSW_EF_CONSTRUCTION = int(os.getenv("HNSW_EF_CONSTRUCTION", 80))
+HNSW_EF_SEARCH = int(os.getenv("HNSW_EF_SEARCH", 64))
+
+IVF_NPROBE = int(os.getenv("IVF_NPROBE", 16))
+IVF_PQ_M = int(os.getenv("IVF_PQ_M", 64))
+IVF_TRAIN_SAMPLE = int(os.getenv("IVF_TRAIN_SAMPLE", 50000))
+
+INDEX_KINDS = ("flat", "hnsw", "ivfpq")
+
+
+# Pick the index type for a shard of n vectors
+def choose_index_kind(n: int, kind: str = None) -> str:
+    kind = (kind or VECTOR_INDEX_KIND).lower()
+
+    if kind not in INDEX_KINDS and kind != "auto":
+        raise ValueError(f"Unknown vector index kind: {kind}")
+
+    if n < ANN_MIN_VECTORS:
+        return "flat"
+
+    return "hnsw" if kind == "auto" else kind
+
+
+def _ivf_nlist(n: int) -> int:
+    return max(1, min(int(4 * math.sqrt(n)), n // 39))
+
+
+# Largest PQ sub-quantizer count <= IVF_PQ_M that divides dim
+def _pq_m(dim: int) -> int:
+    for m in range(min(IVF_PQ_M, dim), 0, -1):
+        if dim % m == 0:
+            return m
+    return 1
+
+
+def create_index(dim: int, kind: str = "flat", n: int = 0):
+    if kind == "flat":
+        return faiss.IndexFlatIP(dim)
+
+    if kind == "hnsw":
+        index = faiss.IndexHNSWFlat(dim, HNSW_M, faiss.METRIC_INNER_PRODUCT)
+        index.hnsw.efConstruction = HNSW_EF_CONSTRUCTION
+        return index
+
+    if kind == "ivfpq":
+        quantizer = faiss.IndexFlatIP(dim)
+        return faiss.IndexIVFPQ(
+            quantizer, dim, _ivf_nlist(n), _pq_m(dim), 8, faiss.METRIC_INNER_PRODUCT
+        )
+
+    raise ValueError(f"Unknown vector index kind: {kind}")
+
+
+def index_kind(index) -> str:
+    if isinstance(index, faiss.IndexHNSW):
+        return "hnsw"
+    if isinstance(index, faiss.IndexIVF):
+        return "ivfpq"
+    return "flat"
+
+
+# Apply query-time recall/latency knobs (efSearch, nprobe) to an index
+def tune_index(index, ef_search: int = None, nprobe: int = None):
+    kind = index_kind(index)
+    params = faiss.ParameterSpace()
+
+    if kind == "hnsw":
+        params.set_index_parameter(index, "efSearch", ef_search or HNSW_EF_SEARCH)
+    elif kind == "ivfpq":
+        params.set_index_parameter(index, "nprobe", nprobe or IVF_NPROBE)
+
+
+def normalize(embeddings) -> np.ndarray:
+    vectors = np.array(embeddings, dtype="float32", copy=True)
+    if vectors.ndim == 1:
+        vectors = vectors.reshape(1, -1)
+    faiss.normalize_L2(vectors)
+    return vectors
+
 
 class VectorStore:
-    def __init__(self, dim: int):
-        logger.info(f"Initializing FAISS index with dim={dim}")
-        self.index = faiss.IndexFlatL2(dim)
+    def __init__(self, dim: int, kind: str = "flat", n: int = 0):
+        logger.info(f"Initializing FAISS {kind} index with dim={dim}")
+        self.index = create_index(dim, kind, n)
+        tune_index(self.index)
         self.chunk_ids = []
+        # On-disk index version this store was loaded from (see index_store)
+        self.version = None
+
+    @classmethod
+    def from_index(cls, index, chunk_ids, version=None):
+        vector_store = cls.__new__(cls)
+        vector_store.index = index
+        tune_index(index)
+        vector_store.chunk_ids = list(chunk_ids)
+        vector_store.version = version
+        return vector_store
+
+    @property
+    def kind(self) -> str:
+        return index_kind(self.index)
 
     def add(self, embeddings, ids):
         logger.info(f"Adding {len(ids)} vectors to FAISS index")
 
-        self.index.add(np.array(embeddings).astype("float32"))
+        vectors = normalize(embeddings)
+
+        # IVF-PQ learns its coarse centroids and codebooks from a sample
+        if not self.index.is_trained:
+            sample = vectors
+            if len(vectors) > IVF_TRAIN_SAMPLE:
+                rows = np.random.default_rng(0).choice(
+                    len(vectors), IVF_TRAIN_SAMPLE, replace=False
+                )
+                sample = vectors[rows]
+
+            logger.info(f"Training FAISS index on {len(sample)} vectors")
+            self.index.train(sample)
+
+        self.index.add(vectors)
         self.chunk_ids.extend(ids)
 
         logger.info("Vectors added to FAISS index")
@@ -19,14 +139,41 @@ class VectorStore:
     def search(self, query_embedding, k=5):
         logger.info(f"Searching FAISS index with top_k={k}")
 
-        distances, indices = self.index.search(
-            np.array([query_embedding]).astype("float32"), k
-        )
-
         result_ids = [
-            self.chunk_ids[i] for i in indices[0] if i != -1
+            chunk_id for _, chunk_id in self.search_with_scores(query_embedding, k)
         ]
 
         logger.info(f"FAISS search returned {len(result_ids)} results")
 
         return result_ids
+
+    # (distance, chunk_id) pairs, closest first. Distance is cosine distance
+    # (1 - cosine similarity) so it is comparable across stores of any type
+    def search_with_scores(self, query_embedding, k=5):
+        with VECTOR_SEARCH_SECONDS.labels(self.kind).time():
+            scores, indices = self.index.search(normalize(query_embedding), k)
+
+        # Indexes persisted before the switch to inner product are L2; on
+        # unit vectors squared L2 is twice the cosine distance
+        if self.index.metric_type == faiss.METRIC_INNER_PRODUCT:
+            distances = 1.0 - scores[0]
+        else:
+            distances = scores[0] / 2.0
+
+        return [
+            (float(distance), self.chunk_ids[i])
+            for distance, i in zip(distances, indices[0])
+            if i != -1
+        ]
+
+    @property
+    def nbytes(self) -> int:
+        n, dim = self.index.ntotal, self.index.d
+
+        if self.kind == "hnsw":
+            return n * (dim * 4 + self.index.hnsw.nb_neighbors(0) * 4)
+
+        if self.kind == "ivfpq":
+            return n * (self.index.code_size + 8) + self.index.nlist * dim * 4
+
+        return n * dim * 4
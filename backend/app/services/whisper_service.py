@@ -1,31 +1,252 @@
+import asyncio
 import os
-from openai import OpenAI
+import queue
+import tempfile
+import threading
+from dataclasses import dataclass
+from openai import AsyncOpenAI
 from dotenv import load_dotenv
 from pathlib import Path
 
+from app.services.audio_service import (
+    cut_window,
+    detect_silences,
+    extract_audio,
+    ffmpeg_available,
+    plan_windows,
+    probe_duration,
+)
 from app.utils.logger import logger
+from app.utils.metrics import TRANSCRIBE_SECONDS, record_error
 
 env_path = Path(__file__).resolve().parents[2] / ".env"
 load_dotenv(dotenv_path=env_path)
 
-client = OpenAI()
+# "openai" in production, "stub" for offline tests and benchmarks
+TRANSCRIPTION_BACKEND = os.getenv("TRANSCRIPTION_BACKEND", "openai").lower()
+# Window length in seconds; 10 min of 32kbps mono mp3 is ~2.4MB
+TRANSCRIBE_WINDOW_SECONDS = float(os.getenv("TRANSCRIBE_WINDOW_SECONDS", 600))
+TRANSCRIBE_MIN_WINDOW_SECONDS = float(os.getenv("TRANSCRIBE_MIN_WINDOW_SECONDS", 300))
+TRANSCRIBE_CONCURRENCY = int(os.getenv("TRANSCRIBE_CONCURRENCY", 4))
 
-def transcribe_audio_video(file_path: str):
+
+@dataclass
+class Segment:
+    text: str
+    start: float
+    end: float
+
+
+class OpenAITranscriptionBackend:
+    def __init__(self, model: str = "whisper-1"):
+        self.model = model
+
+    async def atranscribe(self, file_path: str, duration: float) -> list[Segment]:
+        # One client per call: each ingestion job runs its own event loop
+        async with AsyncOpenAI() as client:
+            with open(file_path, "rb") as audio_file:
+                transcript = await client.audio.transcriptions.create(
+                    file=audio_file,
+                    model=self.model,
+                    response_format="verbose_json",
+                )
+
+        return [
+            Segment(text=seg.text, start=seg.start, end=seg.end)
+            for seg in transcript.segments or []
+        ]
+
+
+class StubTranscriptionBackend:
+    """Emits one fake segment every few seconds of audio, optionally slowly."""
+
+    def __init__(self, segment_seconds: float = 5.0, latency: float = 0.0):
+        self.segment_seconds = segment_seconds
+        self.latency = latency
+
+    async def atranscribe(self, file_path: str, duration: float) -> list[Segment]:
+        if self.latency:
+            await asyncio.sleep(self.latency)
+
+        segments = []
+        start = 0.0
+
+        while start < duration:
+            end = min(start + self.segment_seconds, duration)
+            segments.append(Segment(text=f"stub speech at {start:.1f}s", start=start, end=end))
+            start = end
+
+        return segments
+
+
+def create_backend(name: str = TRANSCRIPTION_BACKEND):
+    if name == "openai":
+        return OpenAITranscriptionBackend()
+
+    if name == "stub":
+        return StubTranscriptionBackend()
+
+    raise RuntimeError(f"Unknown TRANSCRIPTION_BACKEND '{name}'")
+
+
+transcription_backend = create_backend()
+
+
+# Transcribe one (path, start, end) window and shift its segments by the
+# window start so timestamps are global to the source file
+async def _transcribe_window(backend, semaphore, window) -> list[Segment]:
+    path, start, end = window
+
+    async with semaphore:
+        try:
+            with TRANSCRIBE_SECONDS.time():
+                segments = await backend.atranscribe(path, end - start)
+        except Exception as e:
+            record_error("transcription", e)
+            raise
+
+    return [
+        Segment(text=seg.text, start=seg.start + start, end=seg.end + start)
+        for seg in segments
+    ]
+
+
+def _run_loop(loop, main):
+    try:
+        loop.run_until_complete(main)
+    except asyncio.CancelledError:
+        pass
+    finally:
+        loop.close()
+
+
+# Yield each window's segments in window order as soon as it is transcribed.
+# The requests run on an event loop in a background thread and hand finished
+# windows over through a queue, so a slow consumer never stalls the requests
+# in flight. Backpressure limits how many windows start instead: at most
+# 2 * concurrency windows are in flight or waiting to be consumed.
+def iter_transcribe_windows(
+    windows: list[tuple[str, float, float]],
+    backend=None,
+    concurrency: int = TRANSCRIBE_CONCURRENCY,
+    on_progress=None,
+):
+    backend = backend or transcription_backend
+    concurrency = max(1, concurrency)
+    semaphore = asyncio.Semaphore(concurrency)
+    slots = asyncio.Semaphore(2 * concurrency)
+    results = queue.Queue()
+
+    async def produce():
+        pending = asyncio.Queue()
+        tasks = []
+
+        async def start():
+            for window in windows:
+                await slots.acquire()
+                task = asyncio.create_task(_transcribe_window(backend, semaphore, window))
+                tasks.append(task)
+                pending.put_nowait(task)
+
+        starter = asyncio.create_task(start())
+
+        try:
+            for _ in windows:
+                task = await pending.get()
+                results.put((await task, None))
+
+        except Exception as e:
+            results.put((None, e))
+
+        finally:
+            starter.cancel()
+            for task in tasks:
+                task.cancel()
+            await asyncio.gather(starter, *tasks, return_exceptions=True)
+
+    loop = asyncio.new_event_loop()
+    main = loop.create_task(produce())
+    thread = threading.Thread(target=_run_loop, args=(loop, main), name="transcribe", daemon=True)
+
+    def call_in_loop(callback):
+        try:
+            loop.call_soon_threadsafe(callback)
+        except RuntimeError:
+            # The loop already finished: every window has been handed over
+            pass
+
+    thread.start()
+
+    try:
+        for done in range(1, len(windows) + 1):
+            segments, error = results.get()
+
+            if error is not None:
+                raise error
+
+            call_in_loop(slots.release)
+
+            if on_progress:
+                on_progress(done / len(windows))
+
+            yield segments
+
+    finally:
+        call_in_loop(main.cancel)
+        thread.join()
+
+
+# Stream segments window by window; the window files live until the
+# generator is exhausted or closed
+def iter_audio_video_segments(file_path: str, on_progress=None):
     logger.info(f"Starting transcription for file {file_path}")
 
     if not os.path.exists(file_path):
         logger.error(f"File not found for transcription: {file_path}")
         raise FileNotFoundError("File not found for transcription")
 
-    with open(file_path, "rb") as audio_file:
-        transcript = client.audio.transcriptions.create(
-            file=audio_file,
-            model="whisper-1",
-            response_format="verbose_json",
+    count = 0
+
+    if not ffmpeg_available():
+        logger.warning("ffmpeg not found, transcribing the whole file in one request")
+
+        for segments in iter_transcribe_windows([(file_path, 0.0, 0.0)], on_progress=on_progress):
+            count += len(segments)
+            yield from segments
+
+        logger.info(f"Transcription completed, segments={count}")
+
+        return
+
+    with tempfile.TemporaryDirectory(prefix="transcribe-") as workdir:
+        audio_path = extract_audio(file_path, os.path.join(workdir, "audio.mp3"))
+        duration = probe_duration(audio_path)
+
+        if duration <= TRANSCRIBE_WINDOW_SECONDS:
+            windows = [(audio_path, 0.0, duration)]
+        else:
+            silences = detect_silences(audio_path)
+            windows = [
+                (cut_window(audio_path, start, end, os.path.join(workdir, f"window-{i}.mp3")), start, end)
+                for i, (start, end) in enumerate(
+                    plan_windows(
+                        duration,
+                        silences,
+                        TRANSCRIBE_WINDOW_SECONDS,
+                        TRANSCRIBE_MIN_WINDOW_SECONDS,
+                    )
+                )
+            ]
+
+        logger.info(
+            f"Transcribing {len(windows)} windows of {duration:.0f}s audio"
         )
 
+        for segments in iter_transcribe_windows(windows, on_progress=on_progress):
+            count += len(segments)
+            yield from segments
+
     logger.info(
-        f"Transcription completed, segments={len(transcript.segments)}"
+        f"Transcription completed, segments={count}"
     )
 
-    return transcript.segments
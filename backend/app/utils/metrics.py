@@ -0,0 +1,173 @@
+import hmac
+import os
+import time
+from contextlib import nullcontext
+
+from app.utils.logger import logger
+
+# Prometheus metrics are opt-in; when off (or prometheus_client is missing)
+# every metric below is a shared no-op object
+METRICS_ENABLED = os.getenv("METRICS_ENABLED", "false").lower() == "true"
+
+try:
+    import prometheus_client
+except ImportError:
+    prometheus_client = None
+
+if METRICS_ENABLED and prometheus_client is None:
+    logger.warning("METRICS_ENABLED is set but prometheus_client is not installed, metrics disabled")
+
+enabled = METRICS_ENABLED and prometheus_client is not None
+
+# Bearer token required on /metrics when set; the endpoint skips the API key
+# check because scrapers cannot send x-api-key
+METRICS_TOKEN = os.getenv("METRICS_TOKEN")
+
+SIZE_BUCKETS = (1, 2, 4, 8, 16, 32, 64, 128, 256, 512, 1024, 2048)
+TOKEN_BUCKETS = (100, 500, 1000, 5000, 10_000, 25_000, 50_000, 100_000, 300_000)
+SLOW_BUCKETS = (0.1, 0.5, 1, 2.5, 5, 10, 30, 60, 120, 300)
+
+
+class _NoopMetric:
+    def labels(self, *args, **kwargs):
+        return self
+
+    def observe(self, value):
+        pass
+
+    def inc(self, amount=1):
+        pass
+
+    def time(self):
+        return nullcontext()
+
+
+_NOOP = _NoopMetric()
+
+
+def histogram(name: str, documentation: str, labelnames=(), buckets=None):
+    if not enabled:
+        return _NOOP
+
+    if buckets is None:
+        return prometheus_client.Histogram(name, documentation, labelnames)
+
+    return prometheus_client.Histogram(name, documentation, labelnames, buckets=buckets)
+
+
+def counter(name: str, documentation: str, labelnames=()):
+    if not enabled:
+        return _NOOP
+
+    return prometheus_client.Counter(name, documentation, labelnames)
+
+
+HTTP_REQUEST_SECONDS = histogram(
+    "docuchat_http_request_duration_seconds",
+    "Time to the response headers per route",
+    ["method", "route", "status"],
+)
+PDF_PAGE_SECONDS = histogram(
+    "docuchat_pdf_page_seconds",
+    "PDF text extraction time per page",
+    ["method"],
+)
+TRANSCRIBE_SECONDS = histogram(
+    "docuchat_transcribe_window_seconds",
+    "Transcription time per audio window",
+    buckets=SLOW_BUCKETS,
+)
+EMBED_REQUEST_SECONDS = histogram(
+    "docuchat_embed_request_seconds",
+    "Embedding API request time per batch",
+    ["mode"],
+)
+EMBED_BATCH_INPUTS = histogram(
+    "docuchat_embed_batch_inputs",
+    "Inputs per embedding request",
+    buckets=SIZE_BUCKETS,
+)
+EMBED_BATCH_TOKENS = histogram(
+    "docuchat_embed_batch_tokens",
+    "Tokens per embedding request",
+    buckets=TOKEN_BUCKETS,
+)
+INDEX_LOAD_SECONDS = histogram(
+    "docuchat_index_load_seconds",
+    "Vector index load time by source",
+    ["source"],
+)
+VECTOR_SEARCH_SECONDS = histogram(
+    "docuchat_vector_search_seconds",
+    "FAISS search time per shard",
+    ["kind"],
+)
+DB_QUERY_SECONDS = histogram(
+    "docuchat_db_query_seconds",
+    "Database statement time",
+    ["engine", "operation"],
+)
+CHAT_COMPLETION_SECONDS = histogram(
+    "docuchat_chat_completion_seconds",
+    "Chat completion time (to the last token when streaming)",
+    ["stream"],
+    buckets=SLOW_BUCKETS,
+)
+CACHE_REQUESTS = counter(
+    "docuchat_cache_requests_total",
+    "Cache lookups by cache and result",
+    ["cache", "result"],
+)
+UPSTREAM_ERRORS = counter(
+    "docuchat_upstream_errors_total",
+    "Failed calls to external services",
+    ["service", "error"],
+)
+
+
+def record_cache(cache: str, hits: int, misses: int):
+    if hits:
+        CACHE_REQUESTS.labels(cache, "hit").inc(hits)
+    if misses:
+        CACHE_REQUESTS.labels(cache, "miss").inc(misses)
+
+
+def record_error(service: str, error: Exception):
+    UPSTREAM_ERRORS.labels(service, type(error).__name__).inc()
+
+
+# Time every statement run through the engine; nothing is attached when
+# metrics are off
+def instrument_engine(engine, name: str):
+    if not enabled:
+        return
+
+    from sqlalchemy import event
+
+    @event.listens_for(engine, "before_cursor_execute")
+    def before(conn, cursor, statement, parameters, context, executemany):
+        conn.info.setdefault("metrics_started", []).append(time.perf_counter())
+
+    @event.listens_for(engine, "after_cursor_execute")
+    def after(conn, cursor, statement, parameters, context, executemany):
+        started = conn.info["metrics_started"].pop()
+        operation = statement.lstrip().split(None, 1)[0].lower() if statement.strip() else "other"
+        DB_QUERY_SECONDS.labels(name, operation).observe(time.perf_counter() - started)
+
+    @event.listens_for(engine, "handle_error")
+    def failed(context):
+        started = context.connection.info.get("metrics_started") if context.connection else None
+        if started:
+            started.pop()
+
+
+def authorized(authorization: str | None) -> bool:
+    if not METRICS_TOKEN:
+        return True
+
+    return hmac.compare_digest(authorization or "", f"Bearer {METRICS_TOKEN}")
+
+
+# Body and content type for the /metrics endpoint
+def render_metrics() -> tuple:
+    return prometheus_client.generate_latest(), prometheus_client.CONTENT_TYPE_LATEST
@@ -0,0 +1,48 @@
+import math
+import os
+from functools import lru_cache
+
+from app.utils.logger import logger
+
+TOKENIZER_ENCODING = os.getenv("TOKENIZER_ENCODING", "cl100k_base")
+
+# Rough chars-per-token ratio for English text, used when tiktoken is unavailable
+CHARS_PER_TOKEN = 4
+
+
+@lru_cache(maxsize=4)
+def get_encoding(name: str = TOKENIZER_ENCODING):
+    try:
+        import tiktoken
+
+        return tiktoken.get_encoding(name)
+    except Exception as e:
+        logger.warning(
+            f"Tokenizer {name} unavailable ({e}), estimating token counts"
+        )
+        return None
+
+
+def count_tokens(text: str, encoding_name: str = TOKENIZER_ENCODING) -> int:
+    encoding = get_encoding(encoding_name)
+
+    if encoding is not None:
+        return len(encoding.encode(text, disallowed_special=()))
+
+    return math.ceil(len(text) / CHARS_PER_TOKEN)
+
+
+def truncate_to_tokens(
+    text: str,
+    max_tokens: int,
+    encoding_name: str = TOKENIZER_ENCODING,
+) -> str:
+    encoding = get_encoding(encoding_name)
+
+    if encoding is not None:
+        tokens = encoding.encode(text, disallowed_special=())
+        if len(tokens) <= max_tokens:
+            return text
+        return encoding.decode(tokens[:max_tokens])
+
+    return text[: max_tokens * CHARS_PER_TOKEN]
@@ -0,0 +1,91 @@
+"""
+Recall vs latency benchmark for the vector index types.
+
+Builds flat, HNSW and IVF-PQ indexes over synthetic clustered unit vectors
+(shaped like text embeddings) and reports build time, mean query latency and
+recall@k against exact flat search for each efSearch / nprobe setting.
+
+Usage:
+    python -m benchmarks.bench_ann --vectors 100000 --dim 384
+"""
+import argparse
+import logging
+import time
+
+import numpy as np
+
+from app.services.vector_store import VectorStore, normalize, tune_index
+
+
+def make_embeddings(count: int, dim: int, clusters: int, seed: int = 0):
+    rng = np.random.default_rng(seed)
+    centers = rng.standard_normal((clusters, dim)).astype("float32")
+    labels = rng.integers(0, clusters, count)
+    noise = rng.standard_normal((count, dim)).astype("float32") * 0.6
+    return normalize(centers[labels] + noise)
+
+
+def build(kind: str, embeddings) -> tuple:
+    ids = list(range(len(embeddings)))
+
+    started = time.perf_counter()
+    vector_store = VectorStore(dim=embeddings.shape[1], kind=kind, n=len(ids))
+    vector_store.add(embeddings, ids)
+
+    return vector_store, time.perf_counter() - started
+
+
+def run_queries(vector_store, queries, k: int) -> tuple:
+    started = time.perf_counter()
+    results = [
+        [chunk_id for _, chunk_id in vector_store.search_with_scores(q, k)]
+        for q in queries
+    ]
+    latency = (time.perf_counter() - started) / len(queries)
+
+    return results, latency
+
+
+def recall(results, truth) -> float:
+    hits = sum(len(set(r) & set(t)) for r, t in zip(results, truth))
+    return hits / sum(len(t) for t in truth)
+
+
+def report(label: str, build_time: float, latency: float, score: float, nbytes: int):
+    print(
+        f"{label:<22} build={build_time:7.2f}s latency={latency * 1000:7.3f}ms "
+        f"recall={score:.3f} size={nbytes / 2**20:8.1f}MiB"
+    )
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--vectors", type=int, default=100_000)
+    parser.add_argument("--dim", type=int, default=384)
+    parser.add_argument("--clusters", type=int, default=200)
+    parser.add_argument("--queries", type=int, default=200)
+    parser.add_argument("--k", type=int, default=10)
+    parser.add_argument("--ef-search", type=int, nargs="+", default=[16, 64, 256])
+    parser.add_argument("--nprobe", type=int, nargs="+", default=[4, 16, 64])
+    args = parser.parse_args()
+
+    logging.getLogger("app").setLevel(logging.WARNING)
+
+    embeddings = make_embeddings(args.vectors, args.dim, args.clusters)
+    queries = make_embeddings(args.queries, args.dim, args.clusters, seed=1)
+
+    flat, build_time = build("flat", embeddings)
+    truth, latency = run_queries(flat, queries, args.k)
+    report("flat", build_time, latency, 1.0, flat.nbytes)
+
+    hnsw, build_time = build("hnsw", embeddings)
+    for ef_search in args.ef_search:
+        tune_index(hnsw.index, ef_search=ef_search)
+        results, latency = run_queries(hnsw, queries, args.k)
+        report(f"hnsw efSearch={ef_search}", build_time, latency, recall(results, truth), hnsw.nbytes)
+
+    ivfpq, build_time = build("ivfpq", embeddings)
+    for nprobe in args.nprobe:
+        tune_index(ivfpq.index, nprobe=nprobe)
+        results, latency = run_queries(ivfpq, queries, args.k)
+        report(f"ivfpq nprobe={nprobe}", build_time, latency, recall(results, truth), ivfpq.nbytes)
@@ -0,0 +1,138 @@
+"""
+Load benchmark for the async /chat/ path against stubbed upstreams.
+
+Runs the real /chat/ endpoint in-process (httpx ASGITransport) with the fake
+embedding backend, a fake AsyncOpenAI chat client and an aiosqlite database,
+each upstream adding a fixed latency. For comparison, a blocking baseline
+route sleeps for the same upstream latency inside a sync `def` endpoint,
+which is how the previous stack spent a threadpool thread per request.
+
+The app still reads its usual environment on import (SUPABASE_* etc.), but
+nothing connects to Supabase, Postgres or OpenAI.
+
+Usage:
+    python -m benchmarks.bench_async_chat --requests 400 --latency 0.5
+"""
+import argparse
+import asyncio
+import tempfile
+import time
+import uuid
+from types import SimpleNamespace
+
+import httpx
+from sqlalchemy.ext.asyncio import async_sessionmaker, create_async_engine
+from sqlalchemy.pool import StaticPool
+
+from app.db.base import Base
+from app.db.models import Chunk, File
+from app.deps import get_db
+from app.main import app
+from app.middleware import api_key
+from app.routers import chat
+from app.routers.auth import get_current_user
+from app.services import embedding_service, index_store
+from app.services.embedding_service import FakeEmbeddingBackend, to_blob
+
+API_KEY = "bench-key"
+
+
+class FakeCompletions:
+    def __init__(self, latency: float):
+        self.latency = latency
+
+    async def create(self, **kwargs):
+        await asyncio.sleep(self.latency)
+        message = SimpleNamespace(content="stub answer")
+        return SimpleNamespace(choices=[SimpleNamespace(message=message)])
+
+
+async def setup(chunks: int, embed_latency: float, completion_latency: float):
+    engine = create_async_engine("sqlite+aiosqlite://", poolclass=StaticPool)
+    session_factory = async_sessionmaker(engine, expire_on_commit=False)
+
+    async with engine.begin() as conn:
+        await conn.run_sync(Base.metadata.create_all)
+
+    backend = FakeEmbeddingBackend(dim=256)
+    file_id = uuid.uuid4()
+    texts = [f"chunk {i} about topic {i % 17}" for i in range(chunks)]
+
+    async with session_factory() as db:
+        db.add(File(id=file_id, user_id=uuid.uuid4(), filename="bench.pdf", file_type="pdf"))
+        db.add_all(
+            Chunk(file_id=file_id, text=text, embedding=to_blob(embedding))
+            for text, embedding in zip(texts, backend.embed(texts))
+        )
+        await db.commit()
+
+    async def bench_db():
+        async with session_factory() as db:
+            yield db
+
+    backend.latency = embed_latency
+    embedding_service.set_backend(backend)
+    embedding_service.embedding_cache = None
+    index_store.INDEX_DIR = tempfile.mkdtemp(prefix="bench-indexes-")
+    api_key.API_KEY = API_KEY
+    chat.client = SimpleNamespace(
+        chat=SimpleNamespace(completions=FakeCompletions(completion_latency))
+    )
+
+    app.dependency_overrides[get_db] = bench_db
+    app.dependency_overrides[get_current_user] = lambda: SimpleNamespace(id="bench-user")
+
+    # Blocking baseline: same upstream latency spent inside a threadpool thread
+    @app.post("/bench/blocking-chat")
+    def blocking_chat():
+        time.sleep(embed_latency)
+        time.sleep(completion_latency)
+        return {"answer": "stub answer"}
+
+    return file_id
+
+
+async def fire(path: str, requests: int, body: dict) -> float:
+    transport = httpx.ASGITransport(app=app)
+
+    async with httpx.AsyncClient(
+        transport=transport,
+        base_url="http://bench",
+        headers={"x-api-key": API_KEY},
+        timeout=None,
+    ) as client:
+        # Warm up the index cache so both runs measure steady-state requests
+        await client.post(path, json=body)
+
+        started = time.perf_counter()
+        responses = await asyncio.gather(
+            *(client.post(path, json=body) for _ in range(requests))
+        )
+        elapsed = time.perf_counter() - started
+
+    assert all(r.status_code == 200 for r in responses), responses[0].text
+
+    return elapsed
+
+
+async def main(args):
+    file_id = await setup(args.chunks, args.embed_latency, args.latency)
+    body = {"question": "what is topic 3?", "file_id": str(file_id)}
+
+    for name, path in (("async", "/chat/"), ("blocking", "/bench/blocking-chat")):
+        elapsed = await fire(path, args.requests, body)
+        print(
+            f"{name:<9} requests={args.requests} time={elapsed:.2f}s "
+            f"throughput={args.requests / elapsed:,.0f} req/s"
+        )
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--requests", type=int, default=400)
+    parser.add_argument("--chunks", type=int, default=500)
+    parser.add_argument("--latency", type=float, default=0.5)
+    parser.add_argument("--embed-latency", type=float, default=0.05)
+    args = parser.parse_args()
+
+    asyncio.run(main(args))
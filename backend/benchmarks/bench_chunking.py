@@ -0,0 +1,72 @@
+"""
+Chunker throughput and peak memory on multi-MB synthetic documents.
+
+Pages are generated lazily and fed to each registered chunker as a stream,
+as the ingestion pipeline does. Token counts use tiktoken when its encoding
+is available locally and a chars/4 estimate otherwise.
+
+Usage:
+    python -m benchmarks.bench_chunking --megabytes 4 16
+"""
+import argparse
+import logging
+import time
+import tracemalloc
+
+from app.services.chunking import CHUNKER_INPUTS, CHUNKERS
+
+WORDS = (
+    "the retrieval index maps each chunk to its embedding and page range while "
+    "transcripts keep segment timestamps for citations across long documents"
+).split()
+
+
+def make_pages(megabytes: float, page_chars: int = 3000):
+    total = int(megabytes * 1024 * 1024)
+    page_number = 0
+
+    while page_number * page_chars < total:
+        page_number += 1
+        sentences = []
+        size = 0
+
+        while size < page_chars:
+            start = (page_number * 7 + len(sentences) * 3) % len(WORDS)
+            words = (WORDS[start:] + WORDS[:start])[: 8 + len(sentences) % 17]
+            sentence = " ".join(words).capitalize() + "."
+            sentences.append(sentence)
+            size += len(sentence) + 1
+
+        paragraphs = [" ".join(sentences[i:i + 6]) for i in range(0, len(sentences), 6)]
+
+        yield page_number, "\n\n".join(paragraphs)
+
+
+def run(name: str, megabytes: float) -> tuple:
+    tracemalloc.start()
+    started = time.perf_counter()
+
+    count = sum(1 for _ in CHUNKERS[name](make_pages(megabytes)))
+
+    elapsed = time.perf_counter() - started
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+
+    return elapsed, count, peak
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--megabytes", type=float, nargs="+", default=[4, 16])
+    parser.add_argument("--chunkers", nargs="+", default=sorted(n for n in CHUNKERS if CHUNKER_INPUTS[n] == "pages"))
+    args = parser.parse_args()
+
+    logging.getLogger("app").setLevel(logging.ERROR)
+
+    for megabytes in args.megabytes:
+        for name in args.chunkers:
+            elapsed, count, peak = run(name, megabytes)
+            print(
+                f"{name:<10} {megabytes:6.1f}MB {elapsed:7.2f}s "
+                f"{megabytes / elapsed:6.2f}MB/s chunks={count:<6} peak={peak / 2**20:6.1f}MiB"
+            )
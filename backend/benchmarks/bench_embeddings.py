@@ -0,0 +1,56 @@
+"""
+Offline throughput benchmark for the batched embedding engine.
+
+Uses the fake embedding backend with simulated per-request latency, so no
+API key or network access is needed.
+
+Usage:
+    python -m benchmarks.bench_embeddings --texts 20000 --latency 0.2
+"""
+import argparse
+import time
+
+from app.services import embedding_service
+from app.services.embedding_service import FakeEmbeddingBackend, embed_texts
+
+
+def make_texts(count: int, words: int) -> list[str]:
+    return [
+        " ".join(f"word{(i * 7 + j) % 5000}" for j in range(words))
+        for i in range(count)
+    ]
+
+
+def run(texts, concurrency: int, batch_tokens: int, latency: float) -> float:
+    embedding_service.set_backend(FakeEmbeddingBackend(dim=256, latency=latency))
+    embedding_service.EMBEDDING_BATCH_TOKENS = batch_tokens
+    embedding_service._executor = embedding_service.ThreadPoolExecutor(
+        max_workers=concurrency
+    )
+
+    started = time.perf_counter()
+    embeddings = embed_texts(texts)
+    elapsed = time.perf_counter() - started
+
+    assert len(embeddings) == len(texts)
+
+    return elapsed
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--texts", type=int, default=20000)
+    parser.add_argument("--words", type=int, default=300)
+    parser.add_argument("--latency", type=float, default=0.2)
+    parser.add_argument("--batch-tokens", type=int, default=100_000)
+    parser.add_argument("--concurrency", type=int, nargs="+", default=[1, 2, 4, 8])
+    args = parser.parse_args()
+
+    texts = make_texts(args.texts, args.words)
+
+    for concurrency in args.concurrency:
+        elapsed = run(texts, concurrency, args.batch_tokens, args.latency)
+        print(
+            f"concurrency={concurrency:<3} time={elapsed:.2f}s "
+            f"throughput={len(texts) / elapsed:,.0f} texts/s"
+        )
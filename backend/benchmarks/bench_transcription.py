@@ -0,0 +1,51 @@
+"""
+Offline benchmark for parallel windowed transcription.
+
+Drives iter_transcribe_windows, the streaming path ingestion uses, with the
+stub backend and a simulated per-window upstream latency, so no audio files,
+ffmpeg or API key are needed. --consume simulates the downstream chunk/embed
+stages taking time per window, which exercises the backpressure.
+
+Usage:
+    python -m benchmarks.bench_transcription --hours 2 --window 600 --latency 2 --consume 0 0.5
+"""
+import argparse
+import time
+
+from app.services.whisper_service import StubTranscriptionBackend, iter_transcribe_windows
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--hours", type=float, default=2.0)
+    parser.add_argument("--window", type=float, default=600.0)
+    parser.add_argument("--latency", type=float, default=2.0)
+    parser.add_argument("--concurrency", type=int, nargs="+", default=[1, 2, 4, 8])
+    parser.add_argument("--consume", type=float, nargs="+", default=[0.0])
+    args = parser.parse_args()
+
+    duration = args.hours * 3600
+    windows = []
+    start = 0.0
+    while start < duration:
+        end = min(start + args.window, duration)
+        windows.append((f"window-{len(windows)}.mp3", start, end))
+        start = end
+
+    backend = StubTranscriptionBackend(latency=args.latency)
+
+    for consume in args.consume:
+        for concurrency in args.concurrency:
+            started = time.perf_counter()
+            segments = 0
+
+            for window_segments in iter_transcribe_windows(windows, backend=backend, concurrency=concurrency):
+                segments += len(window_segments)
+                time.sleep(consume)
+
+            elapsed = time.perf_counter() - started
+
+            print(
+                f"consume={consume:<4} concurrency={concurrency:<3} windows={len(windows)} "
+                f"segments={segments} time={elapsed:.2f}s"
+            )
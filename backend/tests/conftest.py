@@ -1,7 +1,49 @@
+from contextlib import contextmanager
+
 import pytest
 from fastapi.testclient import TestClient
+from sqlalchemy import create_engine
+from sqlalchemy.orm import sessionmaker
+from sqlalchemy.pool import StaticPool
+
+from app.db.base import Base
+from app.db import models
 from app.main import app
 
 @pytest.fixture
 def client():
     return TestClient(app)
+
+# In-memory SQLite session; one shared connection so pipeline stages
+# can write from their own threads
+@pytest.fixture
+def db():
+    engine = create_engine(
+        "sqlite://",
+        connect_args={"check_same_thread": False},
+        poolclass=StaticPool,
+    )
+    Base.metadata.create_all(engine)
+    session = sessionmaker(bind=engine)()
+
+    yield session
+
+    session.close()
+    engine.dispose()
+
+# Job context stub that records the stages it was asked to run
+class Context:
+    def __init__(self):
+        self.stages = []
+
+    @contextmanager
+    def stage(self, name):
+        self.stages.append(name)
+        yield
+
+    def progress(self, fraction):
+        pass
+
+@pytest.fixture
+def context():
+    return Context()
@@ -0,0 +1,60 @@
+import asyncio
+from types import SimpleNamespace
+
+import numpy as np
+
+from app.services.answer_cache import AnswerCache
+
+
+CHUNKS = [SimpleNamespace(id="c1"), SimpleNamespace(id="c2")]
+
+
+def test_exact_tier_normalizes_question():
+    cache = AnswerCache(semantic=False)
+    cache.set(cache.exact_key(["f1"], CHUNKS, "What is X?"), {"answer": "x"})
+
+    assert cache.get(cache.exact_key(["f1"], CHUNKS, "  what is x ")) == {"answer": "x"}
+    assert cache.get(cache.exact_key(["f1"], CHUNKS[:1], "what is x")) is None
+    assert cache.get(cache.exact_key(["f2"], CHUNKS, "what is x")) is None
+
+
+async def always_current(chunk_ids):
+    return True
+
+
+def test_semantic_tier_threshold_and_invalidation():
+    cache = AnswerCache(semantic=True, similarity=0.9)
+    key = cache.exact_key(["f1", "f2"], CHUNKS, "what is x")
+    cache.set(key, {"answer": "x"}, np.array([1.0, 0.0]))
+
+    close = np.array([0.95, np.sqrt(1 - 0.95**2)])
+    far = np.array([0.5, np.sqrt(1 - 0.5**2)])
+
+    def similar(file_ids, embedding):
+        return asyncio.run(cache.get_similar(file_ids, embedding, always_current))
+
+    assert similar(["f2", "f1"], close) == {"answer": "x"}
+    assert similar(["f1", "f2"], far) is None
+    assert similar(["f1"], close) is None
+
+    cache.invalidate_file("f2")
+
+    assert similar(["f1", "f2"], close) is None
+    assert cache.stats()["semantic_hits"] == 1
+
+
+def test_semantic_hit_is_dropped_once_its_chunks_are_replaced():
+    # Reprocessed in another process: no invalidate_file here, the cited
+    # chunk ids are simply gone
+    cache = AnswerCache(semantic=True, similarity=0.9)
+    cache.set(cache.exact_key(["f1"], CHUNKS, "what is x"), {"answer": "x"}, np.array([1.0, 0.0]))
+    checked = []
+
+    async def replaced(chunk_ids):
+        checked.append(chunk_ids)
+        return False
+
+    assert asyncio.run(cache.get_similar(["f1"], np.array([1.0, 0.0]), replaced)) is None
+    assert checked == [("c1", "c2")]
+    assert len(cache.semantic) == 0
+    assert cache.stats()["semantic_hits"] == 0
@@ -0,0 +1,51 @@
+import uuid
+
+from app.services import index_store
+from app.services.bm25_index import BM25Index, tokenize
+from app.services.fusion import reciprocal_rank_fusion
+
+
+TEXTS = [
+    "Replace the filter cartridge with part AB-1234 every six months.",
+    "The pump housing is sealed with an O-ring, part CD-5678.",
+    "Call parse_config before starting the service.",
+]
+
+
+def test_tokenize_keeps_compound_tokens_and_parts():
+    assert tokenize("Part AB-1234, see parse_config.") == [
+        "part", "ab-1234", "ab", "1234", "see", "parse_config",
+    ]
+
+
+def test_bm25_ranks_exact_term_matches():
+    ids = [uuid.uuid4() for _ in TEXTS]
+    index = BM25Index.build(ids, TEXTS)
+
+    assert [chunk_id for _, chunk_id in index.search("which part is AB-1234?", k=3)][0] == ids[0]
+    assert [chunk_id for _, chunk_id in index.search("parse_config", k=3)] == [ids[2]]
+    assert index.search("nothing matches", k=3) == []
+
+
+def test_bm25_index_roundtrip(tmp_path, monkeypatch):
+    monkeypatch.setattr(index_store, "INDEX_DIR", str(tmp_path))
+
+    file_id = uuid.uuid4()
+    ids = [uuid.uuid4() for _ in TEXTS]
+    index = BM25Index.build(ids, TEXTS)
+    index_store.save_lexical_index(file_id, index)
+
+    loaded = index_store.load_lexical_index_from_disk(file_id)
+
+    assert loaded.version == index_store.lexical_index_version(file_id)
+    assert loaded.search("CD-5678", k=1) == index.search("CD-5678", k=1)
+
+    index_store.delete_index(file_id)
+    assert index_store.load_lexical_index_from_disk(file_id) is None
+
+
+def test_reciprocal_rank_fusion_rewards_agreement():
+    fused = reciprocal_rank_fusion([["a", "b", "c"], ["b", "d", "a"]])
+
+    assert fused[0] == "b"
+    assert set(fused) == {"a", "b", "c", "d"}
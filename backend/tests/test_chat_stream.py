@@ -0,0 +1,96 @@
+from types import SimpleNamespace
+
+import pytest
+
+from app.deps import get_db
+from app.main import app
+from app.middleware import api_key
+from app.routers import chat
+from app.routers.auth import get_current_user
+from app.services.answer_cache import AnswerCache
+
+
+class FakeStream:
+    def __init__(self, tokens):
+        self.chunks = [
+            SimpleNamespace(choices=[SimpleNamespace(delta=SimpleNamespace(content=t))])
+            for t in tokens
+        ]
+        self.closed = False
+
+    async def __aiter__(self):
+        for chunk in self.chunks:
+            yield chunk
+
+    async def close(self):
+        self.closed = True
+
+
+@pytest.fixture
+def stream(monkeypatch):
+    fake_stream = FakeStream(["Hello", " world"])
+    chunks = [
+        SimpleNamespace(id="c1", file_id="f1", chunk_index=0, text="intro", start_time=1.0, end_time=4.0, page_start=None, page_end=None),
+    ]
+
+    async def resolve_file_ids(db, payload, user_id):
+        return [payload.file_id]
+
+    async def retrieve_chunks(db, file_ids, question):
+        return chunks
+
+    async def create(**kwargs):
+        return fake_stream
+
+    monkeypatch.setattr(api_key, "API_KEY", "test-key")
+    monkeypatch.setattr(chat, "resolve_file_ids", resolve_file_ids)
+    monkeypatch.setattr(chat, "retrieve_chunks", retrieve_chunks)
+    monkeypatch.setattr(chat, "answer_cache", AnswerCache())
+    monkeypatch.setattr(
+        chat,
+        "client",
+        SimpleNamespace(
+            chat=SimpleNamespace(completions=SimpleNamespace(create=create))
+        ),
+    )
+
+    app.dependency_overrides[get_db] = lambda: None
+    app.dependency_overrides[get_current_user] = lambda: SimpleNamespace(id="11111111-1111-1111-1111-111111111111")
+    yield fake_stream
+    app.dependency_overrides.clear()
+
+
+def test_chat_stream_sends_sources_then_tokens(client, stream):
+    res = client.post(
+        "/chat/stream",
+        json={"question": "hi", "file_id": "00000000-0000-0000-0000-000000000000"},
+        headers={"x-api-key": "test-key"},
+    )
+
+    assert res.status_code == 200
+    assert res.headers["content-type"].startswith("text/event-stream")
+
+    events = [block.split("\n")[0] for block in res.text.strip().split("\n\n")]
+    assert events == [
+        "event: sources",
+        "event: token",
+        "event: token",
+        "event: done",
+    ]
+    assert '{"sources": [{"file_id": "f1", "start": 1.0, "end": 4.0}]}' in res.text
+    assert stream.closed
+
+
+def test_repeated_question_is_served_from_answer_cache(client, stream):
+    request = {
+        "json": {"question": "Hi?", "file_id": "00000000-0000-0000-0000-000000000000"},
+        "headers": {"x-api-key": "test-key"},
+    }
+
+    first = client.post("/chat/stream", **request)
+    request["json"]["question"] = "  hi "
+    second = client.post("/chat/stream", **request)
+
+    assert '"cached": false' in first.text
+    assert '"cached": true' in second.text
+    assert '{"content": "Hello world"}' in second.text
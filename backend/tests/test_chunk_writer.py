@@ -0,0 +1,59 @@
+import uuid
+
+import pytest
+
+from app.db.models.chunk import Chunk
+from app.db.models.file import File
+from app.services.chunk_writer import _copy_rows, replace_file_chunks
+
+
+@pytest.fixture
+def file(db):
+    file = File(user_id=uuid.uuid4(), filename="a.pdf", file_type="pdf")
+    db.add(file)
+    db.commit()
+
+    return file
+
+
+def rows(count: int, prefix: str = "chunk"):
+    return (
+        {"text": f"{prefix} {i}", "chunk_index": i, "page_start": 1, "page_end": 1, "embedding": b"\0" * 8}
+        for i in range(count)
+    )
+
+
+def test_reprocessing_replaces_chunks_instead_of_duplicating(db, file):
+    assert replace_file_chunks(db, file.id, rows(5), batch_size=2) == 5
+    assert replace_file_chunks(db, file.id, rows(3, "new"), batch_size=2) == 3
+
+    chunks = db.query(Chunk).filter(Chunk.file_id == file.id).order_by(Chunk.chunk_index).all()
+    assert [c.text for c in chunks] == ["new 0", "new 1", "new 2"]
+
+
+def test_failed_write_keeps_previous_chunks(db, file):
+    replace_file_chunks(db, file.id, rows(3))
+
+    def failing_rows():
+        yield from rows(2, "new")
+        raise RuntimeError("embedding failed")
+
+    with pytest.raises(RuntimeError):
+        replace_file_chunks(db, file.id, failing_rows(), batch_size=1)
+
+    chunks = db.query(Chunk).filter(Chunk.file_id == file.id).order_by(Chunk.chunk_index).all()
+    assert [c.text for c in chunks] == ["chunk 0", "chunk 1", "chunk 2"]
+
+
+def test_copy_rows_escape_text_nulls_and_bytes():
+    row = {
+        "id": "id-1",
+        "file_id": "file-1",
+        "text": "tab\there\nback\\slash",
+        "chunk_index": 0,
+        "embedding": b"\x01\xff",
+    }
+
+    line = _copy_rows([row]).getvalue()
+
+    assert line == "id-1\tfile-1\ttab\\there\\nback\\\\slash\t0\t\\N\t\\N\t\\N\t\\N\t\\N\t\\\\x01ff\n"
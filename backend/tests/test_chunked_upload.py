@@ -0,0 +1,148 @@
+import asyncio
+import hashlib
+import os
+from types import SimpleNamespace
+
+import pytest
+from sqlalchemy.ext.asyncio import AsyncSession, create_async_engine
+
+from app.db.base import Base
+from app.deps import get_db
+from app.main import app
+from app.middleware import api_key
+from app.routers import upload as upload_router
+from app.routers.auth import get_current_user
+from app.services import blob_store, upload_service
+
+USER_ID = "aaaaaaaa-1111-1111-1111-111111111111"
+HEADERS = {"x-api-key": "test-key"}
+
+
+@pytest.fixture
+def uploads(tmp_path, monkeypatch):
+    engine = create_async_engine(f"sqlite+aiosqlite:///{tmp_path}/test.db")
+
+    async def create_tables():
+        async with engine.begin() as conn:
+            await conn.run_sync(Base.metadata.create_all)
+
+    asyncio.run(create_tables())
+
+    async def db():
+        async with AsyncSession(engine, expire_on_commit=False) as session:
+            yield session
+
+    monkeypatch.setattr(api_key, "API_KEY", "test-key")
+    monkeypatch.setattr(upload_service, "UPLOAD_DIR", str(tmp_path / "uploads"))
+    monkeypatch.setattr(blob_store, "BLOB_DIR", str(tmp_path / "blobs"))
+    app.dependency_overrides[get_db] = db
+    app.dependency_overrides[get_current_user] = lambda: SimpleNamespace(id=USER_ID)
+    yield tmp_path / "uploads"
+    app.dependency_overrides.clear()
+
+
+def test_chunked_upload_resumes_and_verifies(client, uploads):
+    data = os.urandom(600 * 1024)
+    part_size = 256 * 1024
+    parts = [data[i:i + part_size] for i in range(0, len(data), part_size)]
+
+    res = client.post(
+        "/upload/sessions",
+        json={
+            "filename": "talk.mp4",
+            "size": len(data),
+            "part_size": part_size,
+            "sha256": hashlib.sha256(data).hexdigest(),
+        },
+        headers=HEADERS,
+    )
+    assert res.status_code == 201
+    session = res.json()
+    assert session["part_count"] == 3
+    base = f"/upload/sessions/{session['upload_id']}"
+
+    for number in (2, 1):
+        res = client.put(f"{base}/parts/{number}", content=parts[number - 1], headers=HEADERS)
+        assert res.status_code == 200
+
+    # Interrupted: resume from the status endpoint
+    assert client.get(base, headers=HEADERS).json()["missing_parts"] == [3]
+    assert client.post(f"{base}/complete", headers=HEADERS).status_code == 400
+
+    bad = client.put(
+        f"{base}/parts/3",
+        content=parts[2],
+        headers={**HEADERS, "x-part-sha256": "0" * 64},
+    )
+    assert bad.status_code == 400
+
+    res = client.put(
+        f"{base}/parts/3",
+        content=parts[2],
+        headers={**HEADERS, "x-part-sha256": hashlib.sha256(parts[2]).hexdigest()},
+    )
+    assert res.status_code == 200
+
+    res = client.post(f"{base}/complete", headers=HEADERS)
+    assert res.status_code == 200
+    assert res.json()["file_id"] == session["file_id"]
+    sha256 = hashlib.sha256(data).hexdigest()
+    assert open(blob_store.blob_path(sha256, "mp4"), "rb").read() == data
+    assert not (uploads / f"{session['file_id']}.mp4").exists()
+
+
+def test_upload_size_limit(client, uploads, monkeypatch):
+    monkeypatch.setattr(upload_service, "UPLOAD_MAX_BYTES", 1024)
+
+    res = client.post(
+        "/upload/sessions",
+        json={"filename": "big.pdf", "size": 2048},
+        headers=HEADERS,
+    )
+    assert res.status_code == 413
+
+    res = client.post(
+        "/upload/",
+        files={"file": ("big.pdf", b"x" * 2048, "application/pdf")},
+        headers=HEADERS,
+    )
+    assert res.status_code == 413
+    assert not any(uploads.iterdir())
+
+
+def create_session(client, size=1024):
+    return client.post(
+        "/upload/sessions",
+        json={"filename": "talk.mp4", "size": size},
+        headers=HEADERS,
+    )
+
+
+def test_active_sessions_are_capped_per_user(client, uploads, monkeypatch):
+    monkeypatch.setattr(upload_service, "UPLOAD_MAX_ACTIVE_SESSIONS", 2)
+
+    assert create_session(client).status_code == 201
+    assert create_session(client).status_code == 201
+
+    res = create_session(client)
+    assert res.status_code == 429
+    assert len(list(uploads.iterdir())) == 2
+
+
+def test_sweep_expires_abandoned_sessions_and_removes_files(client, uploads, monkeypatch):
+    monkeypatch.setattr(upload_router, "UPLOAD_SESSION_TTL", -1)
+    expired = create_session(client).json()
+
+    monkeypatch.setattr(upload_router, "UPLOAD_SESSION_TTL", 3600)
+    active = create_session(client).json()
+
+    async def sweep():
+        async for db in app.dependency_overrides[get_db]():
+            return await upload_service.sweep_expired_sessions(db)
+
+    assert asyncio.run(sweep()) == 1
+    assert [p.name for p in uploads.iterdir()] == [f"{active['file_id']}.mp4"]
+
+    res = client.get(f"/upload/sessions/{expired['upload_id']}", headers=HEADERS)
+    assert res.json()["status"] == "expired"
+    assert client.get(f"/upload/sessions/{active['upload_id']}", headers=HEADERS).json()["status"] == "active"
@@ -0,0 +1,94 @@
+import pytest
+
+from app.services import chunking
+from app.services.chunking import (
+    CHUNKERS,
+    chunk_pages,
+    get_chunker,
+    iter_sentence_chunks,
+    iter_transcript_windows,
+    pack_segment_offsets,
+    unpack_segment_offsets,
+)
+from app.services.whisper_service import Segment
+from app.utils.tokens import count_tokens
+
+
+def test_chunk_pages_tracks_page_ranges():
+    pages = [(1, "a b c d"), (2, "e f g h"), (3, "i j")]
+
+    chunks = chunk_pages(pages, chunk_size=4, overlap=1)
+
+    assert [c.text for c in chunks] == ["a b c d", "d e f g", "g h i j", "j"]
+    assert [(c.page_start, c.page_end) for c in chunks] == [
+        (1, 1), (1, 2), (2, 3), (3, 3),
+    ]
+
+
+def test_sentence_chunks_respect_sentences_budget_and_tables():
+    table = "| part | qty |\n| AB-1 | 2 |\n| AB-2 | 5 |"
+    pages = [
+        (1, "First sentence here. Second sentence follows!\n\n" + table),
+        (2, "A sentence on page two. " * 20),
+    ]
+
+    chunks = list(iter_sentence_chunks(pages, max_tokens=30, overlap_tokens=8))
+
+    assert chunks[0].text.startswith("First sentence here. Second sentence follows!\n\n")
+    # The table is never cut
+    assert [table in c.text for c in chunks if "| part" in c.text] == [True]
+    assert all(count_tokens(c.text) <= 30 for c in chunks)
+    assert all(c.text.endswith(".") for c in chunks)
+    # Consecutive page-two chunks share a trailing sentence
+    assert chunks[2].text.startswith("A sentence on page two.")
+    assert chunks[2].text.startswith(chunks[1].text.rsplit(". ", 1)[-1])
+    assert (chunks[-1].page_start, chunks[-1].page_end) == (2, 2)
+
+
+def test_sentence_chunks_split_overlong_sentences():
+    pages = [(1, "word " * 400)]
+
+    chunks = list(iter_sentence_chunks(pages, max_tokens=50, overlap_tokens=0))
+
+    assert len(chunks) > 1
+    assert " ".join(c.text for c in chunks).split() == ["word"] * 400
+    assert all(count_tokens(c.text) <= 50 for c in chunks)
+
+
+def test_get_chunker_uses_registered_strategies():
+    assert get_chunker("pdf") is CHUNKERS[chunking.PDF_CHUNKER]
+    assert set(CHUNKERS) >= {"words", "sentences"}
+
+
+def test_get_chunker_rejects_chunkers_for_other_inputs(monkeypatch):
+    monkeypatch.setattr(chunking, "PDF_CHUNKER", "segments")
+    with pytest.raises(RuntimeError, match="takes segments"):
+        get_chunker("pdf")
+
+    monkeypatch.setattr(chunking, "PDF_CHUNKER", "words")
+    monkeypatch.setattr(chunking, "AV_CHUNKER", "words")
+    with pytest.raises(RuntimeError, match="takes pages"):
+        chunking.check_chunkers()
+
+
+def test_transcript_windows_merge_segments_with_overlap_and_offsets():
+    segments = [Segment(text=f" part {i} ", start=i * 5.0, end=i * 5.0 + 4.5) for i in range(30)]
+
+    windows = list(iter_transcript_windows(segments, max_seconds=30, max_tokens=1000, overlap_seconds=10))
+
+    assert len(windows) < len(segments)
+    assert all(w.end - w.start <= 30 for w in windows)
+    assert (windows[0].start, windows[-1].end) == (0.0, 149.5)
+    # The next window repeats the segments from the last 10 seconds
+    assert windows[1].start == windows[0].end - 9.5
+
+    window = windows[1]
+    offsets = unpack_segment_offsets(pack_segment_offsets(window.segment_offsets))
+    for offset, start, end in offsets:
+        index = int(start // 5)
+        assert window.text[int(offset):].startswith(f"part {index}")
+        assert (start, end) == (index * 5.0, index * 5.0 + 4.5)
+
+
+def test_get_chunker_merges_transcripts_for_audio_video():
+    assert get_chunker("mp4") is iter_transcript_windows
@@ -0,0 +1,86 @@
+from types import SimpleNamespace
+
+from app.services.chunking import pack_segment_offsets
+from app.services.context_builder import build_context, merge_overlap
+
+
+def chunk(id, text, file_id="f", chunk_index=None, start=None, end=None, page=None):
+    return SimpleNamespace(
+        id=id,
+        file_id=file_id,
+        text=text,
+        chunk_index=chunk_index,
+        start_time=start,
+        end_time=end,
+        page_start=page,
+        page_end=page,
+    )
+
+
+def test_merge_overlap_drops_repeated_words():
+    assert merge_overlap("a b c d", "c d e f") == "a b c d e f"
+    assert merge_overlap("a b", "c d") == "a b c d"
+
+
+def test_adjacent_chunks_merge_and_keep_rank_order():
+    chunks = [
+        chunk("c5", "x y z", chunk_index=5, page=3),
+        chunk("c1", "one two three", chunk_index=1, page=1),
+        chunk("c2", "two three four", chunk_index=2, page=2),
+        chunk("g", "other file", file_id="g", chunk_index=2, page=9),
+    ]
+
+    blocks = build_context(chunks)
+
+    assert [b.text for b in blocks] == ["x y z", "one two three four", "other file"]
+    assert (blocks[1].page_start, blocks[1].page_end) == (1, 2)
+    assert blocks[1].chunk_ids == ["c1", "c2"]
+
+
+def test_av_segments_merge_by_time_without_index():
+    blocks = build_context([
+        chunk("b", "world", start=3.5, end=6.0),
+        chunk("a", "hello", start=0.0, end=3.0),
+        chunk("c", "later", start=60.0, end=65.0),
+    ])
+
+    assert [(b.text, b.start_time, b.end_time) for b in blocks] == [
+        ("hello world", 0.0, 6.0),
+        ("later", 60.0, 65.0),
+    ]
+
+
+def test_av_segments_merged_by_time_keep_repeated_words():
+    blocks = build_context([
+        chunk("a", "no no", start=0.0, end=1.0),
+        chunk("b", "no means no", start=1.0, end=2.0),
+    ])
+
+    assert [b.text for b in blocks] == ["no no no means no"]
+
+
+def test_duplicates_dropped_and_budget_enforced():
+    long_text = " ".join(f"word{i}" for i in range(2000))
+    blocks = build_context(
+        [
+            chunk("a", "Same text"),
+            chunk("b", "same   TEXT", file_id="g"),
+            chunk("c", long_text, file_id="h"),
+        ],
+        max_tokens=200,
+    )
+
+    assert [b.chunk_ids for b in blocks] == [["a"], ["c"]]
+    assert len(blocks[1].text) < len(long_text)
+
+
+def test_transcript_windows_keep_segment_timestamps():
+    first = chunk("w0", "a b c", chunk_index=0, start=0.0, end=9.0)
+    first.segment_offsets = pack_segment_offsets([(0, 0.0, 4.0), (2, 4.0, 9.0)])
+    second = chunk("w1", "b c d", chunk_index=1, start=4.0, end=12.5)
+    second.segment_offsets = pack_segment_offsets([(0, 4.0, 9.0), (4, 9.0, 12.5)])
+
+    blocks = build_context([second, first])
+
+    assert blocks[0].text == "a b c d"
+    assert blocks[0].segments == [(0.0, 4.0), (4.0, 9.0), (9.0, 12.5)]
@@ -0,0 +1,30 @@
+import uuid
+
+from app.db.models.chunk import Chunk
+from app.db.models.file import File
+from app.services import ingestion
+
+
+def test_identical_upload_reuses_processed_chunks(db, context, monkeypatch):
+    indexed = []
+    monkeypatch.setattr(ingestion.retriever, "index_file", lambda db, file_id: indexed.append(file_id))
+
+    original = File(user_id=uuid.uuid4(), filename="a.pdf", file_type="pdf", content_hash="ab" * 32)
+    copy = File(user_id=uuid.uuid4(), filename="b.pdf", file_type="pdf", content_hash="ab" * 32)
+    db.add_all([original, copy])
+    db.flush()
+    db.add_all(
+        Chunk(file_id=original.id, text=f"chunk {i}", chunk_index=i, page_start=1, page_end=1, embedding=b"\0" * 8)
+        for i in range(3)
+    )
+    db.commit()
+
+    result = ingestion.ingest_file(db, copy, context)
+
+    assert result["deduplicated_from"] == str(original.id)
+    assert context.stages == ["clone", "index"]
+    assert indexed == [copy.id]
+
+    cloned = db.query(Chunk).filter(Chunk.file_id == copy.id).order_by(Chunk.chunk_index).all()
+    assert [c.text for c in cloned] == ["chunk 0", "chunk 1", "chunk 2"]
+    assert all(c.embedding == b"\0" * 8 for c in cloned)
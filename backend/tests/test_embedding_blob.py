@@ -0,0 +1,12 @@
+import numpy as np
+
+from app.services.embedding_service import to_blob, from_blob
+
+
+def test_embedding_blob_roundtrip():
+    embedding = [0.1, -0.5, 2.0, 0.0]
+
+    blob = to_blob(embedding)
+
+    assert len(blob) == 4 * len(embedding)
+    np.testing.assert_allclose(from_blob(blob), embedding, rtol=1e-6)
@@ -0,0 +1,76 @@
+import sqlite3
+from types import SimpleNamespace
+
+import numpy as np
+import pytest
+
+from app.services import embedding_cache, embedding_service
+from app.services.embedding_cache import EmbeddingCache, MemoryTier, SQLiteTier
+from app.services.embedding_service import FakeEmbeddingBackend, embed_texts
+
+
+class CountingBackend(FakeEmbeddingBackend):
+    def __init__(self):
+        super().__init__(dim=8)
+        self.embedded = []
+
+    def embed(self, texts):
+        self.embedded.extend(texts)
+        return super().embed(texts)
+
+
+@pytest.fixture
+def backend(monkeypatch, tmp_path):
+    backend = CountingBackend()
+    cache = EmbeddingCache(MemoryTier(100), SQLiteTier(str(tmp_path / "cache.sqlite")))
+    monkeypatch.setattr(embedding_service, "_backend", backend)
+    monkeypatch.setattr(embedding_service, "embedding_cache", cache)
+    return backend
+
+
+def test_duplicate_texts_are_embedded_once(backend):
+    first = embed_texts(["same chunk", "other chunk", "same chunk"])
+    second = embed_texts(["same chunk", "question?"])
+
+    assert backend.embedded == ["same chunk", "other chunk", "question?"]
+    assert first[0] == first[2]
+    assert second[0] == pytest.approx(first[0], rel=1e-6)
+
+    stats = embedding_service.embedding_cache.stats()
+    assert stats["memory_hits"] == 1
+    assert stats["misses"] == 4
+
+
+def test_persistent_tier_survives_memory_eviction(backend, tmp_path):
+    embed_texts(["persisted chunk"])
+
+    cache = embedding_service.embedding_cache
+    cache.memory = MemoryTier(100)
+
+    embed_texts(["persisted chunk"])
+
+    assert backend.embedded == ["persisted chunk"]
+    assert cache.stats()["persistent_hits"] == 1
+
+
+def test_persistent_tier_prunes_least_recently_used_rows(tmp_path, monkeypatch):
+    tier = SQLiteTier(str(tmp_path / "cache.sqlite"), max_rows=10)
+    monkeypatch.setattr(SQLiteTier, "PRUNE_EVERY", 1)
+    clock = iter(range(1_000_000, 2_000_000, 7200))
+    monkeypatch.setattr(embedding_cache, "time", SimpleNamespace(time=lambda: next(clock)))
+
+    def key(i):
+        return bytes([i]) * 32
+
+    for i in range(10):
+        tier.put_many({key(i): np.full(4, i, dtype=np.float32)})
+
+    # Reading key 0 makes it recent, so key 1 is the oldest now
+    assert key(0) in tier.get_many([key(0)])
+
+    tier.put_many({key(10): np.zeros(4, dtype=np.float32)})
+
+    remaining = {row[0] for row in sqlite3.connect(tier.path).execute("SELECT key FROM embeddings")}
+    assert len(remaining) == 9
+    assert key(0) in remaining and key(10) in remaining
+    assert key(1) not in remaining and key(2) not in remaining
@@ -0,0 +1,69 @@
+import httpx
+import openai
+import pytest
+
+from app.services import embedding_service
+from app.services.embedding_service import (
+    FakeEmbeddingBackend,
+    embed_texts,
+    pack_batches,
+)
+
+
+@pytest.fixture
+def fake_backend(monkeypatch):
+    backend = FakeEmbeddingBackend(dim=8)
+    monkeypatch.setattr(embedding_service, "_backend", backend)
+    monkeypatch.setattr(embedding_service, "embedding_cache", None)
+    return backend
+
+
+def test_pack_batches_respects_size_and_token_limits():
+    batches = pack_batches([10, 10, 10, 50, 5], max_batch_size=2, max_batch_tokens=40)
+
+    assert batches == [[0, 1], [2], [3], [4]]
+
+
+def test_embed_texts_preserves_input_order(fake_backend, monkeypatch):
+    monkeypatch.setattr(embedding_service, "EMBEDDING_BATCH_SIZE", 3)
+    texts = [f"text number {i}" for i in range(10)]
+    batch_sizes = []
+    embed = fake_backend.embed
+
+    def recording_embed(batch):
+        batch_sizes.append(len(batch))
+        return embed(batch)
+
+    monkeypatch.setattr(fake_backend, "embed", recording_embed)
+
+    embeddings = embed_texts(texts)
+
+    assert sorted(batch_sizes) == [1, 3, 3, 3]
+    assert embeddings == [embed([t])[0] for t in texts]
+
+
+def test_pack_batches_reads_limits_at_call_time(monkeypatch):
+    monkeypatch.setattr(embedding_service, "EMBEDDING_BATCH_SIZE", 4)
+    monkeypatch.setattr(embedding_service, "EMBEDDING_BATCH_TOKENS", 3)
+
+    assert pack_batches([1] * 10) == [[0, 1, 2], [3, 4, 5], [6, 7, 8], [9]]
+
+
+def test_embed_texts_retries_rate_limits(fake_backend, monkeypatch):
+    monkeypatch.setattr(embedding_service, "EMBEDDING_RETRY_BACKOFF", 0)
+    calls = []
+
+    def flaky_embed(texts):
+        calls.append(texts)
+        if len(calls) == 1:
+            raise openai.RateLimitError(
+                "rate limited",
+                response=httpx.Response(429, request=httpx.Request("POST", "http://test")),
+                body=None,
+            )
+        return FakeEmbeddingBackend(dim=8).embed(texts)
+
+    monkeypatch.setattr(fake_backend, "embed", flaky_embed)
+
+    assert len(embed_texts(["a", "b"])) == 2
+    assert len(calls) == 2
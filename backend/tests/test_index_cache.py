@@ -0,0 +1,65 @@
+import asyncio
+import uuid
+
+import numpy as np
+
+from app.services import index_store, rag_loader
+from app.services.index_cache import IndexCache
+from app.services.vector_store import VectorStore
+
+
+class FakeStore:
+    def __init__(self, nbytes):
+        self.nbytes = nbytes
+
+
+def test_index_cache_hit_and_miss():
+    cache = IndexCache(max_bytes=100)
+    store = FakeStore(10)
+
+    assert cache.get("a") is None
+    cache.put("a", store)
+    assert cache.get("a") is store
+
+    stats = cache.stats()
+    assert stats["hits"] == 1
+    assert stats["misses"] == 1
+
+
+def test_index_cache_evicts_least_recently_used():
+    cache = IndexCache(max_bytes=100)
+    cache.put("a", FakeStore(40))
+    cache.put("b", FakeStore(40))
+    cache.get("a")
+    cache.put("c", FakeStore(40))
+
+    assert cache.get("b") is None
+    assert cache.get("a") is not None
+    assert cache.get("c") is not None
+    assert cache.stats()["bytes"] == 80
+
+
+def test_index_cache_invalidate():
+    cache = IndexCache(max_bytes=100)
+    cache.put("a", FakeStore(40))
+    cache.invalidate("a")
+
+    assert cache.get("a") is None
+    assert cache.stats()["bytes"] == 0
+
+
+def test_load_index_checks_the_cache_once_per_lookup(tmp_path, monkeypatch):
+    monkeypatch.setattr(index_store, "INDEX_DIR", str(tmp_path))
+    cache = IndexCache(max_bytes=10**6)
+    monkeypatch.setattr(rag_loader, "index_cache", cache)
+
+    file_id = uuid.uuid4()
+    vector_store = VectorStore(dim=4)
+    vector_store.add(np.eye(4, dtype="float32"), [uuid.uuid4() for _ in range(4)])
+    index_store.save_index(file_id, vector_store)
+
+    # Miss served from disk, then a hit; no DB needed for either
+    assert asyncio.run(rag_loader.load_index(None, file_id)) is not None
+    assert asyncio.run(rag_loader.load_index(None, file_id)) is not None
+
+    assert (cache.stats()["hits"], cache.stats()["misses"]) == (1, 1)
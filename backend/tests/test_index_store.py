@@ -0,0 +1,63 @@
+import uuid
+
+import numpy as np
+
+from app.services import index_store
+from app.services.vector_store import VectorStore
+
+
+def test_index_store_roundtrip(tmp_path, monkeypatch):
+    monkeypatch.setattr(index_store, "INDEX_DIR", str(tmp_path))
+
+    file_id = uuid.uuid4()
+    ids = [uuid.uuid4() for _ in range(4)]
+    embeddings = np.eye(4, dtype="float32")
+
+    vector_store = VectorStore(dim=4)
+    vector_store.add(embeddings, ids)
+    index_store.save_index(file_id, vector_store)
+
+    loaded = index_store.load_index_from_disk(file_id)
+
+    assert loaded.chunk_ids == ids
+    assert loaded.version == index_store.index_version(file_id)
+    assert loaded.search(embeddings[2], k=1) == [ids[2]]
+
+    index_store.delete_index(file_id)
+    assert index_store.load_index_from_disk(file_id) is None
+
+
+def make_store(ids):
+    vector_store = VectorStore(dim=4)
+    vector_store.add(np.eye(4, dtype="float32")[: len(ids)], ids)
+    return vector_store
+
+
+def test_reprocessed_index_is_published_with_its_ids(tmp_path, monkeypatch):
+    monkeypatch.setattr(index_store, "INDEX_DIR", str(tmp_path))
+
+    file_id = uuid.uuid4()
+    old_ids = [uuid.uuid4() for _ in range(3)]
+    new_ids = [uuid.uuid4() for _ in range(3)]
+
+    index_store.save_index(file_id, make_store(old_ids))
+    old_version = index_store.index_version(file_id)
+    index_store.save_index(file_id, make_store(new_ids))
+
+    assert index_store.index_version(file_id) != old_version
+    assert index_store.load_index_from_disk(file_id).chunk_ids == new_ids
+    # The superseded version is removed once the new one is published
+    assert sorted(p.name for p in tmp_path.iterdir()) == sorted(
+        [
+            f"{file_id}.current",
+            f"{file_id}.{index_store.index_version(file_id)}.faiss",
+            f"{file_id}.{index_store.index_version(file_id)}.ids.npy",
+        ]
+    )
+
+    # A reader that saw the old pointer retries with the published version
+    versions = iter([old_version, index_store.index_version(file_id)])
+    real_version = index_store.index_version
+    monkeypatch.setattr(index_store, "index_version", lambda fid: next(versions, real_version(fid)))
+
+    assert index_store.load_index_from_disk(file_id).chunk_ids == new_ids
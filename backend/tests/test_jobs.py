@@ -0,0 +1,106 @@
+import time
+import uuid
+from datetime import timedelta
+
+import pytest
+from sqlalchemy import create_engine
+from sqlalchemy.orm import sessionmaker
+from sqlalchemy.pool import StaticPool
+
+from app.db.models.job import Job
+from app.errors.app_errors import BadRequestError
+from app.jobs.backends import (
+    FAILED,
+    QUEUED,
+    SUCCEEDED,
+    InMemoryJobBackend,
+    SQLJobBackend,
+)
+from app.jobs.worker import JobWorker
+
+
+def sqlite_backend():
+    # The heartbeat writes from its own thread
+    engine = create_engine(
+        "sqlite://",
+        connect_args={"check_same_thread": False},
+        poolclass=StaticPool,
+    )
+    Job.__table__.create(engine)
+    return SQLJobBackend(sessionmaker(bind=engine))
+
+
+@pytest.fixture(params=["memory", "sqlite"])
+def backend(request):
+    if request.param == "memory":
+        return InMemoryJobBackend()
+    return sqlite_backend()
+
+
+def test_job_succeeds_with_stage_timings(backend):
+    def handler(job, context):
+        with context.stage("extract"):
+            context.progress(0.5)
+        return {"chunks": 3}
+
+    worker = JobWorker(backend, handler)
+    job = backend.enqueue(uuid.uuid4(), uuid.uuid4())
+
+    claimed = backend.claim()
+    assert claimed.id == job.id
+    assert backend.claim() is None
+
+    worker.run_job(claimed)
+
+    done = backend.get(job.id)
+    assert done.status == SUCCEEDED
+    assert done.progress == 1.0
+    assert done.result == {"chunks": 3}
+    assert "extract" in done.stage_timings
+
+
+def test_job_retries_transient_errors(backend):
+    def handler(job, context):
+        raise ConnectionError("upstream down")
+
+    worker = JobWorker(backend, handler, retry_backoff=0)
+    job = backend.enqueue(uuid.uuid4(), uuid.uuid4(), max_attempts=2)
+
+    worker.run_job(backend.claim())
+    assert backend.get(job.id).status == QUEUED
+
+    worker.run_job(backend.claim())
+    failed = backend.get(job.id)
+    assert failed.status == FAILED
+    assert failed.attempts == 2
+    assert failed.error == "upstream down"
+
+
+def test_job_does_not_retry_permanent_errors(backend):
+    def handler(job, context):
+        raise BadRequestError("Unsupported file type")
+
+    worker = JobWorker(backend, handler, retry_backoff=0)
+    job = backend.enqueue(uuid.uuid4(), uuid.uuid4())
+
+    worker.run_job(backend.claim())
+
+    failed = backend.get(job.id)
+    assert failed.status == FAILED
+    assert failed.attempts == 1
+
+
+def test_running_job_heartbeat_keeps_it_from_being_requeued(backend):
+    requeued = []
+
+    def handler(job, context):
+        # A long stage with no progress updates
+        time.sleep(0.5)
+        requeued.append(backend.requeue_stale(timedelta(seconds=0.2)))
+        return {}
+
+    worker = JobWorker(backend, handler, stale_after=0.2, heartbeat_interval=0.05)
+    backend.enqueue(uuid.uuid4(), uuid.uuid4())
+    worker.run_job(backend.claim())
+
+    assert requeued == [0]
@@ -0,0 +1,130 @@
+import asyncio
+import os
+import subprocess
+import sys
+from pathlib import Path
+from types import SimpleNamespace
+
+import pytest
+
+from app.middleware import api_key, metrics as metrics_middleware
+from app.utils import metrics
+
+
+def test_disabled_metrics_are_noops(client, monkeypatch):
+    monkeypatch.setattr(api_key, "API_KEY", "test-key")
+    monkeypatch.setattr(metrics, "enabled", False)
+
+    with metrics.EMBED_REQUEST_SECONDS.labels("sync").time():
+        metrics.record_cache("answer", 1, 2)
+        metrics.record_error("chat", RuntimeError("boom"))
+
+    assert client.get("/metrics", headers={"x-api-key": "test-key"}).status_code == 404
+
+
+def test_middleware_labels_requests_by_route_template(monkeypatch):
+    observed = []
+
+    class Recorder:
+        def labels(self, *labels):
+            self.current = labels
+            return self
+
+        def observe(self, value):
+            observed.append(self.current)
+
+    monkeypatch.setattr(metrics_middleware, "HTTP_REQUEST_SECONDS", Recorder())
+
+    async def call_next(request):
+        return SimpleNamespace(status_code=201)
+
+    for path, template in [
+        ("/collections/7/files", "/collections/{collection_id}/files"),
+        # Routers included with a prefix report their path relative to it
+        ("/upload/sessions/abc", "/sessions/{upload_id}"),
+    ]:
+        request = SimpleNamespace(
+            method="POST",
+            scope={"path": path, "route": SimpleNamespace(path=template)},
+        )
+
+        asyncio.run(metrics_middleware.metrics_middleware(request, call_next))
+
+    assert observed == [
+        ("POST", "/collections/{collection_id}/files", "201"),
+        ("POST", "/upload/sessions/{upload_id}", "201"),
+    ]
+
+
+# Metrics are created when app.utils.metrics is imported, so the enabled
+# path runs in a fresh interpreter
+ENABLED_APP = """
+import asyncio
+import sys
+from types import SimpleNamespace
+
+from fastapi.testclient import TestClient
+from sqlalchemy.ext.asyncio import AsyncSession, create_async_engine
+
+from app.db.base import Base
+from app.db import models
+from app.deps import get_db
+from app.main import app
+from app.middleware import api_key
+from app.routers.auth import get_current_user
+from app.utils import metrics
+
+engine = create_async_engine(f"sqlite+aiosqlite:///{sys.argv[1]}")
+metrics.instrument_engine(engine.sync_engine, "test")
+
+async def create_tables():
+    async with engine.begin() as conn:
+        await conn.run_sync(Base.metadata.create_all)
+
+asyncio.run(create_tables())
+
+async def db():
+    async with AsyncSession(engine) as session:
+        yield session
+
+api_key.API_KEY = "test-key"
+app.dependency_overrides[get_db] = db
+app.dependency_overrides[get_current_user] = lambda: SimpleNamespace(id="aaaaaaaa-1111-1111-1111-111111111111")
+
+client = TestClient(app)
+res = client.get(
+    "/upload/sessions/bbbbbbbb-2222-2222-2222-222222222222",
+    headers={"x-api-key": "test-key"},
+)
+assert res.status_code == 404, res.status_code
+
+# No x-api-key: scrapers only send the bearer token
+assert client.get("/metrics").status_code == 401
+res = client.get("/metrics", headers={"authorization": "Bearer scrape-token"})
+assert res.status_code == 200, res.status_code
+print(res.text)
+"""
+
+
+def test_enabled_metrics_expose_route_templates_and_db_statements(tmp_path):
+    pytest.importorskip("prometheus_client")
+
+    env = {
+        **os.environ,
+        "METRICS_ENABLED": "true",
+        "METRICS_TOKEN": "scrape-token",
+        "PYTHONPATH": os.pathsep.join(filter(None, [os.getcwd(), os.environ.get("PYTHONPATH")])),
+    }
+
+    result = subprocess.run(
+        [sys.executable, "-c", ENABLED_APP, str(tmp_path / "metrics.db")],
+        cwd=Path(__file__).resolve().parents[1],
+        env=env,
+        capture_output=True,
+        text=True,
+    )
+
+    assert result.returncode == 0, result.stderr
+    assert 'route="/upload/sessions/{upload_id}"' in result.stdout
+    assert 'status="404"' in result.stdout
+    assert 'docuchat_db_query_seconds_count{engine="test",operation="select"}' in result.stdout
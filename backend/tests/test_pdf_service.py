@@ -0,0 +1,54 @@
+from app.services import pdf_service
+
+
+def test_page_ranges_cover_all_pages_in_order():
+    assert pdf_service._page_ranges(7, 3) == [(1, 3), (4, 6), (7, 7)]
+    assert pdf_service._page_ranges(2, 50) == [(1, 2)]
+
+
+def test_map_page_ranges_preserves_page_order(monkeypatch):
+    monkeypatch.setattr(pdf_service, "PDF_WORKERS", 1)
+
+    def fake_extract(file_path, first_page, last_page):
+        return [f"page {i}" for i in range(first_page, last_page + 1)]
+
+    texts = pdf_service._map_page_ranges(
+        fake_extract, "doc.pdf", pdf_service._page_ranges(5, 2)
+    )
+
+    assert texts == [f"page {i}" for i in range(1, 6)]
+
+
+def test_contiguous_ranges_batches_runs_of_pages():
+    assert pdf_service._contiguous_ranges([1, 2, 3, 5, 8, 9], 2) == [
+        (1, 2), (3, 3), (5, 5), (8, 9),
+    ]
+
+
+def test_extract_pages_only_ocrs_pages_without_native_text(monkeypatch):
+    native = {1: "native text on the first page", 2: "", 3: "more native text here"}
+    ocr_calls = []
+
+    class FakeReader:
+        def __init__(self, file_path):
+            self.pages = list(native)
+
+    def fake_native(file_path, first_page, last_page):
+        return [native[i] for i in range(first_page, last_page + 1)]
+
+    def fake_ocr(file_path, first_page, last_page):
+        ocr_calls.append((first_page, last_page))
+        return ["scanned page text" for _ in range(first_page, last_page + 1)]
+
+    monkeypatch.setattr(pdf_service, "PdfReader", FakeReader)
+    monkeypatch.setattr(pdf_service, "_extract_native_range", fake_native)
+    monkeypatch.setattr(pdf_service, "_ocr_range", fake_ocr)
+
+    pages = pdf_service.extract_pages_from_pdf("doc.pdf")
+
+    assert ocr_calls == [(2, 2)]
+    assert pages == [
+        (1, "native text on the first page"),
+        (2, "scanned page text"),
+        (3, "more native text here"),
+    ]
@@ -0,0 +1,100 @@
+import threading
+import time
+import uuid
+
+import pytest
+
+from app.db.models.chunk import Chunk
+from app.db.models.file import File
+from app.services import chunk_service, chunking, ingestion
+from app.services.pipeline import batched, run_pipeline
+
+
+def test_pipeline_streams_items_through_stages_in_order():
+    seen = []
+
+    def double(items):
+        for item in items:
+            yield item * 2
+
+    def sink(items):
+        for item in items:
+            seen.append(item)
+            yield item
+
+    stats = run_pipeline(("numbers", range(100)), [("double", double), ("sink", sink)], maxsize=4)
+
+    assert seen == [i * 2 for i in range(100)]
+    assert [(s.name, s.items) for s in stats] == [("numbers", 100), ("double", 100), ("sink", 100)]
+
+
+def test_pipeline_applies_backpressure_to_the_source():
+    produced = 0
+    max_ahead = 0
+    consumed = 0
+    lock = threading.Lock()
+
+    def source():
+        nonlocal produced, max_ahead
+        for i in range(50):
+            with lock:
+                produced += 1
+                max_ahead = max(max_ahead, produced - consumed)
+            yield i
+
+    def slow_sink(items):
+        nonlocal consumed
+        for item in items:
+            time.sleep(0.002)
+            with lock:
+                consumed += 1
+            yield item
+
+    run_pipeline(("source", source()), [("sink", slow_sink)], maxsize=2)
+
+    # queue capacity + the item held by each thread
+    assert max_ahead <= 4
+
+
+def test_pipeline_reraises_stage_errors():
+    def failing(items):
+        for item in items:
+            if item == 3:
+                raise ValueError("bad item")
+            yield item
+
+    with pytest.raises(ValueError, match="bad item"):
+        run_pipeline(("source", iter(range(10_000))), [("failing", failing), ("sink", lambda items: items)])
+
+
+def test_batched_groups_items():
+    assert list(batched(range(5), 2)) == [[0, 1], [2, 3], [4]]
+
+
+def test_pdf_ingestion_streams_pages_into_chunks(db, context, monkeypatch):
+    file = File(user_id=uuid.uuid4(), filename="a.pdf", file_type="pdf")
+    db.add(file)
+    db.flush()
+    # Left over from an earlier run, replaced by reprocessing
+    db.add(Chunk(file_id=file.id, text="stale", chunk_index=0, embedding=b"\0" * 8))
+    db.commit()
+
+    def fake_pages(file_path, on_progress=None):
+        for page in range(1, 4):
+            yield page, " ".join(f"p{page}w{i}" for i in range(600))
+
+    monkeypatch.setattr(chunking, "PDF_CHUNKER", "words")
+    monkeypatch.setattr(ingestion, "blob_file_path", lambda file: "a.pdf")
+    monkeypatch.setattr(ingestion, "iter_pages_from_pdf", fake_pages)
+    monkeypatch.setattr(chunk_service, "embed_texts", lambda texts: [[0.0, 1.0]] * len(texts))
+    monkeypatch.setattr(ingestion.retriever, "index_file", lambda db, file_id: None)
+
+    result = ingestion.ingest_file(db, file, context)
+
+    chunks = db.query(Chunk).filter(Chunk.file_id == file.id).order_by(Chunk.chunk_index).all()
+
+    assert result["chunks"] == len(chunks) == 4
+    assert [c.chunk_index for c in chunks] == [0, 1, 2, 3]
+    assert [(c.page_start, c.page_end) for c in chunks] == [(1, 1), (1, 2), (2, 3), (3, 3)]
+    assert result["pipeline"]["extract"]["items"] == 3
+    assert result["pipeline"]["store"]["items"] == 4
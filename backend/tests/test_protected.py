@@ -1,3 +1,8 @@
 def test_upload_requires_auth(client):
     res = client.post("/upload/")
     assert res.status_code == 401
+
+
+def test_process_status_requires_auth(client):
+    res = client.get(f"/process/{'0' * 8}-0000-0000-0000-{'0' * 12}")
+    assert res.status_code == 401
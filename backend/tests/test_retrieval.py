@@ -0,0 +1,102 @@
+import asyncio
+import threading
+import uuid
+
+import numpy as np
+from sqlalchemy import event
+from sqlalchemy.ext.asyncio import AsyncSession, create_async_engine
+
+from app.db.base import Base
+from app.db import models
+from app.db.models.chunk import Chunk
+from app.db.models.file import File
+from app.services import index_store, rag_loader, retrieval
+from app.services.embedding_service import to_blob
+from app.services.index_cache import IndexCache
+from app.services.vector_store import VectorStore
+
+
+def make_shard(vectors, ids):
+    store = VectorStore(2)
+    store.add(np.array(vectors, dtype="float32"), ids)
+    return store
+
+
+def test_search_shards_merges_global_top_k():
+    shards = {
+        "a": make_shard([[1.0, 0.0], [0.0, 1.0]], ["a1", "a2"]),
+        "b": make_shard([[1.0, 0.2], [-1.0, 0.0]], ["b1", "b2"]),
+    }
+
+    hits = asyncio.run(retrieval.search_shards(shards, [1.0, 0.0], k=3))
+
+    assert [(chunk_id, file_id) for _, chunk_id, file_id in hits] == [
+        ("a1", "a"),
+        ("b1", "b"),
+        ("a2", "a"),
+    ]
+
+
+def test_search_shards_fans_out_in_batches(monkeypatch):
+    monkeypatch.setattr(retrieval, "RETRIEVAL_SHARD_BATCH", 1)
+    shards = {
+        "a": make_shard([[1.0, 1.0]], ["a1"]),
+        "b": make_shard([[1.0, 0.1]], ["b1"]),
+        "c": make_shard([[1.0, 0.5]], ["c1"]),
+    }
+
+    hits = asyncio.run(retrieval.search_shards(shards, [1.0, 0.0], k=2))
+
+    assert [chunk_id for _, chunk_id, _ in hits] == ["b1", "c1"]
+
+
+def test_small_searches_also_run_off_the_event_loop(monkeypatch):
+    threads = []
+    search_batch = retrieval._search_batch
+
+    def recording(*args):
+        threads.append(threading.current_thread())
+        return search_batch(*args)
+
+    monkeypatch.setattr(retrieval, "_search_batch", recording)
+
+    asyncio.run(retrieval.search_shards({"a": make_shard([[1.0, 0.0]], ["a1"])}, [1.0, 0.0], k=1))
+
+    assert threads and threads[0] is not threading.main_thread()
+
+
+def test_missing_shards_are_built_with_one_query_per_batch(tmp_path, monkeypatch):
+    monkeypatch.setattr(index_store, "INDEX_DIR", str(tmp_path))
+    monkeypatch.setattr(rag_loader, "index_cache", IndexCache())
+    monkeypatch.setattr(retrieval, "RETRIEVAL_SHARD_BATCH", 2)
+
+    engine = create_async_engine("sqlite+aiosqlite://")
+    chunk_queries = []
+
+    @event.listens_for(engine.sync_engine, "before_cursor_execute")
+    def count(conn, cursor, statement, parameters, context, executemany):
+        if statement.startswith("SELECT") and "FROM chunks" in statement:
+            chunk_queries.append(statement)
+
+    async def run():
+        async with engine.begin() as conn:
+            await conn.run_sync(Base.metadata.create_all)
+
+        async with AsyncSession(engine, expire_on_commit=False) as db:
+            files = [File(user_id=uuid.uuid4(), filename=f"{i}.pdf", file_type="pdf") for i in range(3)]
+            db.add_all(files)
+            await db.flush()
+            db.add_all(
+                Chunk(file_id=f.id, text=f"file {i}", chunk_index=0, embedding=to_blob([1.0, float(i)]))
+                for i, f in enumerate(files)
+            )
+            await db.commit()
+
+            return [f.id for f in files], await retrieval.load_shards(db, [f.id for f in files])
+
+    file_ids, shards = asyncio.run(run())
+
+    assert set(shards) == set(file_ids)
+    assert len(chunk_queries) == 2
+    # Persisted, so the next query loads them locally
+    assert all(index_store.index_version(file_id) for file_id in file_ids)
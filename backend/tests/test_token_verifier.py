@@ -0,0 +1,88 @@
+import time
+from types import SimpleNamespace
+
+import jwt
+import pytest
+
+from app.errors.app_errors import UnauthorizedError
+from app.services.token_verifier import TokenVerifier
+from app.utils.ttl_cache import TTLCache
+
+SECRET = "test-secret-with-enough-bytes-for-hs256"
+
+
+def make_token(exp_in=3600, secret=SECRET, **claims):
+    payload = {
+        "sub": "11111111-1111-1111-1111-111111111111",
+        "email": "user@example.com",
+        "aud": "authenticated",
+        "exp": int(time.time()) + exp_in,
+        **claims,
+    }
+    return jwt.encode(payload, secret, algorithm="HS256")
+
+
+@pytest.fixture
+def remote_calls():
+    return []
+
+
+@pytest.fixture
+def verifier(remote_calls):
+    def remote_get_user(token):
+        remote_calls.append(token)
+        return SimpleNamespace(
+            user=SimpleNamespace(id="remote-user", email=None, role="authenticated")
+        )
+
+    return TokenVerifier(
+        jwt_secret=SECRET,
+        jwks_url=None,
+        audience="authenticated",
+        cache=TTLCache(100, 60),
+        remote_get_user=remote_get_user,
+    )
+
+
+def test_valid_token_is_verified_locally_and_cached(verifier, remote_calls):
+    token = make_token()
+
+    assert verifier.cached_user(token) is None
+
+    user = verifier.verify(token)
+
+    assert user.id == "11111111-1111-1111-1111-111111111111"
+    assert verifier.cached_user(token) is user
+    assert remote_calls == []
+
+
+def test_expired_token_is_rejected(verifier):
+    with pytest.raises(UnauthorizedError) as exc:
+        verifier.verify(make_token(exp_in=-10))
+
+    assert exc.value.message == "TOKEN_EXPIRED"
+
+
+def test_forged_token_is_rejected_without_remote_call(verifier, remote_calls):
+    with pytest.raises(UnauthorizedError) as exc:
+        verifier.verify(make_token(secret="some-other-secret-with-enough-bytes"))
+
+    assert exc.value.message == "TOKEN_INVALID"
+    assert remote_calls == []
+
+
+def test_falls_back_to_remote_without_local_key(remote_calls):
+    verifier = TokenVerifier(
+        jwt_secret=None,
+        jwks_url=None,
+        audience="authenticated",
+        cache=TTLCache(100, 60),
+        remote_get_user=lambda token: remote_calls.append(token) or SimpleNamespace(
+            user=SimpleNamespace(id="remote-user", email=None, role=None)
+        ),
+    )
+    token = make_token()
+
+    assert verifier.verify(token).id == "remote-user"
+    assert verifier.cached_user(token).id == "remote-user"
+    assert remote_calls == [token]
@@ -0,0 +1,52 @@
+import uuid
+
+import numpy as np
+import pytest
+
+from app.services import index_store, vector_store
+from app.services.vector_store import VectorStore, choose_index_kind
+
+
+def make_embeddings(n, dim=32):
+    rng = np.random.default_rng(0)
+    return rng.standard_normal((n, dim)).astype("float32")
+
+
+def test_choose_index_kind_uses_flat_for_small_shards(monkeypatch):
+    monkeypatch.setattr(vector_store, "ANN_MIN_VECTORS", 1000)
+
+    assert choose_index_kind(999, "auto") == "flat"
+    assert choose_index_kind(1000, "auto") == "hnsw"
+    assert choose_index_kind(1000, "ivfpq") == "ivfpq"
+
+    with pytest.raises(ValueError):
+        choose_index_kind(1000, "lsh")
+
+
+def test_search_scores_are_cosine_distances():
+    store = VectorStore(dim=2)
+    store.add(np.array([[2.0, 0.0], [0.0, 3.0]]), ["x", "y"])
+
+    hits = store.search_with_scores([5.0, 0.0], k=2)
+
+    assert [chunk_id for _, chunk_id in hits] == ["x", "y"]
+    assert hits[0][0] == pytest.approx(0.0, abs=1e-6)
+    assert hits[1][0] == pytest.approx(1.0, abs=1e-6)
+
+
+@pytest.mark.parametrize("kind", ["hnsw", "ivfpq"])
+def test_ann_index_finds_exact_match_after_roundtrip(kind, tmp_path, monkeypatch):
+    monkeypatch.setattr(index_store, "INDEX_DIR", str(tmp_path))
+
+    embeddings = make_embeddings(2000)
+    ids = [uuid.uuid4() for _ in range(len(embeddings))]
+
+    store = VectorStore(dim=32, kind=kind, n=len(ids))
+    store.add(embeddings, ids)
+
+    file_id = uuid.uuid4()
+    index_store.save_index(file_id, store)
+    loaded = index_store.load_index_from_disk(file_id)
+
+    assert loaded.kind == kind
+    assert loaded.search(embeddings[7], k=5)[0] == ids[7]
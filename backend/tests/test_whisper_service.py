@@ -0,0 +1,66 @@
+import time
+
+from app.services.audio_service import plan_windows
+from app.services.whisper_service import StubTranscriptionBackend, iter_transcribe_windows
+
+
+def test_plan_windows_cuts_on_silence():
+    silences = [(100.0, 102.0), (250.0, 251.0), (500.0, 502.0)]
+
+    windows = plan_windows(700.0, silences, max_window=300.0, min_window=60.0)
+
+    assert windows == [(0.0, 250.5), (250.5, 501.0), (501.0, 700.0)]
+
+
+def test_plan_windows_hard_cuts_without_silence():
+    assert plan_windows(250.0, [], max_window=100.0, min_window=50.0) == [
+        (0.0, 100.0), (100.0, 200.0), (200.0, 250.0),
+    ]
+
+
+def test_iter_transcribe_windows_applies_global_offsets_in_order():
+    windows = [("a.mp3", 0.0, 10.0), ("b.mp3", 10.0, 18.0)]
+    progress = []
+
+    segments = [
+        segment
+        for window_segments in iter_transcribe_windows(
+            windows,
+            backend=StubTranscriptionBackend(segment_seconds=5.0),
+            concurrency=2,
+            on_progress=progress.append,
+        )
+        for segment in window_segments
+    ]
+
+    assert [(s.start, s.end) for s in segments] == [
+        (0.0, 5.0), (5.0, 10.0), (10.0, 15.0), (15.0, 18.0),
+    ]
+    assert progress == [0.5, 1.0]
+
+
+def test_slow_consumer_limits_started_windows_but_not_in_flight_requests():
+    class Tracking(StubTranscriptionBackend):
+        started = finished = 0
+
+        async def atranscribe(self, file_path, duration):
+            Tracking.started += 1
+            segments = await super().atranscribe(file_path, duration)
+            Tracking.finished += 1
+            return segments
+
+    windows = [(f"{i}.mp3", i * 10.0, i * 10.0 + 10.0) for i in range(20)]
+    stream = iter_transcribe_windows(
+        windows, backend=Tracking(latency=0.05), concurrency=2
+    )
+
+    assert next(stream)[0].start == 0.0
+    time.sleep(0.5)
+
+    # Requests kept running while the consumer was busy, but only up to the
+    # window budget (2 * concurrency, one slot freed by the consumed window)
+    assert Tracking.started == Tracking.finished == 5
+
+    rest = list(stream)
+    assert [segments[0].start for segments in rest] == [i * 10.0 for i in range(1, 20)]
+    assert Tracking.finished == 20
@@ -15,19 +15,17 @@ export async function apiClient(
     finalHeaders.Authorization = `Bearer ${token}`;
   }
 
-  if (!(body instanceof FormData)) {
+  // FormData and Blob bodies (file uploads) are sent as-is
+  const rawBody = body instanceof FormData || body instanceof Blob;
+
+  if (!rawBody) {
     finalHeaders["Content-Type"] = "application/json";
   }
 
   const response = await fetch(url, {
     method,
     headers: finalHeaders,
-    body:
-      body instanceof FormData
-        ? body
-        : body
-        ? JSON.stringify(body)
-        : null,
+    body: rawBody ? body : body ? JSON.stringify(body) : null,
   });
 
   let data = null;
@@ -49,3 +47,68 @@ export async function apiClient(
 
   return data;
 }
+
+// Stream a Server-Sent Events response, calling onEvent(event, data) per event
+export async function apiStream(
+  url,
+  { method = "POST", body, token, onEvent, signal } = {}
+) {
+  const headers = {
+    "x-api-key": API_KEY,
+    "Content-Type": "application/json",
+    Accept: "text/event-stream",
+  };
+
+  if (token) {
+    headers.Authorization = `Bearer ${token}`;
+  }
+
+  const response = await fetch(url, {
+    method,
+    headers,
+    body: body ? JSON.stringify(body) : null,
+    signal,
+  });
+
+  if (response.status === 401) {
+    triggerLogout();
+    throw new Error("Session expired. Please login again.");
+  }
+
+  if (!response.ok) {
+    let data = {};
+    try {
+      data = await response.json();
+    } catch {
+      data = {};
+    }
+    throw new Error(data.detail || data.error || "Request failed");
+  }
+
+  const reader = response.body.getReader();
+  const decoder = new TextDecoder();
+  let buffer = "";
+
+  for (;;) {
+    const { value, done } = await reader.read();
+    if (done) break;
+
+    buffer += decoder.decode(value, { stream: true });
+
+    let boundary;
+    while ((boundary = buffer.indexOf("\n\n")) !== -1) {
+      const block = buffer.slice(0, boundary);
+      buffer = buffer.slice(boundary + 2);
+
+      let event = "message";
+      let data = "";
+
+      for (const line of block.split("\n")) {
+        if (line.startsWith("event: ")) event = line.slice(7);
+        else if (line.startsWith("data: ")) data += line.slice(6);
+      }
+
+      onEvent?.(event, data ? JSON.parse(data) : {});
+    }
+  }
+}
@@ -4,8 +4,15 @@ export const API_ENDPOINTS = {
   LOGIN: `${API_BASE}/auth/login`,
   REGISTER: `${API_BASE}/auth/register`,
   UPLOAD: `${API_BASE}/upload/`,
+  UPLOAD_SESSIONS: `${API_BASE}/upload/sessions`,
+  UPLOAD_SESSION: (uploadId) => `${API_BASE}/upload/sessions/${uploadId}`,
+  UPLOAD_PART: (uploadId, partNumber) =>
+    `${API_BASE}/upload/sessions/${uploadId}/parts/${partNumber}`,
+  UPLOAD_COMPLETE: (uploadId) => `${API_BASE}/upload/sessions/${uploadId}/complete`,
   PROCESS: (fileId) => `${API_BASE}/process/${fileId}`,
+  PROCESS_STATUS: (jobId) => `${API_BASE}/process/${jobId}`,
   CHAT: `${API_BASE}/chat/`,
+  CHAT_STREAM: `${API_BASE}/chat/stream`,
 };
 
 export default API_ENDPOINTS;
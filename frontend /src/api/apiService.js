@@ -1,6 +1,16 @@
-import { apiClient } from "./apiClient";
+import { apiClient, apiStream } from "./apiClient";
 import API_ENDPOINTS from "./apiEnums";
 
+const UPLOAD_PART_SIZE = 8 * 1024 * 1024;
+const UPLOAD_PART_ATTEMPTS = 3;
+
+async function sha256Hex(blob) {
+  const digest = await crypto.subtle.digest("SHA-256", await blob.arrayBuffer());
+  return Array.from(new Uint8Array(digest))
+    .map((b) => b.toString(16).padStart(2, "0"))
+    .join("");
+}
+
 export const apiService = {
   login(payload) {
     return apiClient(API_ENDPOINTS.LOGIN, {
@@ -27,6 +37,48 @@ export const apiService = {
     });
   },
 
+  // Resumable upload in checksummed parts; parts that fail are re-sent
+  // based on what the server reports as missing
+  async uploadFileChunked(file, token, { partSize = UPLOAD_PART_SIZE, onProgress } = {}) {
+    const session = await apiClient(API_ENDPOINTS.UPLOAD_SESSIONS, {
+      method: "POST",
+      body: { filename: file.name, size: file.size, part_size: partSize },
+      token,
+    });
+
+    let missing = session.missing_parts;
+
+    for (let attempt = 0; missing.length && attempt < UPLOAD_PART_ATTEMPTS; attempt++) {
+      for (const partNumber of missing) {
+        const start = (partNumber - 1) * session.part_size;
+        const part = file.slice(start, start + session.part_size);
+
+        try {
+          await apiClient(API_ENDPOINTS.UPLOAD_PART(session.upload_id, partNumber), {
+            method: "PUT",
+            body: part,
+            headers: { "x-part-sha256": await sha256Hex(part) },
+            token,
+          });
+        } catch {
+          continue;
+        }
+      }
+
+      const status = await apiClient(API_ENDPOINTS.UPLOAD_SESSION(session.upload_id), {
+        token,
+      });
+      missing = status.missing_parts;
+
+      onProgress?.(status.received_parts.length / status.part_count);
+    }
+
+    return apiClient(API_ENDPOINTS.UPLOAD_COMPLETE(session.upload_id), {
+      method: "POST",
+      token,
+    });
+  },
+
   processFile(fileId, token) {
     return apiClient(API_ENDPOINTS.PROCESS(fileId), {
       method: "POST",
@@ -34,6 +86,40 @@ export const apiService = {
     });
   },
 
+  getProcessStatus(jobId, token) {
+    return apiClient(API_ENDPOINTS.PROCESS_STATUS(jobId), {
+      token,
+    });
+  },
+
+  async waitForProcessing(jobId, token, { interval = 2000 } = {}) {
+    for (;;) {
+      const job = await this.getProcessStatus(jobId, token);
+
+      if (job.status === "succeeded") {
+        return job;
+      }
+
+      if (job.status === "failed") {
+        throw new Error(job.error || "Processing failed");
+      }
+
+      await new Promise((resolve) => setTimeout(resolve, interval));
+    }
+  },
+
+  chatStream(question, fileId, token, { onEvent, signal } = {}) {
+    return apiStream(API_ENDPOINTS.CHAT_STREAM, {
+      body: {
+        question,
+        file_id: fileId,
+      },
+      token,
+      onEvent,
+      signal,
+    });
+  },
+
   chat(question, fileId, token) {
     return apiClient(API_ENDPOINTS.CHAT, {
       method: "POST",
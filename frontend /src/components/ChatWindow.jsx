@@ -14,7 +14,8 @@ import { Send, Loader2, MessageSquare, Mic, MicOff, Bot, User } from "lucide-rea
 
 const ChatWindow = ({ onSeekTo }) => {
   const { uploadedFile } = useFile();
-  const { ask, messages, loading, error, clearChat } = useChat();
+  const { ask, messages, loading, streaming, error, clearChat } = useChat();
+  const busy = loading || streaming;
 
   const [inputValue, setInputValue] = useState("");
   const [isRecording, setIsRecording] = useState(false);
@@ -291,7 +292,7 @@ const ChatWindow = ({ onSeekTo }) => {
                 value={inputValue}
                 onChange={(e) => setInputValue(e.target.value)}
                 onKeyDown={handleKeyPress}
-                disabled={loading}
+                disabled={busy}
                 className="min-h-[44px] pl-3 pr-10 rounded-lg text-sm"
               />
               
@@ -305,7 +306,7 @@ const ChatWindow = ({ onSeekTo }) => {
                       : "text-muted-foreground hover:text-primary hover:bg-primary/10"
                   }`}
                   onClick={toggleRecording}
-                  disabled={loading}
+                  disabled={busy}
                 >
                   {isRecording ? (
                     <MicOff className="h-4 w-4" />
@@ -318,11 +319,11 @@ const ChatWindow = ({ onSeekTo }) => {
             
             <Button
               onClick={handleSendMessage}
-              disabled={!inputValue.trim() || loading}
+              disabled={!inputValue.trim() || busy}
               size="default"
               className="h-[44px] px-4 rounded-lg min-w-[44px]"
             >
-              {loading ? (
+              {busy ? (
                 <Loader2 className="h-4 w-4 animate-spin" />
               ) : (
                 <Send className="h-4 w-4" />
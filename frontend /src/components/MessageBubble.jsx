@@ -86,6 +86,19 @@ const MessageBubble = ({
               <span>Relevant sections:</span>
             </div>
             {timestamps.map((ts, index) => {
+              if (ts.page_start != null) {
+                return (
+                  <span
+                    key={index}
+                    className="inline-flex items-center h-8 px-3 text-xs rounded-lg border border-muted-foreground/20 text-muted-foreground"
+                  >
+                    {ts.page_start === ts.page_end
+                      ? `p. ${ts.page_start}`
+                      : `pp. ${ts.page_start}–${ts.page_end}`}
+                  </span>
+                );
+              }
+
               const duration = ts.end - ts.start;
               return (
                 <Button
@@ -2,7 +2,9 @@ import { useState } from "react";
 import { apiService } from "@/api/apiService";
 
 export function useChat() {
+  // loading: waiting for the first token, streaming: answer is being generated
   const [loading, setLoading] = useState(false);
+  const [streaming, setStreaming] = useState(false);
   const [error, setError] = useState(null);
   const [messages, setMessages] = useState([]);
 
@@ -10,27 +12,54 @@ export function useChat() {
     setLoading(true);
     setError(null);
 
+    setMessages((prev) => [...prev, { role: "user", content: question }]);
+
+    let answer = "";
+    let sources = [];
+    let started = false;
+
+    // Add the assistant message on the first token, then update it in place
+    const showAnswer = () => {
+      const message = { role: "assistant", content: answer, sources };
+
+      setMessages((prev) =>
+        started ? [...prev.slice(0, -1), message] : [...prev, message]
+      );
+
+      if (!started) {
+        started = true;
+        setLoading(false);
+        setStreaming(true);
+      }
+    };
+
     try {
       const token = localStorage.getItem("auth_token");
 
-      const res = await apiService.chat(question, fileId, token);
-
-      setMessages((prev) => [
-        ...prev,
-        { role: "user", content: question },
-        {
-          role: "assistant",
-          content: res.answer,
-          sources: res.sources || [],
+      await apiService.chatStream(question, fileId, token, {
+        onEvent: (event, data) => {
+          if (event === "sources") {
+            sources = data.sources || [];
+          } else if (event === "token") {
+            answer += data.content;
+            showAnswer();
+          } else if (event === "error") {
+            throw new Error(data.error || "Chat failed");
+          }
         },
-      ]);
+      });
+
+      if (!started) {
+        showAnswer();
+      }
 
-      return res;
+      return { answer, sources };
     } catch (err) {
       setError(err?.message || "Chat failed");
       throw err;
     } finally {
       setLoading(false);
+      setStreaming(false);
     }
   };
 
@@ -38,5 +67,5 @@ export function useChat() {
     setMessages([]);
   };
 
-  return { ask, messages, clearChat, loading, error };
+  return { ask, messages, clearChat, loading, streaming, error };
 }
@@ -17,7 +17,8 @@ export function useProcess() {
 
     try {
       const token = localStorage.getItem("auth_token");
-      return await apiService.processFile(uploadedFile.fileId, token);
+      const { job_id } = await apiService.processFile(uploadedFile.fileId, token);
+      return await apiService.waitForProcessing(job_id, token);
     } catch (err) {
       setError(err.message);
       throw err;
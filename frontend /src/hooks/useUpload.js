@@ -2,6 +2,9 @@ import { useState } from "react";
 import { apiService } from "@/api/apiService";
 import { useFile } from "../contexts/FileContext";
 
+// Larger files go through the resumable chunked upload
+const CHUNKED_UPLOAD_THRESHOLD = 32 * 1024 * 1024;
+
 export function useUpload() {
   const [loading, setLoading] = useState(false);
   const [error, setError] = useState(null);
@@ -16,10 +19,14 @@ export function useUpload() {
     try {
       const token = localStorage.getItem("auth_token");
 
-      const uploadRes = await apiService.uploadFile(file, token);
+      const uploadRes =
+        file.size > CHUNKED_UPLOAD_THRESHOLD
+          ? await apiService.uploadFileChunked(file, token)
+          : await apiService.uploadFile(file, token);
 
-      // Process file
-      await apiService.processFile(uploadRes.file_id, token);
+      // Process file in the background and wait for the job to finish
+      const { job_id } = await apiService.processFile(uploadRes.file_id, token);
+      await apiService.waitForProcessing(job_id, token);
 
       setFile(file, uploadRes);
 